@@ -0,0 +1,53 @@
+"""
+Benchmark that measures the cost of entering a block while the number of
+globals grows. Block entry must not depend on program size, so the per-entry
+time is expected to stay flat across all rows.
+"""
+
+import sys
+import time
+
+from plox.backend.visitors.eval.visitor import Eval
+from plox.backend.visitors.resolver import Resolver
+from plox.frontend.parser import Parser
+from plox.frontend.scanner import Scanner
+
+GLOBALS = [10, 100, 1000]
+ITERATIONS = 2000
+MAX_RATIO = 2.0
+
+
+def source(globals_count: int, iterations: int) -> str:
+    lines = [f"var g{i} = {i};" for i in range(globals_count)]
+    lines.append(f"for (var i = 0; i < {iterations}; i = i + 1) {{ {{ }} }}")
+    return "\n".join(lines)
+
+
+def measure(globals_count: int, iterations: int) -> float:
+    stmts = Parser(tokens=list(Scanner(source(globals_count, iterations)))).parse()
+    Resolver().resolve(stmts)
+    eval: Eval = Eval()
+    start = time.perf_counter()
+    for stmt in stmts:
+        eval.execute(stmt)
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    timings: list[float] = []
+    measure(GLOBALS[0], ITERATIONS)  # warm up
+    print(f"{'globals':>8} {'us/entry':>10}")
+    for globals_count in GLOBALS:
+        per_entry = min(measure(globals_count, ITERATIONS) for _ in range(3))
+        timings.append(per_entry)
+        print(f"{globals_count:>8} {per_entry * 1e6:>10.2f}")
+
+    ratio = max(timings) / min(timings)
+    print(f"max/min ratio: {ratio:.2f}")
+    if ratio > MAX_RATIO:
+        print(f"block entry cost grows with globals (ratio > {MAX_RATIO})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
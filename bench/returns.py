@@ -0,0 +1,65 @@
+"""
+Benchmark of small-function-heavy code where each `return` sits under a
+growing number of nested blocks. Every row compares a function returning
+from the innermost block with one entering the same blocks and returning
+after them: returning must not get more expensive with the depth it
+unwinds through, so the two are expected to take about the same time.
+"""
+
+import sys
+import time
+
+from plox.backend.visitors.eval.visitor import Eval
+from plox.backend.visitors.resolver import Resolver
+from plox.frontend.parser import Parser
+from plox.frontend.scanner import Scanner
+
+DEPTHS = [1, 4, 16]
+CALLS = 20000
+MAX_RATIO = 1.25
+
+
+def source(depth: int, calls: int, nested: bool) -> str:
+    lines: list[str] = ["fun f(n) {"]
+    for level in range(depth):
+        # alternate plain blocks and `if` bodies
+        lines.append("if (n == n) {" if level % 2 else "{")
+    if nested:
+        lines.append("return n + 1;")
+    lines.extend("}" for _ in range(depth))
+    if not nested:
+        lines.append("return n + 1;")
+    lines.append("}")
+    lines.append("var total = 0;")
+    lines.append(f"for (var i = 0; i < {calls}; i = i + 1) total = f(total);")
+    return "\n".join(lines)
+
+
+def measure(depth: int, calls: int, nested: bool) -> float:
+    stmts = Parser(tokens=list(Scanner(source(depth, calls, nested)))).parse()
+    Resolver().resolve(stmts)
+    eval: Eval = Eval()
+    start = time.perf_counter()
+    eval.run(stmts)
+    return (time.perf_counter() - start) / calls
+
+
+def main():
+    ratios: list[float] = []
+    measure(DEPTHS[0], CALLS, True)  # warm up
+    print(f"{'depth':>8} {'us/call':>10} {'flat us':>10} {'ratio':>8}")
+    for depth in DEPTHS:
+        nested = min(measure(depth, CALLS, True) for _ in range(3))
+        flat = min(measure(depth, CALLS, False) for _ in range(3))
+        ratios.append(nested / flat)
+        print(
+            f"{depth:>8} {nested * 1e6:>10.2f} {flat * 1e6:>10.2f} {ratios[-1]:>8.2f}"
+        )
+
+    if max(ratios) > MAX_RATIO:
+        print(f"return cost grows with nesting depth (ratio > {MAX_RATIO})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark of scanner throughput and token memory on a large generated
+program. Every scanner must produce the same tokens as `Scanner`; the run
+fails if one does not. `compact` keeps the tokens as a `TokenStream`, the
+others as a list of `Token` objects. `stream` scans a memory-mapped copy
+of the program, a few times over, dropping each token once it is counted;
+its seconds are per copy and its memory is the peak while scanning, which
+stays the same however large the file is.
+"""
+
+from pathlib import Path
+from typing import Any, Callable
+import mmap
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from plox.frontend.scanner import RegexScanner, Scanner, StreamScanner, scan
+from plox.frontend.tokens import Token
+
+SCANNERS: dict[str, Callable[[str], Any]] = {
+    "char": lambda text: list(Scanner(text)),
+    "regex": lambda text: list(RegexScanner(text)),
+    "compact": scan,
+}
+FUNCTIONS = 4000
+# how many copies of the program the streamed file holds
+COPIES = 8
+
+
+def source(functions: int) -> str:
+    lines: list[str] = []
+    for i in range(functions):
+        lines.append(f"// helper number {i}")
+        lines.append(f"fun helper{i}(a, b) {{")
+        lines.append(f'    var label = "helper {i}";')
+        lines.append(f"    if (a >= {i}.25 and b != nil) return a * b - {i};")
+        lines.append('    return label + "!";')
+        lines.append("}")
+    return "\n".join(lines)
+
+
+def measure(scanner: Callable[[Any], Any], text: Any) -> float:
+    start = time.perf_counter()
+    scanner(text)
+    return time.perf_counter() - start
+
+
+def memory(scanner: Callable[[str], Any], text: str) -> int:
+    tracemalloc.start()
+    tokens = scanner(text)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tokens
+    return size
+
+
+def stream(path: Path) -> int:
+    """How many tokens the file at `path` scans into."""
+    count: int = 0
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            for _ in StreamScanner(source):
+                count += 1
+    return count
+
+
+def peak(path: Path) -> int:
+    tracemalloc.start()
+    stream(path)
+    _, size = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size
+
+
+def main():
+    text: str = source(FUNCTIONS)
+    expected: list[Token] = list(Scanner(text))
+    print(f"{len(text) / 1e6:.1f} MB, {len(expected)} tokens")
+    print(f"{'scanner':>8} {'tokens/s':>12} {'seconds':>8} {'MB':>8}")
+
+    for name, scanner in SCANNERS.items():
+        if list(scanner(text)) != expected:
+            print(f"{name} scanner produced different tokens")
+            sys.exit(1)
+        seconds: float = min(measure(scanner, text) for _ in range(3))
+        size: float = memory(scanner, text) / 1e6
+        rate: float = len(expected) / seconds
+        print(f"{name:>8} {rate:>12,.0f} {seconds:>8.3f} {size:>8.1f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path: Path = Path(directory) / "large.lox"
+        path.write_text((text + "\n") * COPIES)
+        # one EOF token for all the copies
+        if stream(path) != (len(expected) - 1) * COPIES + 1:
+            print("stream scanner produced a different number of tokens")
+            sys.exit(1)
+        seconds = min(measure(stream, path) for _ in range(3)) / COPIES
+        size = peak(path) / 1e6
+    rate = len(expected) / seconds
+    print(f"{'stream':>8} {rate:>12,.0f} {seconds:>8.3f} {size:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+End-to-end benchmark over the Lox programs in `bench/programs`. Scanning,
+parsing, resolving (with the optimizer) and execution are timed separately,
+each as the best of a few runs. Results are written as JSON, appended to a
+history file and compared with a stored baseline: a phase that got slower
+than its threshold allows is reported and makes the run fail.
+
+    python -m bench.suite                  # run and compare with baseline
+    python -m bench.suite --save-baseline  # make this run the new baseline
+    python -m bench.suite --threshold 0.2 --phase-threshold scan=0.5
+"""
+
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+
+from plox import __version__
+from plox.backend.optimize.optimizer import Optimizer
+from plox.backend.visitors.eval.runtime import Context
+from plox.backend.visitors.resolver import Resolver
+from plox.frontend.parser import Parser
+from plox.frontend.tokens import Token, TokenStream
+from plox.interpreter import BACKENDS, SCANNERS
+
+BENCH_DIR = Path(__file__).parent
+PROGRAMS_DIR = BENCH_DIR / "programs"
+PHASES = ["scan", "parse", "resolve", "exec"]
+# phases faster than this are too noisy to flag as regressions
+MIN_SECONDS = 0.002
+
+Timings = dict[str, float]
+
+
+def programs(directory: Path = PROGRAMS_DIR) -> dict[str, str]:
+    return {path.stem: path.read_text() for path in sorted(directory.glob("*.lox"))}
+
+
+def tokenize(source: str, scanner: str) -> list[Token] | TokenStream:
+    tokens: Iterable[Token] = SCANNERS[scanner](source)
+    if isinstance(tokens, TokenStream):
+        return tokens
+    return list(tokens)
+
+
+def run_once(source: str, backend: str, scanner: str) -> Timings:
+    timings: Timings = {}
+
+    def timed(phase: str, step: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        result = step()
+        timings[phase] = time.perf_counter() - start
+        return result
+
+    tokens = timed("scan", lambda: tokenize(source, scanner))
+    parser: Parser = Parser(tokens=tokens)
+    stmts = timed("parse", parser.parse)
+    if parser.errors:
+        raise ValueError(f"parse error: {parser.errors[0].message}")
+
+    def resolve() -> Any:
+        resolver: Resolver = Resolver()
+        resolver.resolve(stmts)
+        if resolver.errors:
+            raise ValueError(f"resolve error: {resolver.errors[0].message}")
+        return Optimizer().optimize(stmts)
+
+    stmts = timed("resolve", resolve)
+    with redirect_stdout(io.StringIO()):
+        timed("exec", lambda: BACKENDS[backend](Context()).run(stmts))
+    return timings
+
+
+def measure(source: str, backend: str, scanner: str, repeat: int) -> Timings:
+    runs: list[Timings] = [run_once(source, backend, scanner) for _ in range(repeat)]
+    return {phase: min(run[phase] for run in runs) for phase in PHASES}
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float,
+    phase_thresholds: Optional[dict[str, float]] = None,
+) -> list[str]:
+    """Returns a message for every phase that regressed past its threshold."""
+    phase_thresholds = phase_thresholds or {}
+    regressions: list[str] = []
+    for name, timings in results["programs"].items():
+        old: Optional[Timings] = baseline["programs"].get(name)
+        if old is None:
+            continue
+        for phase, seconds in timings.items():
+            if phase not in old or seconds < MIN_SECONDS:
+                continue
+            allowed: float = phase_thresholds.get(phase, threshold)
+            change: float = seconds / old[phase] - 1
+            if change > allowed:
+                regressions.append(
+                    f"{name} {phase}: {old[phase] * 1e3:.1f}ms -> "
+                    f"{seconds * 1e3:.1f}ms (+{change:.0%}, allowed +{allowed:.0%})"
+                )
+    return regressions
+
+
+def report(results: dict[str, Any], baseline: Optional[dict[str, Any]]) -> None:
+    print(f"{'program':>10} " + " ".join(f"{phase + ' ms':>10}" for phase in PHASES))
+    for name, timings in results["programs"].items():
+        old: Optional[Timings] = None
+        if baseline is not None:
+            old = baseline["programs"].get(name)
+        cells: list[str] = []
+        for phase in PHASES:
+            cell: str = f"{timings[phase] * 1e3:.1f}"
+            if old is not None and phase in old:
+                cell += f" {timings[phase] / old[phase] - 1:+.0%}"
+            cells.append(f"{cell:>10}")
+        print(f"{name:>10} " + " ".join(cells))
+
+
+def threshold_pair(text: str) -> tuple[str, float]:
+    phase, _, value = text.partition("=")
+    if phase not in PHASES:
+        raise argparse.ArgumentTypeError(f"unknown phase '{phase}'")
+    return phase, float(value)
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    argparser.add_argument("--backend", choices=BACKENDS.keys(), default="eval")
+    argparser.add_argument("--scanner", choices=SCANNERS.keys(), default="regex")
+    argparser.add_argument(
+        "--repeat", type=int, default=5, help="runs per program, the fastest counts"
+    )
+    argparser.add_argument("--output", type=Path, default=BENCH_DIR / "results.json")
+    argparser.add_argument("--history", type=Path, default=BENCH_DIR / "history.jsonl")
+    argparser.add_argument("--baseline", type=Path, default=BENCH_DIR / "baseline.json")
+    argparser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store this run as the baseline instead of comparing with it",
+    )
+    argparser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="allowed slowdown of any phase as a fraction (default: 0.10)",
+    )
+    argparser.add_argument(
+        "--phase-threshold",
+        type=threshold_pair,
+        action="append",
+        default=[],
+        metavar="PHASE=FRACTION",
+        help="allowed slowdown of one phase, overrides --threshold",
+    )
+    args = argparser.parse_args()
+
+    results: dict[str, Any] = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "plox": __version__,
+        "python": platform.python_version(),
+        "backend": args.backend,
+        "scanner": args.scanner,
+        "programs": {
+            name: measure(source, args.backend, args.scanner, args.repeat)
+            for name, source in programs().items()
+        },
+    }
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+    with args.history.open("a") as history:
+        history.write(json.dumps(results) + "\n")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        report(results, None)
+        return
+
+    baseline: Optional[dict[str, Any]] = None
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if (baseline["backend"], baseline["scanner"]) != (args.backend, args.scanner):
+            print(
+                f"baseline was measured with backend={baseline['backend']} "
+                f"scanner={baseline['scanner']}, not comparing"
+            )
+            baseline = None
+    report(results, baseline)
+    if baseline is None:
+        return
+
+    regressions: list[str] = compare(
+        results, baseline, args.threshold, dict(args.phase_threshold)
+    )
+    for regression in regressions:
+        print(f"regression: {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
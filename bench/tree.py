@@ -0,0 +1,141 @@
+"""
+Benchmark of syntax tree memory and speed on a large generated program. The
+program is parsed, resolved and run with the slotted node classes astgen
+emits, then again in a child process where `plox.frontend.ast` is replaced by
+the same classes without slots, as astgen used to emit them. Memory is what
+parsing allocates on top of the scanned tokens: the nodes and their lists.
+Absent children (a missing `else`, `return;`, `var x;`) are `None` in both
+layouts; the placeholder nodes the parser used to allocate for them are
+counted separately.
+"""
+
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+
+AST_PATH = Path(__file__).parent.parent / "plox" / "frontend" / "ast.py"
+FUNCTIONS = 2000
+LAYOUTS = ["slots", "dict"]
+
+
+def source(functions: int) -> str:
+    lines: list[str] = []
+    for i in range(functions):
+        lines.append(f"fun helper{i}(a, b) {{")
+        lines.append("    var total;")
+        lines.append("    total = 0;")
+        lines.append("    for (var i = 0; i < b; i = i + 1) {")
+        lines.append(
+            f"        if (i > a) total = total + i * {i}; else total = total - 1;"
+        )
+        lines.append("        if (total > 1000000) return;")
+        lines.append("    }")
+        lines.append("    return total;")
+        lines.append("}")
+    lines.append("var sum = 0;")
+    lines.extend(f"sum = sum + helper{i}(3, 20);" for i in range(functions))
+    return "\n".join(lines)
+
+
+def install_dict_nodes() -> None:
+    """Replaces `plox.frontend.ast`, before anything imports it, unslotted."""
+    text: str = AST_PATH.read_text()
+    text = text.replace("@dataclass(slots=True)", "@dataclass")
+    text = text.replace("    __slots__ = ()\n", "")
+    module: ModuleType = ModuleType("plox.frontend.ast")
+    sys.modules["plox.frontend.ast"] = module
+    exec(compile(text, str(AST_PATH), "exec"), module.__dict__)
+
+
+def measure() -> dict[str, Any]:
+    from plox.backend.visitors.eval.visitor import Eval
+    from plox.backend.visitors.resolver import Resolver
+    from plox.frontend import ast
+    from plox.frontend.parser import Parser
+    from plox.frontend.scanner import Scanner
+
+    text: str = source(FUNCTIONS)
+    tokens = list(Scanner(text))
+
+    tracemalloc.start()
+    stmts = Parser(tokens=list(tokens)).parse()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    parse: float = min(
+        timed(lambda: Parser(tokens=list(tokens)).parse()) for _ in range(3)
+    )
+    resolve: float = timed(lambda: Resolver().resolve(stmts))
+    run: float = min(timed(lambda: Eval().run(stmts)) for _ in range(3))
+
+    nodes, absent = count(stmts, ast)
+    return {
+        "nodes": nodes,
+        "absent": absent,
+        "bytes": size,
+        "parse": parse,
+        "resolve": resolve,
+        "exec": run,
+    }
+
+
+def timed(step: Any) -> float:
+    start = time.perf_counter()
+    step()
+    return time.perf_counter() - start
+
+
+def count(stmts: list[Any], ast: ModuleType) -> tuple[int, int]:
+    """Nodes in the tree, and children left out as `None`."""
+    nodes, absent = 0, 0
+    pending: list[Any] = list(stmts)
+    while pending:
+        node: Any = pending.pop()
+        nodes += 1
+        for name in node.__dataclass_fields__:
+            child: Any = getattr(node, name)
+            if isinstance(child, list):
+                pending.extend(c for c in child if isinstance(c, (ast.Expr, ast.Stmt)))
+            elif isinstance(child, (ast.Expr, ast.Stmt)):
+                pending.append(child)
+            elif child is None and name in ("elseBranch", "value", "initializer"):
+                absent += isinstance(node, ast.Stmt)
+    return nodes, absent
+
+
+def main():
+    if sys.argv[1:] == ["--dict"]:
+        install_dict_nodes()
+        print(json.dumps(measure()))
+        return
+
+    results: dict[str, dict[str, Any]] = {"slots": measure()}
+    child = subprocess.run(
+        [sys.executable, "-m", "bench.tree", "--dict"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=AST_PATH.parent.parent.parent,
+    )
+    results["dict"] = json.loads(child.stdout)
+
+    slots: dict[str, Any] = results["slots"]
+    print(f"{slots['nodes']} nodes, {slots['absent']} absent children now `None`")
+    print(
+        f"{'layout':>8} {'MB':>8} {'B/node':>8} {'parse s':>8} {'resolve s':>10} {'exec s':>8}"
+    )
+    for layout in LAYOUTS:
+        r: dict[str, Any] = results[layout]
+        print(
+            f"{layout:>8} {r['bytes'] / 1e6:>8.2f} {r['bytes'] / r['nodes']:>8.0f} "
+            f"{r['parse']:>8.3f} {r['resolve']:>10.3f} {r['exec']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
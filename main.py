@@ -1,21 +1,125 @@
 from pathlib import Path
+import argparse
 import sys
+import time
 
-from plox.interpreter import Interpreter
+from plox.batch import ScriptResult, run_batch, summary
+from plox.interpreter import BACKENDS, SCANNERS, Interpreter
 
 
 def main():
-    match len(sys.argv):
-        case 2:
-            interpreter: Interpreter = Interpreter()
-            interpreter.run_file(Path(sys.argv[1]))
-        case 1:
-            interpreter: Interpreter = Interpreter()
-            interpreter.run_interactively()
-        case _:
-            print(f"usage: {sys.argv[0]} <file_path>")
-            print(f"or just '{sys.argv[0]}' to run in interactive mode")
-            exit(64)
+    argparser = argparse.ArgumentParser(
+        description="Run a Lox script, or start interactive mode without one."
+    )
+    argparser.add_argument("file_path", nargs="?", type=Path)
+    argparser.add_argument(
+        "--backend",
+        choices=BACKENDS.keys(),
+        default="eval",
+        help="execution backend (default: eval)",
+    )
+    argparser.add_argument(
+        "--scanner",
+        choices=SCANNERS.keys(),
+        default="regex",
+        help="scanner implementation (default: regex)",
+    )
+    argparser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="do not read or write parsed trees or compiled code in the on-disk cache",
+    )
+    argparser.add_argument(
+        "--profile",
+        action="store_true",
+        help="report time per phase and per AST node class on stderr",
+    )
+    argparser.add_argument(
+        "--profile-calls",
+        action="store_true",
+        help="report calls and time per Lox function on stderr (eval backend)",
+    )
+    argparser.add_argument(
+        "--flamegraph",
+        type=Path,
+        metavar="PATH",
+        help="profile Lox calls and write collapsed stacks for flamegraph tools",
+    )
+    argparser.add_argument(
+        "--stream",
+        action="store_true",
+        help="run each top-level declaration as soon as it is parsed, without the cache",
+    )
+    argparser.add_argument(
+        "--memo-size",
+        type=int,
+        metavar="N",
+        help="results 'memo' keeps per function (default: 1024)",
+    )
+    argparser.add_argument(
+        "--batch",
+        type=Path,
+        metavar="DIR",
+        help="run every .lox script under DIR on a pool of processes",
+    )
+    argparser.add_argument(
+        "--workers",
+        type=int,
+        help="processes running --batch scripts (default: one per CPU)",
+    )
+    args = argparser.parse_args()
+    if args.memo_size is not None and args.memo_size < 1:
+        argparser.error("--memo-size must be at least 1")
+    # the eval backend runs either profiler, not both at once
+    if args.profile and (args.profile_calls or args.flamegraph is not None):
+        argparser.error(
+            "--profile cannot be combined with --profile-calls or --flamegraph"
+        )
+
+    if args.batch is not None:
+        if args.file_path is not None:
+            argparser.error("--batch runs a directory, not a script")
+        batch(args)
+        return
+
+    interpreter: Interpreter = Interpreter(
+        backend=args.backend,
+        cache=not args.no_cache,
+        scanner=args.scanner,
+        profile=args.profile,
+        profile_calls=args.profile_calls,
+        flamegraph=args.flamegraph,
+        stream=args.stream,
+        memo_size=args.memo_size,
+    )
+    if args.file_path is not None:
+        interpreter.run_file(args.file_path)
+    else:
+        interpreter.run_interactively()
+
+
+def batch(args: argparse.Namespace) -> None:
+    paths: list[Path] = sorted(args.batch.rglob("*.lox"))
+    start: float = time.perf_counter()
+    results: list[ScriptResult] = run_batch(
+        paths,
+        workers=args.workers,
+        backend=args.backend,
+        cache=not args.no_cache,
+        scanner=args.scanner,
+        stream=args.stream,
+        memo_size=args.memo_size,
+    )
+    seconds: float = time.perf_counter() - start
+
+    for result in results:
+        print(f"==> {result.path} <==")
+        sys.stdout.write(result.output)
+        if result.errors:
+            sys.stderr.write(f"==> {result.path} <==\n{result.errors}")
+    sys.stderr.write(summary(results, seconds))
+    if any(result.status != 0 for result in results):
+        sys.exit(65)
 
 
 if __name__ == "__main__":
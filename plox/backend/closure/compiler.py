@@ -0,0 +1,352 @@
+from typing import Any, Callable, Optional
+import operator
+
+from plox.frontend.tokens import Token, TokenType as TT
+from plox.frontend.ast import (
+    Expr,
+    AssignExpr,
+    GroupingExpr,
+    BinaryExpr,
+    LogicalExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    CallExpr,
+    Stmt,
+    ExpressionStmt,
+    IfStmt,
+    WhileStmt,
+    PrintStmt,
+    VarStmt,
+    FunctionStmt,
+    ReturnStmt,
+    ImportStmt,
+    BlockStmt,
+    ExprVisitor,
+    StmtVisitor,
+)
+from plox.modules import import_module
+from plox.backend.visitors.eval.runtime import (
+    Context,
+    LoxCallable,
+    LoxFunction,
+    RuntimeException,
+    NativeError,
+    Return,
+    is_truthy,
+    is_equal,
+    stringify,
+    STRINGS,
+    concat,
+)
+
+type ExprFn = Callable[[Context], Any]
+type StmtFn = Callable[[Context], None]
+
+
+class ClosureEval(ExprVisitor[ExprFn], StmtVisitor[StmtFn]):
+    """
+    Compiles every node once into a Python closure taking the current
+    `Context`. Functions are plain `LoxFunction`s.
+    """
+
+    def __init__(self, ctx: Optional[Context] = None) -> None:
+        self.globals = ctx if ctx is not None else Context()
+        self.globals.lox_functions = True
+        self.__bodies: dict[int, tuple[list[Stmt], list[StmtFn]]] = {}
+        self.__scope_depth = 0
+
+    def run(self, stmts: list[Stmt]) -> None:
+        compiled: list[StmtFn] = [self.compile(stmt) for stmt in stmts]
+        for stmt in compiled:
+            stmt(self.globals)
+
+    def compile(self, stmt: Stmt) -> StmtFn:
+        return stmt.accept(self)
+
+    def exec_block(self, stmts: list[Stmt], ctx: Context) -> None:
+        # function bodies are compiled on their first call; the statement
+        # list is kept alongside so its id cannot be reused while cached
+        if (body := self.__bodies.get(id(stmts))) is None:
+            body = self.__bodies[id(stmts)] = (stmts, self.__block(stmts))
+        for stmt in body[1]:
+            stmt(ctx)
+
+    # ExprVisitor
+
+    def visitAssignExpr(self, expr: AssignExpr) -> ExprFn:
+        value: ExprFn = self.__expr(expr.value)
+        name: Token = expr.name
+        slot: int = expr.slot
+
+        match expr.depth:
+            case -1:
+                globals: Context = self.globals
+                values: dict[str, Any] = globals.values
+                key: str = name.lexeme
+
+                def assign_global(ctx: Context) -> Any:
+                    result: Any = value(ctx)
+                    if key not in values and not globals.load_native(key):
+                        raise RuntimeException(name, f"Undefined variable '{key}'.")
+                    values[key] = result
+                    return result
+
+                return assign_global
+            case 0:
+
+                def assign_local(ctx: Context) -> Any:
+                    result: Any = value(ctx)
+                    ctx.slots[slot] = result
+                    return result
+
+                return assign_local
+            case depth:
+
+                def assign_outer(ctx: Context) -> Any:
+                    result: Any = value(ctx)
+                    ctx.ancestor(depth).slots[slot] = result
+                    return result
+
+                return assign_outer
+
+    def visitLogicalExpr(self, expr: LogicalExpr) -> ExprFn:
+        left: ExprFn = self.__expr(expr.left)
+        right: ExprFn = self.__expr(expr.right)
+
+        if expr.operator.type == TT.OR:
+
+            def logical_or(ctx: Context) -> Any:
+                value: Any = left(ctx)
+                return value if is_truthy(value) else right(ctx)
+
+            return logical_or
+
+        def logical_and(ctx: Context) -> Any:
+            value: Any = left(ctx)
+            return right(ctx) if is_truthy(value) else value
+
+        return logical_and
+
+    def visitBinaryExpr(self, expr: BinaryExpr) -> ExprFn:
+        left: ExprFn = self.__expr(expr.left)
+        right: ExprFn = self.__expr(expr.right)
+        op: Token = expr.operator
+
+        match op.type:
+            case TT.PLUS:
+
+                def add(ctx: Context) -> Any:
+                    a: Any = left(ctx)
+                    b: Any = right(ctx)
+                    if isinstance(a, float) and isinstance(b, float):
+                        return a + b
+                    if isinstance(a, STRINGS) and isinstance(b, STRINGS):
+                        return concat(a, b)
+                    raise RuntimeException(
+                        op, "Operands must be two numbers or two strings."
+                    )
+
+                return add
+            case TT.EQ_EQ:
+                return lambda ctx: is_equal(left(ctx), right(ctx))
+            case TT.BANG_EQ:
+                return lambda ctx: not is_equal(left(ctx), right(ctx))
+
+        operation: Callable[[float, float], Any] = NUMERIC_OPS[op.type]
+
+        def numeric(ctx: Context) -> Any:
+            a: Any = left(ctx)
+            b: Any = right(ctx)
+            if not isinstance(a, float) or not isinstance(b, float):
+                raise RuntimeException(op, "operands must be numbers.")
+            return operation(a, b)
+
+        return numeric
+
+    def visitCallExpr(self, expr: CallExpr) -> ExprFn:
+        callee: ExprFn = self.__expr(expr.callee)
+        arguments: list[ExprFn] = [self.__expr(arg) for arg in expr.arguments]
+        paren: Token = expr.paren
+        backend: ClosureEval = self
+
+        def call(ctx: Context) -> Any:
+            function: Any = callee(ctx)
+            args: list[Any] = [arg(ctx) for arg in arguments]
+            if not isinstance(function, LoxCallable):
+                raise RuntimeException(paren, "Can only call functions and classes.")
+            if function.arity() != len(args):
+                raise RuntimeException(
+                    paren, f"Expected {function.arity()} arguments got {len(args)}."
+                )
+            try:
+                return function.call(backend, args)
+            except NativeError as e:
+                raise RuntimeException(paren, e.message)
+
+        return call
+
+    def visitGroupingExpr(self, expr: GroupingExpr) -> ExprFn:
+        return self.__expr(expr.expression)
+
+    def visitUnaryExpr(self, expr: UnaryExpr) -> ExprFn:
+        right: ExprFn = self.__expr(expr.right)
+        op: Token = expr.operator
+
+        if op.type == TT.BANG:
+            return lambda ctx: not is_truthy(right(ctx))
+
+        def negate(ctx: Context) -> Any:
+            value: Any = right(ctx)
+            if not isinstance(value, float):
+                raise RuntimeException(op, "operand must be a number.")
+            return -value
+
+        return negate
+
+    def visitLiteralExpr(self, expr: LiteralExpr) -> ExprFn:
+        value: Any = expr.value
+        return lambda ctx: value
+
+    def visitVariableExpr(self, expr: VariableExpr) -> ExprFn:
+        name: Token = expr.name
+        slot: int = expr.slot
+
+        match expr.depth:
+            case -1:
+                globals: Context = self.globals
+                values: dict[str, Any] = globals.values
+                key: str = name.lexeme
+
+                def get_global(ctx: Context) -> Any:
+                    try:
+                        return values[key]
+                    except KeyError:
+                        if not globals.load_native(key):
+                            raise RuntimeException(name, f"Undefined variable '{key}'.")
+                        return values[key]
+
+                return get_global
+            case 0:
+                return lambda ctx: ctx.slots[slot]
+            case 1:
+                return lambda ctx: ctx.parent.slots[slot]  # type: ignore[union-attr]
+            case depth:
+                return lambda ctx: ctx.ancestor(depth).slots[slot]
+
+    # StmtVisitor
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> StmtFn:
+        stmts: list[StmtFn] = self.__block(stmt.statements)
+
+        def block(ctx: Context) -> None:
+            inner: Context = Context(parent=ctx)
+            for s in stmts:
+                s(inner)
+
+        return block
+
+    def visitExpressionStmt(self, stmt: ExpressionStmt) -> StmtFn:
+        return self.__expr(stmt.expression)
+
+    def visitFunctionStmt(self, stmt: FunctionStmt) -> StmtFn:
+        define: Callable[[Context, Any], None] = self.__definer(stmt.name)
+
+        def function(ctx: Context) -> None:
+            define(ctx, LoxFunction(decl=stmt, closure=ctx))
+
+        return function
+
+    def visitReturnStmt(self, stmt: ReturnStmt) -> StmtFn:
+        if stmt.value is None:
+
+            def return_nil(ctx: Context) -> None:
+                raise Return(None)
+
+            return return_nil
+
+        value: ExprFn = self.__expr(stmt.value)
+
+        def return_(ctx: Context) -> None:
+            raise Return(value(ctx))
+
+        return return_
+
+    def visitIfStmt(self, stmt: IfStmt) -> StmtFn:
+        condition: ExprFn = self.__expr(stmt.condition)
+        then_branch: StmtFn = self.compile(stmt.thenBranch)
+
+        if stmt.elseBranch is None:
+
+            def if_(ctx: Context) -> None:
+                if is_truthy(condition(ctx)):
+                    then_branch(ctx)
+
+            return if_
+
+        else_branch: StmtFn = self.compile(stmt.elseBranch)
+
+        def if_else(ctx: Context) -> None:
+            if is_truthy(condition(ctx)):
+                then_branch(ctx)
+            else:
+                else_branch(ctx)
+
+        return if_else
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> StmtFn:
+        expression: ExprFn = self.__expr(stmt.expression)
+
+        def print_(ctx: Context) -> None:
+            print(stringify(expression(ctx)))
+
+        return print_
+
+    def visitVarStmt(self, stmt: VarStmt) -> StmtFn:
+        define: Callable[[Context, Any], None] = self.__definer(stmt.name)
+        if stmt.initializer is None:
+            return lambda ctx: define(ctx, None)
+        initializer: ExprFn = self.__expr(stmt.initializer)
+        return lambda ctx: define(ctx, initializer(ctx))
+
+    def visitWhileStmt(self, stmt: WhileStmt) -> StmtFn:
+        condition: ExprFn = self.__expr(stmt.condition)
+        body: StmtFn = self.compile(stmt.body)
+
+        def while_(ctx: Context) -> None:
+            while is_truthy(condition(ctx)):
+                body(ctx)
+
+        return while_
+
+    def visitImportStmt(self, stmt: ImportStmt) -> StmtFn:
+        keyword: Token = stmt.keyword
+        path: str = stmt.path.literal
+        return lambda ctx: import_module(self, keyword, path)
+
+    # Helpers
+
+    def __block(self, stmts: list[Stmt]) -> list[StmtFn]:
+        self.__scope_depth += 1
+        compiled: list[StmtFn] = [self.compile(s) for s in stmts]
+        self.__scope_depth -= 1
+        return compiled
+
+    def __definer(self, name: Token) -> Callable[[Context, Any], None]:
+        if self.__scope_depth == 0:
+            return lambda ctx, value: ctx.define(name.lexeme, value)
+        return lambda ctx, value: ctx.slots.append(value)
+
+    def __expr(self, expr: Expr) -> ExprFn:
+        return expr.accept(self)
+
+
+NUMERIC_OPS: dict[TT, Callable[[float, float], Any]] = {
+    TT.MINUS: operator.sub,
+    TT.SLASH: operator.truediv,
+    TT.STAR: operator.mul,
+    TT.GT: operator.gt,
+    TT.GTE: operator.ge,
+    TT.LT: operator.lt,
+    TT.LTE: operator.le,
+}
@@ -0,0 +1,36 @@
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from plox.backend.visitors.eval.runtime import LoxCallable
+
+# Every native, by its global name, as "module:factory". Natives are shared
+# by all backends: the module is imported and the factory called, once per
+# program, when the program first uses the name. The factory is passed the
+# options the program was configured with for that native, such as
+# `max_size` for `memo`.
+NATIVES: dict[str, str] = {
+    "clock": "plox.backend.visitors.eval.native_funcs:Clock",
+    "clockNs": "plox.backend.visitors.eval.native_funcs:ClockNs",
+    "sleep": "plox.backend.visitors.eval.native_funcs:Sleep",
+    "memo": "plox.backend.visitors.eval.native_funcs:Memo",
+}
+
+# natives that take a function declared in Lox and need its declaration, so
+# only backends whose functions are `LoxFunction`s (eval and closure) define
+# them; on the others they are undefined like any unknown name
+NEEDS_LOX_FUNCTIONS: frozenset[str] = frozenset({"memo"})
+
+
+def load_native(
+    name: str, options: dict[str, Any], lox_functions: bool
+) -> Optional["LoxCallable"]:
+    """
+    A new instance of the native called `name`, `None` if there is none for
+    a backend with, or without, `LoxFunction`s.
+    """
+    spec: Optional[str] = NATIVES.get(name)
+    if spec is None or (name in NEEDS_LOX_FUNCTIONS and not lox_functions):
+        return None
+    module, _, factory = spec.partition(":")
+    return getattr(import_module(module), factory)(**options)
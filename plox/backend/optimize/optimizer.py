@@ -0,0 +1,212 @@
+from typing import Any, Callable
+import operator
+
+from plox.frontend.tokens import TokenType as TT
+from plox.frontend.ast import (
+    Expr,
+    AssignExpr,
+    GroupingExpr,
+    BinaryExpr,
+    LogicalExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    CallExpr,
+    Stmt,
+    ExpressionStmt,
+    IfStmt,
+    WhileStmt,
+    PrintStmt,
+    VarStmt,
+    FunctionStmt,
+    ReturnStmt,
+    ImportStmt,
+    BlockStmt,
+    ExprVisitor,
+    StmtVisitor,
+)
+from plox.backend.visitors.eval.runtime import is_truthy, is_equal
+
+NUMERIC_OPS: dict[TT, Callable[[float, float], Any]] = {
+    TT.PLUS: operator.add,
+    TT.MINUS: operator.sub,
+    TT.SLASH: operator.truediv,
+    TT.STAR: operator.mul,
+    TT.GT: operator.gt,
+    TT.GTE: operator.ge,
+    TT.LT: operator.lt,
+    TT.LTE: operator.le,
+}
+
+
+# shared by every statement removed from a branch or loop body that still
+# needs one; optimized trees are not cached, so identity holds while it runs
+NOTHING: Stmt = ExpressionStmt(LiteralExpr(None))
+
+
+class Optimizer(ExprVisitor[Expr], StmtVisitor[Stmt]):
+    """
+    Rewrites a resolved program before it is executed: operators over literal
+    operands are folded, branches and loops that can never run are dropped
+    and grouping parentheses are removed. An operation that would fail at
+    runtime (mismatched operand types, division by zero) is left as is so
+    the error is still raised, and reported, when the program runs.
+
+    Only whole statements nested in `if`/`while` or literal expression
+    statements are removed, never declarations, so the slots assigned by the
+    resolver stay valid. Nodes are updated in place; the returned node
+    replaces the visited one.
+    """
+
+    def optimize(self, stmts: list[Stmt]) -> list[Stmt]:
+        return self.__stmts(stmts)
+
+    # ExprVisitor
+
+    def visitAssignExpr(self, expr: AssignExpr) -> Expr:
+        expr.value = self.__expr(expr.value)
+        return expr
+
+    def visitLogicalExpr(self, expr: LogicalExpr) -> Expr:
+        expr.left = self.__expr(expr.left)
+        expr.right = self.__expr(expr.right)
+        if not isinstance(expr.left, LiteralExpr):
+            return expr
+
+        # `or` yields the left operand when it is truthy, `and` when it is not
+        if is_truthy(expr.left.value) == (expr.operator.type == TT.OR):
+            return expr.left
+        return expr.right
+
+    def visitBinaryExpr(self, expr: BinaryExpr) -> Expr:
+        expr.left = self.__expr(expr.left)
+        expr.right = self.__expr(expr.right)
+        if not isinstance(expr.left, LiteralExpr) or not isinstance(
+            expr.right, LiteralExpr
+        ):
+            return expr
+
+        a: Any = expr.left.value
+        b: Any = expr.right.value
+        match expr.operator.type:
+            case TT.EQ_EQ:
+                return LiteralExpr(is_equal(a, b))
+            case TT.BANG_EQ:
+                return LiteralExpr(not is_equal(a, b))
+            case TT.PLUS if type(a) is str and type(b) is str:
+                return LiteralExpr(a + b)
+            case TT.SLASH if b == 0:
+                return expr
+
+        if type(a) is not float or type(b) is not float:
+            return expr
+        return LiteralExpr(NUMERIC_OPS[expr.operator.type](a, b))
+
+    def visitCallExpr(self, expr: CallExpr) -> Expr:
+        expr.callee = self.__expr(expr.callee)
+        expr.arguments = [self.__expr(arg) for arg in expr.arguments]
+        return expr
+
+    def visitGroupingExpr(self, expr: GroupingExpr) -> Expr:
+        return self.__expr(expr.expression)
+
+    def visitUnaryExpr(self, expr: UnaryExpr) -> Expr:
+        expr.right = self.__expr(expr.right)
+        if not isinstance(expr.right, LiteralExpr):
+            return expr
+
+        value: Any = expr.right.value
+        if expr.operator.type == TT.BANG:
+            return LiteralExpr(not is_truthy(value))
+        if type(value) is float:
+            return LiteralExpr(-value)
+        return expr
+
+    def visitLiteralExpr(self, expr: LiteralExpr) -> Expr:
+        return expr
+
+    def visitVariableExpr(self, expr: VariableExpr) -> Expr:
+        return expr
+
+    # StmtVisitor
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> Stmt:
+        stmt.statements = self.__stmts(stmt.statements)
+        return stmt
+
+    def visitExpressionStmt(self, stmt: ExpressionStmt) -> Stmt:
+        stmt.expression = self.__expr(stmt.expression)
+        return stmt
+
+    def visitFunctionStmt(self, stmt: FunctionStmt) -> Stmt:
+        stmt.body = self.__stmt(stmt.body)
+        return stmt
+
+    def visitReturnStmt(self, stmt: ReturnStmt) -> Stmt:
+        if stmt.value is not None:
+            stmt.value = self.__expr(stmt.value)
+        return stmt
+
+    def visitIfStmt(self, stmt: IfStmt) -> Stmt:
+        stmt.condition = self.__expr(stmt.condition)
+        stmt.thenBranch = self.__branch(stmt.thenBranch)
+        if stmt.elseBranch is not None:
+            stmt.elseBranch = self.__branch(stmt.elseBranch)
+            if stmt.elseBranch is NOTHING:
+                stmt.elseBranch = None
+        if not isinstance(stmt.condition, LiteralExpr):
+            return stmt
+
+        if is_truthy(stmt.condition.value):
+            return stmt.thenBranch
+        return NOTHING if stmt.elseBranch is None else stmt.elseBranch
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> Stmt:
+        stmt.expression = self.__expr(stmt.expression)
+        return stmt
+
+    def visitVarStmt(self, stmt: VarStmt) -> Stmt:
+        if stmt.initializer is not None:
+            stmt.initializer = self.__expr(stmt.initializer)
+        return stmt
+
+    def visitWhileStmt(self, stmt: WhileStmt) -> Stmt:
+        stmt.condition = self.__expr(stmt.condition)
+        if isinstance(stmt.condition, LiteralExpr) and not is_truthy(
+            stmt.condition.value
+        ):
+            return NOTHING
+
+        stmt.body = self.__branch(stmt.body)
+        return stmt
+
+    def visitImportStmt(self, stmt: ImportStmt) -> Stmt:
+        return stmt
+
+    # Helpers
+
+    def __branch(self, stmt: Stmt) -> Stmt:
+        stmt = self.__stmt(stmt)
+        if self.__is_noop(stmt):
+            return NOTHING
+        return stmt
+
+    def __stmts(self, stmts: list[Stmt]) -> list[Stmt]:
+        optimized: list[Stmt] = []
+        for stmt in stmts:
+            stmt = self.__stmt(stmt)
+            if not self.__is_noop(stmt):
+                optimized.append(stmt)
+        return optimized
+
+    def __is_noop(self, stmt: Stmt) -> bool:
+        # a literal in statement position has no effect
+        return isinstance(stmt, ExpressionStmt) and isinstance(
+            stmt.expression, LiteralExpr
+        )
+
+    def __stmt(self, stmt: Stmt) -> Stmt:
+        return stmt.accept(self)
+
+    def __expr(self, expr: Expr) -> Expr:
+        return expr.accept(self)
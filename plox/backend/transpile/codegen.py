@@ -0,0 +1,454 @@
+from typing import Any
+import math
+
+from plox.frontend.tokens import Token, TokenType as TT
+from plox.frontend.ast import (
+    Expr,
+    AssignExpr,
+    GroupingExpr,
+    BinaryExpr,
+    LogicalExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    CallExpr,
+    Stmt,
+    ExpressionStmt,
+    IfStmt,
+    WhileStmt,
+    PrintStmt,
+    VarStmt,
+    FunctionStmt,
+    ReturnStmt,
+    ImportStmt,
+    BlockStmt,
+    ExprVisitor,
+    StmtVisitor,
+)
+from plox.backend.visitors.eval.runtime import ROPE_THRESHOLD
+
+ENTRY_POINT = "__lox_main__"
+
+NUMERIC_OPS: dict[TT, str] = {
+    TT.MINUS: "-",
+    TT.SLASH: "/",
+    TT.STAR: "*",
+    TT.GT: ">",
+    TT.GTE: ">=",
+    TT.LT: "<",
+    TT.LTE: "<=",
+}
+
+BOOLEAN_OPS: set[TT] = {TT.GT, TT.GTE, TT.LT, TT.LTE, TT.EQ_EQ, TT.BANG_EQ}
+
+
+class Captures(ExprVisitor[None], StmtVisitor[None]):
+    """
+    Finds locals that are referenced from a nested function. The transpiler
+    keeps those in one-element lists ("boxes") so every execution of their
+    declaration creates a fresh binding, as Lox block scoping requires.
+    Relies on the depth/slot annotations left by the resolver.
+    """
+
+    def __init__(self) -> None:
+        self.captured: set[int] = set()
+        self.__scopes: list[tuple[list[Token], bool]] = []
+
+    def collect(self, stmts: list[Stmt]) -> set[int]:
+        for stmt in stmts:
+            stmt.accept(self)
+        return self.captured
+
+    def visitAssignExpr(self, expr: AssignExpr) -> None:
+        expr.value.accept(self)
+        self.__reference(expr.depth, expr.slot)
+
+    def visitLogicalExpr(self, expr: LogicalExpr) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visitBinaryExpr(self, expr: BinaryExpr) -> None:
+        expr.left.accept(self)
+        expr.right.accept(self)
+
+    def visitCallExpr(self, expr: CallExpr) -> None:
+        expr.callee.accept(self)
+        for arg in expr.arguments:
+            arg.accept(self)
+
+    def visitGroupingExpr(self, expr: GroupingExpr) -> None:
+        expr.expression.accept(self)
+
+    def visitUnaryExpr(self, expr: UnaryExpr) -> None:
+        expr.right.accept(self)
+
+    def visitLiteralExpr(self, expr: LiteralExpr) -> None:
+        return None
+
+    def visitVariableExpr(self, expr: VariableExpr) -> None:
+        self.__reference(expr.depth, expr.slot)
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> None:
+        self.__scopes.append(([], False))
+        self.collect(stmt.statements)
+        self.__scopes.pop()
+
+    def visitExpressionStmt(self, stmt: ExpressionStmt) -> None:
+        stmt.expression.accept(self)
+
+    def visitFunctionStmt(self, stmt: FunctionStmt) -> None:
+        self.__declare(stmt.name)
+        self.__scopes.append((list(stmt.params), True))
+        body = stmt.body.statements if isinstance(stmt.body, BlockStmt) else [stmt.body]
+        self.collect(body)
+        self.__scopes.pop()
+
+    def visitReturnStmt(self, stmt: ReturnStmt) -> None:
+        if stmt.value is not None:
+            stmt.value.accept(self)
+
+    def visitIfStmt(self, stmt: IfStmt) -> None:
+        stmt.condition.accept(self)
+        stmt.thenBranch.accept(self)
+        if stmt.elseBranch is not None:
+            stmt.elseBranch.accept(self)
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> None:
+        stmt.expression.accept(self)
+
+    def visitVarStmt(self, stmt: VarStmt) -> None:
+        if stmt.initializer is not None:
+            stmt.initializer.accept(self)
+        self.__declare(stmt.name)
+
+    def visitWhileStmt(self, stmt: WhileStmt) -> None:
+        stmt.condition.accept(self)
+        stmt.body.accept(self)
+
+    def visitImportStmt(self, stmt: ImportStmt) -> None:
+        return None
+
+    def __declare(self, name: Token) -> None:
+        if len(self.__scopes) != 0:
+            self.__scopes[-1][0].append(name)
+
+    def __reference(self, depth: int, slot: int) -> None:
+        if depth < 0:
+            return
+        target: int = len(self.__scopes) - 1 - depth
+        if any(is_function for _, is_function in self.__scopes[target + 1 :]):
+            self.captured.add(id(self.__scopes[target][0][slot]))
+
+
+class Scope:
+    def __init__(self, is_function: bool) -> None:
+        self.is_function = is_function
+        self.names: list[str] = []
+        self.boxed: list[bool] = []
+        # boxes this function needs from enclosing scopes, in first-use order
+        self.free: dict[str, None] = {}
+
+
+class Line:
+    __slots__ = ("text", "globals")
+
+    def __init__(self, text: str, globals: list[tuple[str, int]]) -> None:
+        self.text = text
+        self.globals = globals
+
+
+class Codegen(ExprVisitor[str], StmtVisitor[None]):
+    """
+    Translates a resolved program into Python source. The program becomes a
+    function `__lox_main__(G)` where `G` is the dict of Lox globals; Lox
+    locals become uniquely named Python locals, `while` becomes a Python
+    loop and `fun` a nested `def`. Helpers (`_call`, `_print`, the error
+    raisers...) are supplied by the namespace the code is executed in.
+
+    Alongside the code the module defines `_T`, the tokens referenced by
+    error helpers, and `_L`, which maps a (python line, global name) pair to
+    the Lox line so a KeyError from `G[...]` can be reported precisely.
+    """
+
+    def __init__(self) -> None:
+        self.__captured: set[int] = set()
+        self.__scopes: list[Scope] = []
+        self.__lines: list[Line] = []
+        self.__pending_globals: list[tuple[str, int]] = []
+        self.__indent = 1
+        self.__tokens: list[tuple[str, str, int]] = []
+        self.__token_index: dict[int, int] = {}
+        self.__uid = 0
+
+    def generate(self, stmts: list[Stmt]) -> str:
+        self.__captured = Captures().collect(stmts)
+        for stmt in stmts:
+            self.__stmt(stmt)
+
+        body: list[Line] = self.__lines
+        lines: list[str] = [f"def {ENTRY_POINT}(G):"]
+        if len(body) == 0:
+            lines.append("    pass")
+
+        global_lines: dict[tuple[int, str], int] = {}
+        for line in body:
+            lines.append(line.text)
+            for name, lox_line in line.globals:
+                global_lines.setdefault((len(lines), name), lox_line)
+
+        lines.append(f"_T = {self.__tokens!r}")
+        lines.append(f"_L = {global_lines!r}")
+        return "\n".join(lines) + "\n"
+
+    # ExprVisitor
+
+    def visitAssignExpr(self, expr: AssignExpr) -> str:
+        value: str = self.__expr(expr.value)
+        if expr.depth < 0:
+            return f"_gset(G, {expr.name.lexeme!r}, {self.__token(expr.name)}, {value})"
+
+        name, boxed = self.__local(expr.depth, expr.slot)
+        if boxed:
+            return f"_bset({name}, {value})"
+        return f"({name} := {value})"
+
+    def visitLogicalExpr(self, expr: LogicalExpr) -> str:
+        left: str = self.__expr(expr.left)
+        right: str = self.__expr(expr.right)
+        t: str = self.__temp()
+        truthy: str = f"(({t} := {left}) is not None and {t} is not False)"
+        if expr.operator.type == TT.OR:
+            return f"({t} if {truthy} else {right})"
+        return f"({right} if {truthy} else {t})"
+
+    def visitBinaryExpr(self, expr: BinaryExpr) -> str:
+        left: str = self.__expr(expr.left)
+        right: str = self.__expr(expr.right)
+        op: Token = expr.operator
+
+        match op.type:
+            case TT.EQ_EQ:
+                return f"({left} == {right})"
+            case TT.BANG_EQ:
+                return f"({left} != {right})"
+            case TT.PLUS:
+                a, b, ta = self.__temp(), self.__temp(), self.__temp()
+                return (
+                    f"({a} + {b} if ({ta} := type({a} := {left})) is type({b} := {right})"
+                    f" and ({ta} is float or {ta} is str and len({a}) < {ROPE_THRESHOLD})"
+                    f" else _add({a}, {b}, {self.__token(op)}))"
+                )
+
+        # number literals need neither a temporary nor a type check
+        operands: list[str] = []
+        checks: list[str] = []
+        for operand, code in ((expr.left, left), (expr.right, right)):
+            if isinstance(operand, LiteralExpr) and type(operand.value) is float:
+                operands.append(code)
+                continue
+            t: str = self.__temp()
+            operands.append(t)
+            checks.append(f"(type({t} := {code}) is float)")
+
+        result: str = f"{operands[0]} {NUMERIC_OPS[op.type]} {operands[1]}"
+        if len(checks) == 0:
+            return f"({result})"
+        return (
+            f"({result} if {' & '.join(checks)} else _number_error({self.__token(op)}))"
+        )
+
+    def visitCallExpr(self, expr: CallExpr) -> str:
+        parts: list[str] = [self.__expr(expr.callee), str(self.__token(expr.paren))]
+        parts.extend(self.__expr(arg) for arg in expr.arguments)
+        return f"_call({', '.join(parts)})"
+
+    def visitGroupingExpr(self, expr: GroupingExpr) -> str:
+        return self.__expr(expr.expression)
+
+    def visitUnaryExpr(self, expr: UnaryExpr) -> str:
+        right: str = self.__expr(expr.right)
+        t: str = self.__temp()
+        if expr.operator.type == TT.BANG:
+            return f"(({t} := {right}) is None or {t} is False)"
+        return (
+            f"(-{t} if type({t} := {right}) is float"
+            f" else _operand_error({self.__token(expr.operator)}))"
+        )
+
+    def visitLiteralExpr(self, expr: LiteralExpr) -> str:
+        value: Any = expr.value
+        if isinstance(value, float) and not math.isfinite(value):
+            return f"float({str(value)!r})"
+        return repr(value)
+
+    def visitVariableExpr(self, expr: VariableExpr) -> str:
+        if expr.depth < 0:
+            self.__pending_globals.append((expr.name.lexeme, expr.name.line))
+            return f"G[{expr.name.lexeme!r}]"
+
+        name, boxed = self.__local(expr.depth, expr.slot)
+        return f"{name}[0]" if boxed else name
+
+    # StmtVisitor
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> None:
+        self.__scopes.append(Scope(is_function=False))
+        for s in stmt.statements:
+            self.__stmt(s)
+        self.__scopes.pop()
+
+    def visitExpressionStmt(self, stmt: ExpressionStmt) -> None:
+        if not isinstance(stmt.expression, AssignExpr):
+            self.__emit(self.__expr(stmt.expression))
+            return
+
+        expr: AssignExpr = stmt.expression
+        value: str = self.__expr(expr.value)
+        if expr.depth < 0:
+            name: str = repr(expr.name.lexeme)
+            self.__emit(
+                f"G[{name} if {name} in G else _undefined({self.__token(expr.name)})]"
+                f" = {value}"
+            )
+            return
+
+        local, boxed = self.__local(expr.depth, expr.slot)
+        self.__emit(f"{local}[0] = {value}" if boxed else f"{local} = {value}")
+
+    def visitFunctionStmt(self, stmt: FunctionStmt) -> None:
+        boxed: bool = id(stmt.name) in self.__captured
+        name: str = self.__declare(stmt.name, boxed)
+        if boxed:
+            # the box exists before the def so the function can capture itself
+            self.__emit(f"{name} = [None]")
+
+        outer_lines: list[Line] = self.__lines
+        self.__lines = []
+        scope = Scope(is_function=True)
+        self.__scopes.append(scope)
+        self.__indent += 1
+
+        params: list[str] = []
+        for param in stmt.params:
+            boxed_param: bool = id(param) in self.__captured
+            params.append(self.__declare(param, boxed_param))
+            if boxed_param:
+                self.__emit(f"{params[-1]} = [{params[-1]}]")
+        body = stmt.body.statements if isinstance(stmt.body, BlockStmt) else [stmt.body]
+        for s in body:
+            self.__stmt(s)
+        if len(self.__lines) == 0:
+            self.__emit("pass")
+        self.__indent -= 1
+        self.__scopes.pop()
+        body_lines: list[Line] = self.__lines
+        self.__lines = outer_lines
+
+        signature: list[str] = list(params)
+        if len(scope.free) != 0:
+            signature.append("*")
+            signature.extend(f"{free}={free}" for free in scope.free)
+        def_name: str = self.__fresh("f") if boxed or len(self.__scopes) == 0 else name
+
+        self.__emit(f"def {def_name}({', '.join(signature)}):")
+        self.__lines.extend(body_lines)
+        self.__emit(f"{def_name}.__qualname__ = {stmt.name.lexeme!r}")
+        if len(self.__scopes) == 0:
+            self.__emit(f"G[{stmt.name.lexeme!r}] = {def_name}")
+        elif boxed:
+            self.__emit(f"{name}[0] = {def_name}")
+
+    def visitReturnStmt(self, stmt: ReturnStmt) -> None:
+        if stmt.value is None:
+            self.__emit("return None")
+        else:
+            self.__emit(f"return {self.__expr(stmt.value)}")
+
+    def visitIfStmt(self, stmt: IfStmt) -> None:
+        self.__emit(f"if {self.__condition(stmt.condition)}:")
+        self.__suite(stmt.thenBranch)
+        if stmt.elseBranch is not None:
+            self.__emit("else:")
+            self.__suite(stmt.elseBranch)
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> None:
+        self.__emit(f"_print({self.__expr(stmt.expression)})")
+
+    def visitVarStmt(self, stmt: VarStmt) -> None:
+        value: str = (
+            "None" if stmt.initializer is None else self.__expr(stmt.initializer)
+        )
+        if len(self.__scopes) == 0:
+            self.__emit(f"G[{stmt.name.lexeme!r}] = {value}")
+            return
+
+        boxed: bool = id(stmt.name) in self.__captured
+        name: str = self.__declare(stmt.name, boxed)
+        self.__emit(f"{name} = [{value}]" if boxed else f"{name} = {value}")
+
+    def visitWhileStmt(self, stmt: WhileStmt) -> None:
+        self.__emit(f"while {self.__condition(stmt.condition)}:")
+        self.__suite(stmt.body)
+
+    def visitImportStmt(self, stmt: ImportStmt) -> None:
+        self.__emit(f"_import({self.__token(stmt.keyword)}, {stmt.path.literal!r})")
+
+    # Helpers
+
+    def __condition(self, expr: Expr) -> str:
+        code: str = self.__expr(expr)
+        if isinstance(expr, BinaryExpr) and expr.operator.type in BOOLEAN_OPS:
+            return code
+        if isinstance(expr, UnaryExpr) and expr.operator.type == TT.BANG:
+            return code
+        t: str = self.__temp()
+        return f"({t} := {code}) is not None and {t} is not False"
+
+    def __suite(self, stmt: Stmt) -> None:
+        start: int = len(self.__lines)
+        self.__indent += 1
+        self.__stmt(stmt)
+        if len(self.__lines) == start:
+            self.__emit("pass")
+        self.__indent -= 1
+
+    def __declare(self, name: Token, boxed: bool) -> str:
+        if len(self.__scopes) == 0:
+            return name.lexeme
+        python_name: str = self.__fresh("v")
+        self.__scopes[-1].names.append(python_name)
+        self.__scopes[-1].boxed.append(boxed)
+        return python_name
+
+    def __local(self, depth: int, slot: int) -> tuple[str, bool]:
+        target: int = len(self.__scopes) - 1 - depth
+        scope: Scope = self.__scopes[target]
+        name, boxed = scope.names[slot], scope.boxed[slot]
+        if boxed:
+            for inner in self.__scopes[target + 1 :]:
+                if inner.is_function:
+                    inner.free[name] = None
+        return name, boxed
+
+    def __token(self, token: Token) -> int:
+        if id(token) not in self.__token_index:
+            self.__token_index[id(token)] = len(self.__tokens)
+            self.__tokens.append((token.type.name, token.lexeme, token.line))
+        return self.__token_index[id(token)]
+
+    def __fresh(self, prefix: str) -> str:
+        self.__uid += 1
+        return f"{prefix}{self.__uid}"
+
+    def __temp(self) -> str:
+        return self.__fresh("_t")
+
+    def __emit(self, text: str) -> None:
+        self.__lines.append(Line("    " * self.__indent + text, self.__pending_globals))
+        self.__pending_globals = []
+
+    def __stmt(self, stmt: Stmt) -> None:
+        stmt.accept(self)
+
+    def __expr(self, expr: Expr) -> str:
+        return expr.accept(self)
@@ -0,0 +1,184 @@
+from types import CodeType, FunctionType, TracebackType
+from typing import Any, Optional
+import builtins
+import marshal
+
+from plox.cache import DiskCache, source_key
+from plox.frontend.tokens import Token, TokenType as TT
+from plox.frontend.ast import Stmt
+from plox.backend.visitors.eval.runtime import (
+    Context,
+    LoxCallable,
+    RuntimeException,
+    NativeError,
+    STRINGS,
+    concat,
+    stringify,
+)
+from plox.backend.transpile.codegen import Codegen, ENTRY_POINT
+from plox.modules import import_module
+
+FILENAME = "<lox>"
+# part of the key of cached code objects; bumped when generated code changes
+# what it expects of the namespace it runs in
+CODE_FORMAT: str = "py2"
+
+
+class PyEval:
+    """
+    Backend that transpiles the program to Python source and runs the code
+    object CPython compiles from it. With a `DiskCache` the code object is
+    stored under the hash of the Lox source, so running an unchanged script
+    again can skip scanning, parsing and code generation entirely.
+    """
+
+    def __init__(
+        self, ctx: Optional[Context] = None, cache: Optional[DiskCache] = None
+    ) -> None:
+        self.globals = ctx if ctx is not None else Context()
+        self.cache = cache
+
+    def run(self, stmts: list[Stmt]) -> None:
+        self.execute(self.compile(stmts))
+
+    def compile(self, stmts: list[Stmt]) -> CodeType:
+        return compile(Codegen().generate(stmts), FILENAME, "exec")
+
+    def load(self, source: str) -> Optional[CodeType]:
+        if self.cache is None:
+            return None
+
+        key: str = source_key(source, CODE_FORMAT)
+        if (data := self.cache.load(key)) is None:
+            return None
+        try:
+            code: Any = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            code = None
+        if not isinstance(code, CodeType):
+            self.cache.discard(key)
+            return None
+        return code
+
+    def store(self, source: str, code: CodeType) -> None:
+        if self.cache is not None:
+            self.cache.store(source_key(source, CODE_FORMAT), marshal.dumps(code))
+
+    def execute(self, code: CodeType) -> None:
+        namespace: dict[str, Any] = self.__namespace()
+        exec(code, namespace)
+        # generated code reads globals with a plain `G[name]` that cannot
+        # load natives, so the natives it reads are loaded up front
+        for _, name in namespace["_L"]:
+            if name not in self.globals.values:
+                self.globals.load_native(name)
+        try:
+            namespace[ENTRY_POINT](self.globals.values)
+        except KeyError as e:
+            # reading an undefined global is a plain `G[name]` lookup
+            token: Optional[Token] = self.__undefined_global(e, namespace)
+            if token is None:
+                raise
+            raise RuntimeException(token, f"Undefined variable '{token.lexeme}'.")
+
+    def __undefined_global(
+        self, e: KeyError, namespace: dict[str, Any]
+    ) -> Optional[Token]:
+        tb: Optional[TracebackType] = e.__traceback__
+        if tb is None or len(e.args) != 1:
+            return None
+        while tb.tb_next is not None:
+            tb = tb.tb_next
+        if tb.tb_frame.f_code.co_filename != FILENAME:
+            return None
+
+        name: Any = e.args[0]
+        line: Optional[int] = namespace["_L"].get((tb.tb_lineno, name))
+        if line is None:
+            return None
+        return Token(type=TT.IDENTIFIER, lexeme=name, literal=None, line=line)
+
+    def __namespace(self) -> dict[str, Any]:
+        """Helpers the generated code calls into, `_T` is defined by the code."""
+        namespace: dict[str, Any] = {"__builtins__": builtins}
+        backend: PyEval = self
+
+        def token(index: int) -> Token:
+            type_name, lexeme, line = namespace["_T"][index]
+            return Token(type=TT[type_name], lexeme=lexeme, literal=None, line=line)
+
+        def call(function: Any, index: int, *args: Any) -> Any:
+            if type(function) is FunctionType:
+                arity: int = function.__code__.co_argcount
+                if arity != len(args):
+                    raise RuntimeException(
+                        token(index), f"Expected {arity} arguments got {len(args)}."
+                    )
+                return function(*args)
+            if not isinstance(function, LoxCallable):
+                raise RuntimeException(
+                    token(index), "Can only call functions and classes."
+                )
+            if function.arity() != len(args):
+                raise RuntimeException(
+                    token(index),
+                    f"Expected {function.arity()} arguments got {len(args)}.",
+                )
+            try:
+                return function.call(backend, list(args))
+            except NativeError as e:
+                raise RuntimeException(token(index), e.message)
+
+        def print_(value: Any) -> None:
+            if type(value) is FunctionType:
+                print(f"<fn {value.__qualname__}>")
+            else:
+                print(stringify(value))
+
+        def set_global(
+            values: dict[str, Any], name: str, index: int, value: Any
+        ) -> Any:
+            if name not in values:
+                undefined(index)
+            values[name] = value
+            return value
+
+        def set_box(box: list[Any], value: Any) -> Any:
+            box[0] = value
+            return value
+
+        def undefined(index: int) -> Any:
+            name: Token = token(index)
+            # assigning a native the program has not read loads it first
+            if backend.globals.load_native(name.lexeme):
+                return name.lexeme
+            raise RuntimeException(name, f"Undefined variable '{name.lexeme}'.")
+
+        def import_(index: int, path: str) -> None:
+            import_module(backend, token(index), path)
+
+        def add(a: Any, b: Any, index: int) -> Any:
+            if isinstance(a, STRINGS) and isinstance(b, STRINGS):
+                return concat(a, b)
+            raise RuntimeException(
+                token(index), "Operands must be two numbers or two strings."
+            )
+
+        def number_error(index: int) -> Any:
+            raise RuntimeException(token(index), "operands must be numbers.")
+
+        def operand_error(index: int) -> Any:
+            raise RuntimeException(token(index), "operand must be a number.")
+
+        namespace.update(
+            _call=call,
+            _print=print_,
+            _gset=set_global,
+            _bset=set_box,
+            _undefined=undefined,
+            _import=import_,
+            _add=add,
+            _number_error=number_error,
+            _operand_error=operand_error,
+        )
+        return namespace
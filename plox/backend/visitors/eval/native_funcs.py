@@ -1,19 +1,35 @@
-from typing import Any, TYPE_CHECKING
-from datetime import datetime
+from collections import OrderedDict
+from typing import Any, Optional, TYPE_CHECKING
 import time
 
-from plox.backend.visitors.eval.runtime import LoxCallable
+from plox.backend.visitors.eval.runtime import LoxCallable, LoxFunction, NativeError
+from plox.backend.visitors.purity import Purity, PurityException
 
 if TYPE_CHECKING:
     from plox.backend.visitors.eval.visitor import Eval
 
+# results `memo` keeps per function unless configured otherwise
+MEMO_SIZE = 1024
+
 
 class Clock(LoxCallable):
+    """Seconds, as a float, from a monotonic clock with an arbitrary origin."""
+
+    def arity(self) -> int:
+        return 0
+
+    def call(self, eval: "Eval", args: list[Any]) -> Any:
+        return time.perf_counter()
+
+
+class ClockNs(LoxCallable):
+    """Nanoseconds of the same clock as `Clock`."""
+
     def arity(self) -> int:
         return 0
 
     def call(self, eval: "Eval", args: list[Any]) -> Any:
-        return datetime.now().second
+        return float(time.perf_counter_ns())
 
 
 class Sleep(LoxCallable):
@@ -22,11 +38,101 @@ class Sleep(LoxCallable):
 
     def call(self, eval: "Eval", args: list[Any]) -> Any:
         if len(args) != 1:
-            raise RuntimeError("'sleep' expected seconds argument. Example: sleep(60).")
+            raise NativeError("'sleep' expected seconds argument. Example: sleep(60).")
         seconds: float = args[0]
         if isinstance(seconds, float):
             time.sleep(seconds)
             return seconds
-        raise RuntimeError(
+        raise NativeError(
             "'sleep' expected argument to be a number. Example: sleep(3.321)."
         )
+
+
+class MemoFunction(LoxCallable):
+    """
+    A `LoxFunction` whose results are cached by argument. The least recently
+    used result is evicted once `max_size` are cached.
+    """
+
+    pure = True
+
+    def __init__(self, function: LoxFunction, max_size: int) -> None:
+        self.function = function
+        self.max_size = max_size
+        self.results: OrderedDict[tuple[Any, ...], Any] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def arity(self) -> int:
+        return self.function.arity()
+
+    def call(self, eval: "Eval", args: list[Any]) -> Any:
+        # the type keeps `true` and `1` apart, they are equal in Python
+        key: tuple[Any, ...] = tuple((type(arg), arg) for arg in args)
+        if key in self.results:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return self.results[key]
+
+        self.misses += 1
+        result: Any = self.function.call(eval, args)
+        self.results[key] = result
+        if len(self.results) > self.max_size:
+            self.results.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def hit_rate(self) -> float:
+        calls: int = self.hits + self.misses
+        return self.hits / calls if calls != 0 else 0.0
+
+    def __str__(self) -> str:
+        return str(self.function)
+
+
+class Memo(LoxCallable):
+    """
+    `memo(fn)` returns `fn` with its results cached, after checking that
+    `fn` is pure. Every function it wrapped is kept for `report`.
+    """
+
+    def __init__(self, max_size: int = MEMO_SIZE) -> None:
+        self.max_size = max_size
+        self.memoized: list[MemoFunction] = []
+
+    def arity(self) -> int:
+        return 1
+
+    def call(self, eval: "Eval", args: list[Any]) -> Any:
+        function: Any = args[0]
+        if isinstance(function, MemoFunction):
+            return function
+        if not isinstance(function, LoxFunction):
+            raise NativeError(
+                "'memo' expected a function declared in Lox. Example: memo(fib)."
+            )
+
+        impurity: Optional[PurityException] = Purity(eval.globals).check(
+            function.declaration
+        )
+        if impurity is not None:
+            raise NativeError(
+                f"'memo' cannot cache {function}: {impurity.message} "
+                f"(line {impurity.token.line})."
+            )
+
+        memoized: MemoFunction = MemoFunction(function, self.max_size)
+        self.memoized.append(memoized)
+        return memoized
+
+    def report(self) -> str:
+        lines: list[str] = [
+            f"{'memo':<24} {'hits':>10} {'misses':>10} {'evicted':>10} {'hit rate':>8}"
+        ]
+        for memoized in self.memoized:
+            lines.append(
+                f"{str(memoized):<24} {memoized.hits:>10} {memoized.misses:>10} "
+                f"{memoized.evictions:>10} {memoized.hit_rate():>8.1%}"
+            )
+        return "\n".join(lines) + "\n"
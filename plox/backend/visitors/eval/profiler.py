@@ -0,0 +1,257 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+import time
+
+from plox.frontend.ast import FunctionStmt, Stmt
+from plox.backend.visitors.eval.quicken import Quickening
+from plox.backend.visitors.eval.runtime import Context, LoxCallable, LoxFunction
+from plox.backend.visitors.eval.visitor import Eval
+
+
+@dataclass
+class NodeStats:
+    count: int = 0
+    # time spent in the node including its children, recursion counted once
+    total: float = 0.0
+    # time spent in the node minus the time of the nodes it visited
+    own: float = 0.0
+    active: int = 0
+
+
+class ProfilingEval(Eval):
+    """
+    `Eval` whose `visitX` methods are wrapped to count visits and time them
+    per AST node class. It is only used when profiling was asked for, so
+    the plain `Eval` carries no instrumentation at all.
+    """
+
+    tail_calls = False
+
+    def __init__(
+        self,
+        ctx: Optional[Context] = None,
+        nodes: Optional[dict[str, NodeStats]] = None,
+        quickening: Optional[Quickening] = None,
+    ) -> None:
+        super().__init__(ctx, quickening)
+        self.nodes: dict[str, NodeStats] = nodes if nodes is not None else {}
+        # time of the children visited so far, one entry per active visit
+        self.children: list[float] = [0.0]
+
+
+def instrument(node: str, visit: Callable[[Eval, Any], Any]) -> Callable[..., Any]:
+    def profiled(self: ProfilingEval, arg: Any) -> Any:
+        stats: Optional[NodeStats] = self.nodes.get(node)
+        if stats is None:
+            stats = self.nodes[node] = NodeStats()
+        stats.count += 1
+        stats.active += 1
+        self.children.append(0.0)
+        start: float = time.perf_counter()
+        try:
+            return visit(self, arg)
+        finally:
+            elapsed: float = time.perf_counter() - start
+            stats.active -= 1
+            stats.own += elapsed - self.children.pop()
+            self.children[-1] += elapsed
+            if stats.active == 0:
+                stats.total += elapsed
+
+    return profiled
+
+
+for name in dir(Eval):
+    if name.startswith("visit"):
+        setattr(ProfilingEval, name, instrument(name[5:], getattr(Eval, name)))
+
+
+def format_profile(phases: dict[str, float], nodes: dict[str, NodeStats]) -> str:
+    lines: list[str] = [f"{'phase':<16} {'ms':>10}"]
+    for phase, seconds in phases.items():
+        lines.append(f"{phase:<16} {seconds * 1e3:>10.2f}")
+    if nodes:
+        lines.append("")
+        lines.append(f"{'node':<16} {'visits':>10} {'total ms':>10} {'self ms':>10}")
+        for node, stats in sorted(nodes.items(), key=lambda item: -item[1].own):
+            lines.append(
+                f"{node:<16} {stats.count:>10} "
+                f"{stats.total * 1e3:>10.2f} {stats.own * 1e3:>10.2f}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def format_call_sites(hits: int, misses: int) -> str:
+    """How often `Eval` call sites found the callee they cached."""
+    calls: int = hits + misses
+    rate: float = hits / calls if calls != 0 else 0.0
+    return (
+        f"{'call sites':<16} {'hits':>10} {'misses':>10} {'hit rate':>8}\n"
+        f"{'CallExpr':<16} {hits:>10} {misses:>10} {rate:>8.1%}\n"
+    )
+
+
+@dataclass
+class CallStats:
+    count: int = 0
+    # time from call to return, recursion counted once
+    total: float = 0.0
+    # time spent in the function itself, without the calls it made
+    own: float = 0.0
+    active: int = 0
+
+
+@dataclass
+class CallNode:
+    """A Lox call stack in the tree of all stacks seen while profiling."""
+
+    own: float = 0.0
+    children: dict[str, "CallNode"] = field(default_factory=dict)
+
+
+# a Lox function is identified by its name and the line it is declared on,
+# natives by their global name and line 0
+FunctionKey = tuple[str, int]
+SCRIPT: FunctionKey = ("<script>", 0)
+
+
+class CallProfiler:
+    """
+    Records every Lox call: counts and times per function and the stack it
+    was called from. Only entry and exit of calls are timed, so the cost
+    grows with the number of calls, not with the number of nodes visited.
+    """
+
+    def __init__(self) -> None:
+        self.functions: dict[FunctionKey, CallStats] = {}
+        self.root: CallNode = CallNode()
+        # active calls: function, stats, stack node, start time and the time
+        # spent in its callees so far
+        self.__stack: list[
+            tuple[FunctionKey, CallStats, CallNode, float, list[float]]
+        ] = []
+
+    def enter(self, key: FunctionKey) -> None:
+        stats: Optional[CallStats] = self.functions.get(key)
+        if stats is None:
+            stats = self.functions[key] = CallStats()
+        stats.count += 1
+        stats.active += 1
+
+        parent: CallNode = self.__stack[-1][2] if self.__stack else self.root
+        label: str = key[0] if key[1] == 0 else f"{key[0]}:{key[1]}"
+        node: Optional[CallNode] = parent.children.get(label)
+        if node is None:
+            node = parent.children[label] = CallNode()
+        self.__stack.append((key, stats, node, time.perf_counter(), [0.0]))
+
+    def exit(self) -> None:
+        _, stats, node, start, callees = self.__stack.pop()
+        elapsed: float = time.perf_counter() - start
+        stats.active -= 1
+        stats.own += elapsed - callees[0]
+        node.own += elapsed - callees[0]
+        if stats.active == 0:
+            stats.total += elapsed
+        if self.__stack:
+            self.__stack[-1][4][0] += elapsed
+
+    def stack(self) -> list[FunctionKey]:
+        """The Lox call stack, innermost call last."""
+        return [frame[0] for frame in self.__stack]
+
+    def collapsed(self) -> str:
+        """
+        Self time per call stack in microseconds, one `a;b;c 123` line per
+        stack, the collapsed format flamegraph tools read.
+        """
+        lines: list[str] = []
+
+        def walk(node: CallNode, path: str) -> None:
+            for label, child in node.children.items():
+                frames: str = f"{path};{label}" if path else label
+                if (micros := round(child.own * 1e6)) > 0:
+                    lines.append(f"{frames} {micros}")
+                walk(child, frames)
+
+        walk(self.root, "")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        lines: list[str] = [
+            f"{'function':<24} {'line':>6} {'calls':>10} {'total ms':>10} "
+            f"{'self ms':>10}"
+        ]
+        functions = sorted(self.functions.items(), key=lambda item: -item[1].own)
+        for (name, line), stats in functions:
+            lines.append(
+                f"{name:<24} {line or '-':>6} {stats.count:>10} "
+                f"{stats.total * 1e3:>10.2f} {stats.own * 1e3:>10.2f}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+class ProfiledFunction(LoxFunction):
+    def __init__(self, decl: FunctionStmt, closure: Context) -> None:
+        super().__init__(decl, closure)
+        self.key: FunctionKey = (decl.name.lexeme, decl.name.line)
+
+    def call(self, eval: Eval, args: list[Any]) -> Any:
+        calls: CallProfiler = eval.calls  # type: ignore[attr-defined]
+        calls.enter(self.key)
+        try:
+            return super().call(eval, args)
+        finally:
+            calls.exit()
+
+
+class ProfiledNative(LoxCallable):
+    def __init__(self, name: str, native: LoxCallable, calls: CallProfiler) -> None:
+        self.key: FunctionKey = (name, 0)
+        self.native = native
+        self.calls = calls
+
+    def arity(self) -> int:
+        return self.native.arity()
+
+    def call(self, eval: Eval, args: list[Any]) -> Any:
+        self.calls.enter(self.key)
+        try:
+            return self.native.call(eval, args)
+        finally:
+            self.calls.exit()
+
+    def __str__(self) -> str:
+        return str(self.native)
+
+
+class CallProfilingEval(Eval):
+    """
+    `Eval` that profiles Lox calls: declarations create `ProfiledFunction`s
+    and natives are wrapped, so every call reports to `calls`.
+    """
+
+    function_type = ProfiledFunction
+
+    def __init__(
+        self,
+        ctx: Optional[Context] = None,
+        calls: Optional[CallProfiler] = None,
+    ) -> None:
+        super().__init__(ctx)
+        self.calls: CallProfiler = calls if calls is not None else CallProfiler()
+        for name, value in list(self.globals.values.items()):
+            if isinstance(value, LoxCallable) and not isinstance(
+                value, (ProfiledFunction, ProfiledNative)
+            ):
+                self.globals.define(name, ProfiledNative(name, value, self.calls))
+        self.globals.wrap_native = lambda name, native: ProfiledNative(
+            name, native, self.calls
+        )
+
+    def run(self, stmts: list[Stmt]) -> None:
+        self.calls.enter(SCRIPT)
+        try:
+            super().run(stmts)
+        finally:
+            self.calls.exit()
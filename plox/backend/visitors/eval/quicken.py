@@ -0,0 +1,137 @@
+from collections import Counter
+from typing import Any, Optional
+
+from plox.frontend.tokens import TokenType as TT
+from plox.frontend.ast import BinaryExpr, ExprVisitor
+from plox.backend.visitors.eval.runtime import Rope
+
+# Specialized binary expressions. `Eval` rewrites a `BinaryExpr` into one of
+# them, in place, by assigning its `__class__` once it has evaluated it: the
+# classes only add an `accept` dispatching to their own `visitX` method of
+# `Eval`, so the slotted layout, and every field, stays the same. Other
+# visitors still see a `BinaryExpr`.
+
+
+class NumAdd(BinaryExpr):
+    __slots__ = ()
+
+    def accept[T](self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visitNumAdd(self)  # type: ignore[attr-defined]
+
+
+class NumSub(BinaryExpr):
+    __slots__ = ()
+
+    def accept[T](self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visitNumSub(self)  # type: ignore[attr-defined]
+
+
+class NumMul(BinaryExpr):
+    __slots__ = ()
+
+    def accept[T](self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visitNumMul(self)  # type: ignore[attr-defined]
+
+
+class NumDiv(BinaryExpr):
+    __slots__ = ()
+
+    def accept[T](self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visitNumDiv(self)  # type: ignore[attr-defined]
+
+
+class NumLt(BinaryExpr):
+    __slots__ = ()
+
+    def accept[T](self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visitNumLt(self)  # type: ignore[attr-defined]
+
+
+class NumLte(BinaryExpr):
+    __slots__ = ()
+
+    def accept[T](self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visitNumLte(self)  # type: ignore[attr-defined]
+
+
+class NumGt(BinaryExpr):
+    __slots__ = ()
+
+    def accept[T](self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visitNumGt(self)  # type: ignore[attr-defined]
+
+
+class NumGte(BinaryExpr):
+    __slots__ = ()
+
+    def accept[T](self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visitNumGte(self)  # type: ignore[attr-defined]
+
+
+class StrConcat(BinaryExpr):
+    __slots__ = ()
+
+    def accept[T](self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visitStrConcat(self)  # type: ignore[attr-defined]
+
+
+class GenericBinaryExpr(BinaryExpr):
+    """
+    A binary expression that is not specialized: its operator has no
+    specialization for the operand types first seen, or a specialization
+    failed its guard. It is never specialized again.
+    """
+
+    __slots__ = ()
+
+    def accept[T](self, visitor: ExprVisitor[T]) -> T:
+        return visitor.visitGenericBinaryExpr(self)  # type: ignore[attr-defined]
+
+
+# by operator and the type of both operands
+SPECIALIZED: dict[tuple[TT, type], type[BinaryExpr]] = {
+    (TT.PLUS, float): NumAdd,
+    (TT.MINUS, float): NumSub,
+    (TT.STAR, float): NumMul,
+    (TT.SLASH, float): NumDiv,
+    (TT.LT, float): NumLt,
+    (TT.LTE, float): NumLte,
+    (TT.GT, float): NumGt,
+    (TT.GTE, float): NumGte,
+    (TT.PLUS, str): StrConcat,
+}
+
+
+class Quickening:
+    """How many binary expressions were specialized and deoptimized, by class."""
+
+    def __init__(self) -> None:
+        self.specialized: Counter[str] = Counter()
+        self.deoptimized: Counter[str] = Counter()
+
+    def quicken(self, expr: BinaryExpr, left: Any, right: Any) -> None:
+        # a recursive call evaluating the same node may have quickened, or
+        # deoptimized, it already
+        if type(expr) is not BinaryExpr:
+            return
+        cls: Optional[type[BinaryExpr]] = None
+        # a rope is a string, `s = s + piece;` concatenates both
+        left_type: type = str if type(left) is Rope else type(left)
+        right_type: type = str if type(right) is Rope else type(right)
+        if left_type is right_type:
+            cls = SPECIALIZED.get((expr.operator.type, left_type))
+        if cls is None:
+            expr.__class__ = GenericBinaryExpr
+            return
+        expr.__class__ = cls
+        self.specialized[cls.__name__] += 1
+
+    def deoptimize(self, expr: BinaryExpr) -> None:
+        self.deoptimized[type(expr).__name__] += 1
+        expr.__class__ = GenericBinaryExpr
+
+    def report(self) -> str:
+        lines: list[str] = [f"{'quickened':<16} {'nodes':>10} {'deopts':>10}"]
+        for name, count in self.specialized.most_common():
+            lines.append(f"{name:<16} {count:>10} {self.deoptimized[name]:>10}")
+        return "\n".join(lines) + "\n"
@@ -1,11 +1,13 @@
-from typing import TYPE_CHECKING, Any, Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional
 from abc import ABC, abstractmethod
 
 from plox.frontend.ast import BlockStmt, FunctionStmt
 from plox.frontend.tokens import Token
+from plox.backend.natives import load_native
 
 if TYPE_CHECKING:
     from plox.backend.visitors.eval.visitor import Eval
+    from plox.modules import ModuleLoader
 
 
 class Return(Exception):
@@ -13,14 +15,69 @@ class Return(Exception):
         self.value = value
 
 
+class Completion:
+    """
+    Result of executing a `return` statement in `Eval`. It is handed back up
+    through the enclosing statements instead of being raised, so returning
+    costs the same however deeply the statement is nested.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+
+class TailCall(Completion):
+    """
+    A `return` of a call to a `LoxFunction`: the call is made by the loop in
+    `LoxFunction.call` of the returning function, not nested inside it.
+    """
+
+    __slots__ = ("function", "args")
+
+    def __init__(self, function: "LoxFunction", args: list[Any]) -> None:
+        self.value = None
+        self.function = function
+        self.args = args
+
+
 class Context:
+    """
+    Globals live in `values` and are looked up by name. Local scopes keep
+    their variables in `slots`, indexed by the slot the resolver assigned;
+    slots are numbered in declaration order, so defining a local appends it.
+
+    Natives are not in `values` until they are used: a backend that misses a
+    global calls `load_native` on the global context before reporting it as
+    undefined.
+    """
+
+    # natives pass through this when they are loaded, profilers wrap them
+    wrap_native: Optional[Callable[[str, "LoxCallable"], Any]] = None
+    # set by backends whose functions are `LoxFunction`s, see `plox.backend.natives`
+    lox_functions: bool = False
+    # keyword arguments of the natives' factories, by native; replaced, never
+    # updated in place, since the default is shared
+    native_options: dict[str, dict[str, Any]] = {}
+    # runs the program's `import` statements, see `plox.modules`
+    modules: Optional["ModuleLoader"] = None
+
     def __init__(
         self,
-        values: dict[str, Any] = {},
+        values: Optional[dict[str, Any]] = None,
         parent: Optional["Context"] = None,
+        slots: Optional[list[Any]] = None,
     ) -> None:
         self.parent = parent
-        self.values = values
+        self.values = values if values is not None else {}
+        self.slots = slots if slots is not None else []
+
+    def ancestor(self, depth: int) -> "Context":
+        ctx: Context = self
+        for _ in range(depth):
+            ctx = ctx.parent  # type: ignore[assignment]
+        return ctx
 
     def get(self, name: Token) -> Any:
         if name.lexeme in self.values:
@@ -28,6 +85,8 @@ class Context:
 
         if self.parent is not None:
             return self.parent.get(name)
+        if self.load_native(name.lexeme):
+            return self.values[name.lexeme]
         raise RuntimeException(name, f"Undefined variable '{name.lexeme}'.")
 
     def assign(self, name: Token, value: Any) -> None:
@@ -38,14 +97,33 @@ class Context:
         if self.parent is not None:
             self.parent.assign(name, value)
             return
+        if self.load_native(name.lexeme):
+            self.values[name.lexeme] = value
+            return
 
         raise RuntimeException(name, f"Undefined variable '{name.lexeme}'.")
 
     def define(self, name: str, value: Any) -> None:
         self.values[name] = value
 
+    def load_native(self, name: str) -> bool:
+        """Defines the native registered as `name`, if there is one."""
+        native: Optional[LoxCallable] = load_native(
+            name, self.native_options.get(name, {}), self.lox_functions
+        )
+        if native is None:
+            return False
+        if self.wrap_native is not None:
+            native = self.wrap_native(name, native)
+        self.values[name] = native
+        return True
+
 
 class LoxCallable(ABC):
+    # natives whose result depends only on their arguments, and that have no
+    # other effect, set this so `memo` accepts functions calling them
+    pure: bool = False
+
     @abstractmethod
     def call(self, eval: "Eval", args: list[Any]) -> Any:
         pass
@@ -54,37 +132,161 @@ class LoxCallable(ABC):
     def arity(self) -> int:
         pass
 
+    def __str__(self) -> str:
+        return "<native fn>"
+
 
 class LoxFunction(LoxCallable):
-    def __init__(self, decl: FunctionStmt) -> None:
+    def __init__(self, decl: FunctionStmt, closure: Context) -> None:
         if not isinstance(decl.body, BlockStmt):
             raise RuntimeException(
                 decl.name, "function definition's body must be block statement."
             )
         self.__decl = decl
+        self.__closure = closure
 
     def call(self, eval: "Eval", args: list[Any]) -> Any:
-        values: dict[str, Any] = {}
-        for i, param in enumerate(self.__decl.params):
-            values[param.lexeme] = args[i]
-
         if not isinstance(self.__decl.body, BlockStmt):
             raise RuntimeException(
                 self.__decl.name, "function definition's body must be block statement."
             )
 
-        try:
-            eval.exec_block(self.__decl.body.statements, values)
-        except Return as ret:
-            return ret.value
+        function: LoxFunction = self
+        while True:
+            try:
+                completion: Optional[Completion] = eval.exec_block(
+                    function.__decl.body.statements,  # type: ignore[union-attr]
+                    Context(parent=function.__closure, slots=list(args)),
+                )
+            except Return as ret:
+                # backends other than `Eval` unwind a return with an exception
+                return ret.value
 
-        return None
+            if type(completion) is TailCall:
+                function, args = completion.function, completion.args
+                continue
+            if completion is not None:
+                return completion.value
+            return None
 
     def arity(self) -> int:
         return len(self.__decl.params)
 
+    @property
+    def declaration(self) -> FunctionStmt:
+        return self.__decl
+
+    def __str__(self) -> str:
+        return f"<fn {self.__decl.name.lexeme}>"
+
 
 class RuntimeException(Exception):
     def __init__(self, token: Token, message: str) -> None:
         self.token = token
         self.message = message
+
+
+class NativeError(Exception):
+    """
+    Raised by a native, which does not know where it was called from. The
+    backend calling it raises a `RuntimeException` at the call instead.
+    """
+
+    def __init__(self, message: str) -> None:
+        self.message = message
+
+
+# results shorter than this are concatenated right away, a rope costs more
+ROPE_THRESHOLD: int = 256
+
+
+class Rope:
+    """
+    A Lox string made by concatenation whose text is only joined when it is
+    needed: when it is printed, compared or hashed. Appending to the rope a
+    variable holds (`s = s + piece;`) adds the piece to a list the ropes
+    share, so building a long string takes linear time, not quadratic. A
+    rope owns the first `count` parts; when another rope has already been
+    made by appending to it, the parts are copied first.
+    """
+
+    __slots__ = ("parts", "count", "length", "text")
+
+    def __init__(self, parts: list[str], length: int) -> None:
+        self.parts = parts
+        self.count = len(parts)
+        self.length = length
+        self.text: Optional[str] = None
+
+    def append(self, piece: str) -> "Rope":
+        parts: list[str] = self.parts
+        if len(parts) != self.count:
+            parts = parts[: self.count]
+        parts.append(piece)
+        return Rope(parts, self.length + len(piece))
+
+    def __str__(self) -> str:
+        if self.text is None:
+            self.text = "".join(self.parts[: self.count])
+            # appending to this rope again starts from the joined text
+            self.parts = [self.text]
+            self.count = 1
+        return self.text
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is str or type(other) is Rope:
+            # strings of another length differ, whatever their text
+            return len(self) == len(other) and str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+
+# the types of Lox strings
+STRINGS: tuple[type, ...] = (str, Rope)
+
+
+def concat(a: str | Rope, b: str | Rope) -> str | Rope:
+    """`a + b` for two Lox strings, deferred once the result is long."""
+    piece: str = b if type(b) is str else str(b)
+    if type(a) is Rope:
+        return a.append(piece)
+    if len(a) + len(piece) < ROPE_THRESHOLD:
+        return a + piece
+    return Rope([a, piece], len(a) + len(piece))
+
+
+def is_truthy(value: Any) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        return bool(value)
+
+    return True
+
+
+def is_equal(a: Any, b: Any) -> bool:
+    if a is None and b is None:
+        return True
+
+    if a is None:
+        return False
+
+    return a == b
+
+
+def stringify(obj: Any) -> str:
+    if obj is None:
+        return "nil"
+
+    if isinstance(obj, float):
+        text: str = str(obj)
+        if text.endswith(".0"):
+            text = text[:-2]
+        return text
+
+    return str(obj)
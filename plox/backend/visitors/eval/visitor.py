@@ -1,5 +1,4 @@
-from typing import Any
-import copy
+from typing import Any, Optional
 
 from plox.frontend.tokens import TokenType as TT, Token
 from plox.frontend.ast import (
@@ -20,34 +19,72 @@ from plox.frontend.ast import (
     VarStmt,
     FunctionStmt,
     ReturnStmt,
+    ImportStmt,
     BlockStmt,
     ExprVisitor,
     StmtVisitor,
 )
+from plox.modules import import_module
+from plox.backend.visitors.eval.quicken import (
+    GenericBinaryExpr,
+    NumAdd,
+    NumDiv,
+    NumGt,
+    NumGte,
+    NumLt,
+    NumLte,
+    NumMul,
+    NumSub,
+    Quickening,
+    StrConcat,
+)
 from plox.backend.visitors.eval.runtime import (
     Context,
     LoxCallable,
     LoxFunction,
     RuntimeException,
-    Return,
+    NativeError,
+    Completion,
+    TailCall,
+    is_truthy,
+    is_equal,
+    stringify,
+    STRINGS,
+    concat,
 )
-from plox.backend.visitors.eval.native_funcs import Clock, Sleep
 
 
-class Eval(ExprVisitor[Any], StmtVisitor[None]):
-    def __init__(self, ctx: Context = Context()) -> None:
-        self.ctx = ctx
-        self.ctx.define(
-            "clock",
-            Clock(),
-        )
-        self.ctx.define(
-            "sleep",
-            Sleep(),
+class Eval(ExprVisitor[Any], StmtVisitor[Optional[Completion]]):
+    """
+    Tree-walking evaluator. Statements yield a `Completion` once a `return`
+    ran, or a `TailCall` for a returned call. Call sites cache the callee
+    they last checked, and binary expressions are quickened, see `quicken`.
+    """
+
+    # profilers turn this off to see every call
+    tail_calls: bool = True
+
+    # class of the functions a declaration creates, profilers substitute theirs
+    function_type: type[LoxFunction] = LoxFunction
+
+    def __init__(
+        self, ctx: Optional[Context] = None, quickening: Optional[Quickening] = None
+    ) -> None:
+        self.globals = ctx if ctx is not None else Context()
+        self.globals.lox_functions = True
+        self.ctx = self.globals
+        self.call_hits: int = 0
+        self.call_misses: int = 0
+        self.quickening: Quickening = (
+            quickening if quickening is not None else Quickening()
         )
 
-    def execute(self, stmt: Stmt) -> None:
-        stmt.accept(self)
+    def run(self, stmts: list[Stmt]) -> None:
+        for stmt in stmts:
+            self.execute(stmt)
+
+    def execute(self, stmt: Stmt) -> Optional[Completion]:
+        return stmt.accept(self)
 
     def eval(self, expr: Expr) -> Any:
         return expr.accept(visitor=self)
@@ -56,7 +93,10 @@ class Eval(ExprVisitor[Any], StmtVisitor[None]):
 
     def visitAssignExpr(self, expr: AssignExpr) -> Any:
         value: Any = self.eval(expr.value)
-        self.ctx.assign(expr.name, value)
+        if expr.depth < 0:
+            self.globals.assign(expr.name, value)
+        else:
+            self.ctx.ancestor(expr.depth).slots[expr.slot] = value
         return value
 
     def visitLiteralExpr(self, expr: LiteralExpr) -> Any:
@@ -73,7 +113,7 @@ class Eval(ExprVisitor[Any], StmtVisitor[None]):
                 self.__check_num_un_operand(op=expr.operator, right=right)
                 return -float(right)
             case TT.BANG:
-                return not self.__bool_from_any(right)
+                return not is_truthy(right)
 
         return None
 
@@ -81,10 +121,10 @@ class Eval(ExprVisitor[Any], StmtVisitor[None]):
         left: Any = self.eval(expr=expr.left)
 
         if expr.operator.type == TT.OR:
-            if self.__bool_from_any(left):
+            if is_truthy(left):
                 return left
         elif expr.operator.type == TT.AND:
-            if not self.__bool_from_any(left):
+            if not is_truthy(left):
                 return left
 
         return self.eval(expr=expr.right)
@@ -92,7 +132,83 @@ class Eval(ExprVisitor[Any], StmtVisitor[None]):
     def visitBinaryExpr(self, expr: BinaryExpr) -> Any:
         left: Any = self.eval(expr.left)
         right: Any = self.eval(expr.right)
+        value: Any = self.__binary(expr, left, right)
+        # only once the operation succeeded, an error is raised generically
+        self.quickening.quicken(expr, left, right)
+        return value
+
+    def visitGenericBinaryExpr(self, expr: GenericBinaryExpr) -> Any:
+        return self.__binary(expr, self.eval(expr.left), self.eval(expr.right))
+
+    def visitNumAdd(self, expr: NumAdd) -> Any:
+        left: Any = self.eval(expr.left)
+        right: Any = self.eval(expr.right)
+        if type(left) is float and type(right) is float:
+            return left + right
+        return self.__deoptimize(expr, left, right)
+
+    def visitNumSub(self, expr: NumSub) -> Any:
+        left: Any = self.eval(expr.left)
+        right: Any = self.eval(expr.right)
+        if type(left) is float and type(right) is float:
+            return left - right
+        return self.__deoptimize(expr, left, right)
 
+    def visitNumMul(self, expr: NumMul) -> Any:
+        left: Any = self.eval(expr.left)
+        right: Any = self.eval(expr.right)
+        if type(left) is float and type(right) is float:
+            return left * right
+        return self.__deoptimize(expr, left, right)
+
+    def visitNumDiv(self, expr: NumDiv) -> Any:
+        left: Any = self.eval(expr.left)
+        right: Any = self.eval(expr.right)
+        if type(left) is float and type(right) is float:
+            return left / right
+        return self.__deoptimize(expr, left, right)
+
+    def visitNumLt(self, expr: NumLt) -> Any:
+        left: Any = self.eval(expr.left)
+        right: Any = self.eval(expr.right)
+        if type(left) is float and type(right) is float:
+            return left < right
+        return self.__deoptimize(expr, left, right)
+
+    def visitNumLte(self, expr: NumLte) -> Any:
+        left: Any = self.eval(expr.left)
+        right: Any = self.eval(expr.right)
+        if type(left) is float and type(right) is float:
+            return left <= right
+        return self.__deoptimize(expr, left, right)
+
+    def visitNumGt(self, expr: NumGt) -> Any:
+        left: Any = self.eval(expr.left)
+        right: Any = self.eval(expr.right)
+        if type(left) is float and type(right) is float:
+            return left > right
+        return self.__deoptimize(expr, left, right)
+
+    def visitNumGte(self, expr: NumGte) -> Any:
+        left: Any = self.eval(expr.left)
+        right: Any = self.eval(expr.right)
+        if type(left) is float and type(right) is float:
+            return left >= right
+        return self.__deoptimize(expr, left, right)
+
+    def visitStrConcat(self, expr: StrConcat) -> Any:
+        left: Any = self.eval(expr.left)
+        right: Any = self.eval(expr.right)
+        if type(left) in STRINGS and type(right) in STRINGS:
+            return concat(left, right)
+        return self.__deoptimize(expr, left, right)
+
+    def __deoptimize(self, expr: BinaryExpr, left: Any, right: Any) -> Any:
+        # the operands were evaluated already, only the operation is redone
+        self.quickening.deoptimize(expr)
+        return self.__binary(expr, left, right)
+
+    def __binary(self, expr: BinaryExpr, left: Any, right: Any) -> Any:
         match expr.operator.type:
             case TT.MINUS:
                 self.__check_num_bin_operand(op=expr.operator, left=left, right=right)
@@ -107,8 +223,8 @@ class Eval(ExprVisitor[Any], StmtVisitor[None]):
                 if isinstance(left, float) and isinstance(right, float):
                     return float(left) + float(right)
 
-                if isinstance(left, str) and isinstance(right, str):
-                    return str(left) + str(right)
+                if isinstance(left, STRINGS) and isinstance(right, STRINGS):
+                    return concat(left, right)
 
                 raise RuntimeException(
                     expr.operator,
@@ -127,118 +243,133 @@ class Eval(ExprVisitor[Any], StmtVisitor[None]):
                 self.__check_num_bin_operand(op=expr.operator, left=left, right=right)
                 return float(left) <= float(right)
             case TT.EQ_EQ:
-                return self.__is_eq(left, right)
+                return is_equal(left, right)
             case TT.BANG_EQ:
-                return not self.__is_eq(left, right)
+                return not is_equal(left, right)
 
         return None
 
     def visitVariableExpr(self, expr: VariableExpr) -> Any:
-        return self.ctx.get(expr.name)
+        if expr.depth < 0:
+            return self.globals.get(expr.name)
+        return self.ctx.ancestor(expr.depth).slots[expr.slot]
 
     # StmtVisitor
 
-    def visitExpressionStmt(self, stmt: ExpressionStmt) -> None:
+    def visitExpressionStmt(self, stmt: ExpressionStmt) -> Optional[Completion]:
         self.eval(stmt.expression)
         return None
 
-    def visitIfStmt(self, stmt: IfStmt) -> None:
-        if self.__bool_from_any(self.eval(stmt.condition)):
+    def visitIfStmt(self, stmt: IfStmt) -> Optional[Completion]:
+        if is_truthy(self.eval(stmt.condition)):
             return self.execute(stmt.thenBranch)
-        elif stmt.elseBranch != ExpressionStmt(LiteralExpr(None)):
+        elif stmt.elseBranch is not None:
             return self.execute(stmt.elseBranch)
+        return None
 
-    def visitWhileStmt(self, stmt: WhileStmt) -> None:
-        while self.__bool_from_any(self.eval(stmt.condition)):
-            self.execute(stmt.body)
+    def visitWhileStmt(self, stmt: WhileStmt) -> Optional[Completion]:
+        while is_truthy(self.eval(stmt.condition)):
+            if (completion := self.execute(stmt.body)) is not None:
+                return completion
         return None
 
-    def visitPrintStmt(self, stmt: PrintStmt) -> None:
+    def visitImportStmt(self, stmt: ImportStmt) -> Optional[Completion]:
+        import_module(self, stmt.keyword, stmt.path.literal)
+        return None
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> Optional[Completion]:
         value: Any = self.eval(stmt.expression)
         print(self.stringify(value))
         return None
 
-    def visitVarStmt(self, stmt: VarStmt) -> None:
+    def visitVarStmt(self, stmt: VarStmt) -> Optional[Completion]:
         value: Any = None
         if stmt.initializer is not None:
             value = self.eval(stmt.initializer)
 
-        self.ctx.define(stmt.name.lexeme, value)
+        self.__define(stmt.name, value)
         return None
 
-    def visitFunctionStmt(self, stmt: FunctionStmt) -> None:
-        func = LoxFunction(decl=stmt)
-        self.ctx.define(stmt.name.lexeme, func)
+    def visitFunctionStmt(self, stmt: FunctionStmt) -> Optional[Completion]:
+        func = self.function_type(decl=stmt, closure=self.ctx)
+        self.__define(stmt.name, func)
         return None
 
-    def visitReturnStmt(self, stmt: ReturnStmt) -> None:
+    def visitReturnStmt(self, stmt: ReturnStmt) -> Optional[Completion]:
+        if self.tail_calls and isinstance(stmt.value, CallExpr):
+            call: CallExpr = stmt.value
+            callee: Any = self.eval(call.callee)
+            args: list[Any] = [self.eval(arg) for arg in call.arguments]
+            if callee is call.cached and callee is not None:
+                self.call_hits += 1
+            else:
+                self.__bind(call, callee, args)
+            if type(callee) is LoxFunction:
+                return TailCall(callee, args)
+            try:
+                return Completion(callee.call(self, args))
+            except NativeError as e:
+                raise RuntimeException(call.paren, e.message)
+
         value: Any = None
-        if stmt.value != LiteralExpr(None):
+        if stmt.value is not None:
             value = self.eval(stmt.value)
 
-        raise Return(value)
+        return Completion(value)
 
-    def visitBlockStmt(self, stmt: BlockStmt) -> None:
-        self.__exec_block(stmt.statements, values={})
-        return None
+    def visitBlockStmt(self, stmt: BlockStmt) -> Optional[Completion]:
+        return self.__exec_block(stmt.statements, Context(parent=self.ctx))
 
-    def visitCallExpr(self, expr: CallExpr) -> None:
+    def visitCallExpr(self, expr: CallExpr) -> Any:
         callee: Any = self.eval(expr.callee)
 
         args: list[Any] = []
         for arg in expr.arguments:
             args.append(self.eval(arg))
+        if callee is expr.cached and callee is not None:
+            self.call_hits += 1
+        else:
+            self.__bind(expr, callee, args)
+        try:
+            return callee.call(self, args)
+        except NativeError as e:
+            raise RuntimeException(expr.paren, e.message)
+
+    def __bind(self, expr: CallExpr, callee: Any, args: list[Any]) -> None:
+        """Checks a callee the call site has not seen last and caches it."""
+        self.call_misses += 1
         if not isinstance(callee, LoxCallable):
-            raise RuntimeError(expr.paren, "Can only call functions and classes")
+            raise RuntimeException(expr.paren, "Can only call functions and classes.")
 
         function: LoxCallable = callee
         if function.arity() != len(args):
-            raise RuntimeError(
+            raise RuntimeException(
                 expr.paren, f"Expected {function.arity()} arguments got {len(args)}."
             )
-        return function.call(self, args)
-
-    def exec_block(self, stmts: list[Stmt], values: dict[str, Any]) -> None:
-        return self.__exec_block(stmts, values)
-
-    def __exec_block(self, stmts: list[Stmt], values: dict[str, Any]) -> None:
-        self.ctx.parent = copy.deepcopy(self.ctx)
-        self.ctx.values = values
-
-        for stmt in stmts:
-            self.execute(stmt)
-
-        self.ctx.values = self.ctx.parent.values
-        self.ctx = self.ctx.parent
+        expr.cached = callee
 
-    def __bool_from_any(self, value: Any) -> bool:
-        if value is None:
-            return False
-        if isinstance(value, bool):
-            return bool(value)
+    def exec_block(self, stmts: list[Stmt], ctx: Context) -> Optional[Completion]:
+        return self.__exec_block(stmts, ctx)
 
-        return True
-
-    def __is_eq(self, a: Any, b: Any) -> bool:
-        if a is None and b is None:
-            return True
-
-        if a is None:
-            return False
-
-        return a == b
+    def __exec_block(self, stmts: list[Stmt], ctx: Context) -> Optional[Completion]:
+        previous: Context = self.ctx
+        self.ctx = ctx
+        try:
+            for stmt in stmts:
+                if (completion := stmt.accept(self)) is not None:
+                    return completion
+            return None
+        finally:
+            self.ctx = previous
+
+    def __define(self, name: Token, value: Any) -> None:
+        if self.ctx is self.globals:
+            self.globals.define(name.lexeme, value)
+        else:
+            self.ctx.slots.append(value)
 
     def stringify(self, obj: Any) -> str:
-        if obj is None:
-            return "nil"
-
-        if isinstance(obj, float):
-            text: str = str(obj)
-            if text.endswith(".0"):
-                text = text[:-2]
-            return text
-
-        return str(obj)
+        return stringify(obj)
 
     # Runtime errors
 
@@ -0,0 +1,182 @@
+from typing import Any, Optional
+
+from plox.frontend.tokens import Token
+from plox.frontend.ast import (
+    Expr,
+    AssignExpr,
+    GroupingExpr,
+    BinaryExpr,
+    LogicalExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    CallExpr,
+    Stmt,
+    ExpressionStmt,
+    IfStmt,
+    WhileStmt,
+    PrintStmt,
+    VarStmt,
+    FunctionStmt,
+    ReturnStmt,
+    ImportStmt,
+    BlockStmt,
+    ExprVisitor,
+    StmtVisitor,
+)
+from plox.backend.visitors.eval.runtime import Context, LoxCallable, LoxFunction
+
+
+class PurityException(Exception):
+    def __init__(self, token: Token, message: str) -> None:
+        self.token: Token = token
+        self.message: str = message
+        super().__init__(str(self))
+
+    def __str__(self) -> str:
+        return f"{self.token}: purity error - {self.message}"
+
+
+class Purity(ExprVisitor[None], StmtVisitor[None]):
+    """
+    Static check, run on a resolved function declaration, that calling the
+    function has no effect besides its result: its body must not print,
+    assign variables declared outside the function or call a native that is
+    not marked `pure`. Lox functions it calls through globals are checked
+    the same way; functions reached through locals or parameters are not.
+    """
+
+    def __init__(self, globals: Context) -> None:
+        self.__globals = globals
+        self.__checked: set[int] = set()
+        # scopes entered since the body of the function being checked
+        self.__depth: int = 0
+        self.__function: Optional[FunctionStmt] = None
+
+    def check(self, decl: FunctionStmt) -> Optional[PurityException]:
+        try:
+            self.__check_function(decl)
+        except PurityException as e:
+            return e
+        return None
+
+    # ExprVisitor
+
+    def visitAssignExpr(self, expr: AssignExpr) -> None:
+        if expr.depth < 0 or expr.depth > self.__depth:
+            raise PurityException(
+                expr.name, f"it assigns non-local variable '{expr.name.lexeme}'"
+            )
+        self.__expr(expr.value)
+
+    def visitLogicalExpr(self, expr: LogicalExpr) -> None:
+        self.__expr(expr.left)
+        self.__expr(expr.right)
+
+    def visitBinaryExpr(self, expr: BinaryExpr) -> None:
+        self.__expr(expr.left)
+        self.__expr(expr.right)
+
+    def visitCallExpr(self, expr: CallExpr) -> None:
+        self.__expr(expr.callee)
+        for arg in expr.arguments:
+            self.__expr(arg)
+        if not isinstance(expr.callee, VariableExpr) or expr.callee.depth >= 0:
+            return
+
+        name: Token = expr.callee.name
+        callee: Any = self.__globals.values.get(name.lexeme)
+        if callee is None and self.__globals.load_native(name.lexeme):
+            callee = self.__globals.values[name.lexeme]
+        if isinstance(callee, LoxFunction):
+            self.__check_function(callee.declaration)
+        elif isinstance(callee, LoxCallable) and not callee.pure:
+            raise PurityException(name, f"it calls impure native '{name.lexeme}'")
+
+    def visitGroupingExpr(self, expr: GroupingExpr) -> None:
+        self.__expr(expr.expression)
+
+    def visitUnaryExpr(self, expr: UnaryExpr) -> None:
+        self.__expr(expr.right)
+
+    def visitLiteralExpr(self, expr: LiteralExpr) -> None:
+        return None
+
+    def visitVariableExpr(self, expr: VariableExpr) -> None:
+        return None
+
+    # StmtVisitor
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> None:
+        self.__depth += 1
+        self.__stmts(stmt.statements)
+        self.__depth -= 1
+
+    def visitExpressionStmt(self, stmt: ExpressionStmt) -> None:
+        self.__expr(stmt.expression)
+
+    def visitFunctionStmt(self, stmt: FunctionStmt) -> None:
+        # a nested function's own frame is still local to the checked call
+        self.__depth += 1
+        self.__body(stmt)
+        self.__depth -= 1
+
+    def visitReturnStmt(self, stmt: ReturnStmt) -> None:
+        if stmt.value is not None:
+            self.__expr(stmt.value)
+
+    def visitIfStmt(self, stmt: IfStmt) -> None:
+        self.__expr(stmt.condition)
+        self.__stmt(stmt.thenBranch)
+        if stmt.elseBranch is not None:
+            self.__stmt(stmt.elseBranch)
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> None:
+        assert self.__function is not None
+        raise PurityException(self.__function.name, "it prints")
+
+    def visitVarStmt(self, stmt: VarStmt) -> None:
+        if stmt.initializer is not None:
+            self.__expr(stmt.initializer)
+
+    def visitWhileStmt(self, stmt: WhileStmt) -> None:
+        self.__expr(stmt.condition)
+        self.__stmt(stmt.body)
+
+    def visitImportStmt(self, stmt: ImportStmt) -> None:
+        raise PurityException(stmt.keyword, "it imports a module")
+
+    # Helpers
+
+    def __check_function(self, decl: FunctionStmt) -> None:
+        # recursion, direct or mutual, is checked once
+        if id(decl) in self.__checked:
+            return
+        self.__checked.add(id(decl))
+
+        depth, function = self.__depth, self.__function
+        self.__depth, self.__function = 0, decl
+        try:
+            self.__body(decl)
+        finally:
+            self.__depth, self.__function = depth, function
+
+    def __body(self, decl: FunctionStmt) -> None:
+        # parameters and the body's declarations share one frame
+        if isinstance(decl.body, BlockStmt):
+            self.__stmts(decl.body.statements)
+        else:
+            self.__stmt(decl.body)
+
+    def __stmts(self, stmts: list[Stmt]) -> None:
+        for stmt in stmts:
+            self.__stmt(stmt)
+
+    def __stmt(self, stmt: Stmt) -> None:
+        stmt.accept(self)
+
+    def __expr(self, expr: Expr) -> None:
+        # the eval backend may have quickened it into a subclass of its own
+        if isinstance(expr, BinaryExpr):
+            return self.visitBinaryExpr(expr)
+        expr.accept(self)
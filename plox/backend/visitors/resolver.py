@@ -0,0 +1,190 @@
+from plox.frontend.tokens import Token
+from plox.frontend.ast import (
+    Expr,
+    AssignExpr,
+    GroupingExpr,
+    BinaryExpr,
+    LogicalExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    CallExpr,
+    Stmt,
+    ExpressionStmt,
+    IfStmt,
+    WhileStmt,
+    PrintStmt,
+    VarStmt,
+    FunctionStmt,
+    ReturnStmt,
+    ImportStmt,
+    BlockStmt,
+    ExprVisitor,
+    StmtVisitor,
+)
+
+
+class ResolveException(Exception):
+    def __init__(self, token: Token, message: str) -> None:
+        self.token: Token = token
+        self.message: str = message
+        super().__init__(str(self))
+
+    def __str__(self) -> str:
+        return f"{self.token}: resolve error - {self.message}"
+
+
+class Scope:
+    def __init__(self) -> None:
+        self.slots: dict[str, int] = {}
+        self.defined: set[str] = set()
+
+    def declare(self, name: str) -> int:
+        slot: int = len(self.slots)
+        self.slots[name] = slot
+        return slot
+
+
+class Resolver(ExprVisitor[None], StmtVisitor[None]):
+    """
+    Static pass run between parsing and evaluation. Every local variable
+    reference gets the number of scopes to walk up (`depth`) and its index in
+    that scope's frame (`slot`). References that are not found in any
+    enclosing local scope are globals and keep `depth == -1`.
+    """
+
+    def __init__(self) -> None:
+        self.errors: list[ResolveException] = []
+        self.__scopes: list[Scope] = []
+        self.__in_function: int = 0
+
+    def resolve(self, stmts: list[Stmt]) -> None:
+        for stmt in stmts:
+            self.__resolve_stmt(stmt)
+
+    # ExprVisitor
+
+    def visitAssignExpr(self, expr: AssignExpr) -> None:
+        self.__resolve_expr(expr.value)
+        expr.depth, expr.slot = self.__resolve_local(expr.name)
+
+    def visitLogicalExpr(self, expr: LogicalExpr) -> None:
+        self.__resolve_expr(expr.left)
+        self.__resolve_expr(expr.right)
+
+    def visitBinaryExpr(self, expr: BinaryExpr) -> None:
+        self.__resolve_expr(expr.left)
+        self.__resolve_expr(expr.right)
+
+    def visitCallExpr(self, expr: CallExpr) -> None:
+        self.__resolve_expr(expr.callee)
+        for arg in expr.arguments:
+            self.__resolve_expr(arg)
+
+    def visitGroupingExpr(self, expr: GroupingExpr) -> None:
+        self.__resolve_expr(expr.expression)
+
+    def visitUnaryExpr(self, expr: UnaryExpr) -> None:
+        self.__resolve_expr(expr.right)
+
+    def visitLiteralExpr(self, expr: LiteralExpr) -> None:
+        return None
+
+    def visitVariableExpr(self, expr: VariableExpr) -> None:
+        if (
+            len(self.__scopes) != 0
+            and expr.name.lexeme in self.__scopes[-1].slots
+            and expr.name.lexeme not in self.__scopes[-1].defined
+        ):
+            self.__error(expr.name, "Can't read local variable in its own initializer.")
+        expr.depth, expr.slot = self.__resolve_local(expr.name)
+
+    # StmtVisitor
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> None:
+        self.__scopes.append(Scope())
+        self.resolve(stmt.statements)
+        self.__scopes.pop()
+
+    def visitExpressionStmt(self, stmt: ExpressionStmt) -> None:
+        self.__resolve_expr(stmt.expression)
+
+    def visitFunctionStmt(self, stmt: FunctionStmt) -> None:
+        self.__declare(stmt.name)
+        self.__define(stmt.name)
+        self.__resolve_function(stmt)
+
+    def visitReturnStmt(self, stmt: ReturnStmt) -> None:
+        if self.__in_function == 0:
+            self.__error(stmt.keyword, "Can't return from top-level code.")
+        if stmt.value is not None:
+            self.__resolve_expr(stmt.value)
+
+    def visitIfStmt(self, stmt: IfStmt) -> None:
+        self.__resolve_expr(stmt.condition)
+        self.__resolve_stmt(stmt.thenBranch)
+        if stmt.elseBranch is not None:
+            self.__resolve_stmt(stmt.elseBranch)
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> None:
+        self.__resolve_expr(stmt.expression)
+
+    def visitVarStmt(self, stmt: VarStmt) -> None:
+        self.__declare(stmt.name)
+        if stmt.initializer is not None:
+            self.__resolve_expr(stmt.initializer)
+        self.__define(stmt.name)
+
+    def visitWhileStmt(self, stmt: WhileStmt) -> None:
+        self.__resolve_expr(stmt.condition)
+        self.__resolve_stmt(stmt.body)
+
+    def visitImportStmt(self, stmt: ImportStmt) -> None:
+        # a module's bindings become globals of the importing program
+        if len(self.__scopes) != 0:
+            self.__error(stmt.keyword, "Can only import at top level.")
+
+    def __resolve_function(self, stmt: FunctionStmt) -> None:
+        # parameters and the body's declarations share one frame, matching
+        # the single Context a call executes the body in
+        self.__scopes.append(Scope())
+        self.__in_function += 1
+        for param in stmt.params:
+            self.__declare(param)
+            self.__define(param)
+        if isinstance(stmt.body, BlockStmt):
+            self.resolve(stmt.body.statements)
+        else:
+            self.__resolve_stmt(stmt.body)
+        self.__in_function -= 1
+        self.__scopes.pop()
+
+    def __resolve_local(self, name: Token) -> tuple[int, int]:
+        for depth, scope in enumerate(reversed(self.__scopes)):
+            if name.lexeme in scope.slots:
+                return depth, scope.slots[name.lexeme]
+        return -1, -1
+
+    def __declare(self, name: Token) -> None:
+        if len(self.__scopes) == 0:
+            return
+
+        scope: Scope = self.__scopes[-1]
+        if name.lexeme in scope.slots:
+            self.__error(name, "Already a variable with this name in this scope.")
+            return
+        scope.declare(name.lexeme)
+
+    def __define(self, name: Token) -> None:
+        if len(self.__scopes) == 0:
+            return
+        self.__scopes[-1].defined.add(name.lexeme)
+
+    def __resolve_stmt(self, stmt: Stmt) -> None:
+        stmt.accept(self)
+
+    def __resolve_expr(self, expr: Expr) -> None:
+        expr.accept(self)
+
+    def __error(self, token: Token, message: str) -> None:
+        self.errors.append(ResolveException(token=token, message=message))
@@ -0,0 +1,100 @@
+from typing import Any, Optional
+import math
+
+from plox.frontend.tokens import Token
+
+
+class OpCode:
+    """
+    Opcode numbers. These are plain ints rather than an IntEnum because
+    comparing enum members is several times slower in the dispatch loop.
+    Operands are stored inline in `Chunk.code` right after the opcode.
+    """
+
+    CONSTANT = 0  # const index
+    NIL = 1
+    TRUE = 2
+    FALSE = 3
+    POP = 4
+    POPN = 5  # count
+
+    GET_LOCAL = 6  # slot
+    SET_LOCAL = 7  # slot
+    GET_GLOBAL = 8  # name const index
+    SET_GLOBAL = 9  # name const index
+    DEFINE_GLOBAL = 10  # name const index
+    GET_UPVALUE = 11  # upvalue index
+    SET_UPVALUE = 12  # upvalue index
+    CLOSE_UPVALUE = 13
+
+    EQUAL = 14
+    NOT_EQUAL = 15
+    GREATER = 16
+    GREATER_EQUAL = 17
+    LESS = 18
+    LESS_EQUAL = 19
+    ADD = 20
+    SUBTRACT = 21
+    MULTIPLY = 22
+    DIVIDE = 23
+    NOT = 24
+    NEGATE = 25
+
+    PRINT = 26
+    JUMP = 27  # target
+    JUMP_IF_FALSE = 28  # target, keeps condition on the stack
+    JUMP_IF_TRUE = 29  # target, keeps condition on the stack
+    POP_JUMP_IF_FALSE = 30  # target
+    CALL = 31  # argument count
+    TAIL_CALL = 37  # argument count, followed by RETURN
+    CLOSURE = 32  # function const index, then (is_local, index) per upvalue
+    RETURN = 33
+
+    # assignment whose value is discarded: SET_* followed by POP
+    STORE_LOCAL = 34  # slot
+    STORE_GLOBAL = 35  # name const index
+    STORE_UPVALUE = 36  # upvalue index
+
+    IMPORT = 38  # path const index
+
+
+class Chunk:
+    """
+    Compiled body of one function: a flat list of opcodes with their inline
+    operands, the constant pool they index into and, for every opcode, the
+    token used to report runtime errors raised by it.
+    """
+
+    def __init__(self) -> None:
+        self.code: list[int] = []
+        self.constants: list[Any] = []
+        self.tokens: list[Optional[Token]] = []
+        self.__constant_index: dict[tuple[Any, ...], int] = {}
+
+    def write(self, op: int, token: Optional[Token] = None) -> int:
+        self.code.append(op)
+        self.tokens.append(token)
+        return len(self.code) - 1
+
+    def add_constant(self, value: Any) -> int:
+        # the type keeps 1.0 and True apart, the sign keeps 0.0 and -0.0 apart
+        key: tuple[Any, ...] = (type(value), value)
+        if isinstance(value, float):
+            key += (math.copysign(1.0, value),)
+        if key not in self.__constant_index:
+            self.constants.append(value)
+            self.__constant_index[key] = len(self.constants) - 1
+        return self.__constant_index[key]
+
+
+class Function:
+    def __init__(self, name: str, arity: int) -> None:
+        self.name = name
+        self.arity = arity
+        self.upvalue_count = 0
+        self.chunk = Chunk()
+
+    def __str__(self) -> str:
+        if self.name == "":
+            return "<script>"
+        return f"<fn {self.name}>"
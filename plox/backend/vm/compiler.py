@@ -0,0 +1,346 @@
+from typing import Any, Optional
+
+from plox.frontend.tokens import Token, TokenType as TT
+from plox.frontend.ast import (
+    Expr,
+    AssignExpr,
+    GroupingExpr,
+    BinaryExpr,
+    LogicalExpr,
+    LiteralExpr,
+    UnaryExpr,
+    VariableExpr,
+    CallExpr,
+    Stmt,
+    ExpressionStmt,
+    IfStmt,
+    WhileStmt,
+    PrintStmt,
+    VarStmt,
+    FunctionStmt,
+    ReturnStmt,
+    ImportStmt,
+    BlockStmt,
+    ExprVisitor,
+    StmtVisitor,
+)
+from plox.backend.vm.chunk import Chunk, Function, OpCode as Op
+
+BINARY_OPS: dict[TT, int] = {
+    TT.PLUS: Op.ADD,
+    TT.MINUS: Op.SUBTRACT,
+    TT.STAR: Op.MULTIPLY,
+    TT.SLASH: Op.DIVIDE,
+    TT.EQ_EQ: Op.EQUAL,
+    TT.BANG_EQ: Op.NOT_EQUAL,
+    TT.GT: Op.GREATER,
+    TT.GTE: Op.GREATER_EQUAL,
+    TT.LT: Op.LESS,
+    TT.LTE: Op.LESS_EQUAL,
+}
+
+
+class Local:
+    def __init__(self, name: str, depth: int) -> None:
+        self.name = name
+        self.depth = depth
+        self.captured = False
+
+
+class FunctionState:
+    """
+    Per-function compilation state. Slot 0 of every frame holds the callee,
+    parameters follow, then block locals in declaration order.
+    """
+
+    def __init__(self, function: Function, enclosing: Optional["FunctionState"]):
+        self.function = function
+        self.enclosing = enclosing
+        self.locals: list[Local] = [Local("", 0)]
+        self.upvalues: list[tuple[bool, int]] = []
+        self.scope_depth = 0
+
+    def resolve_local(self, name: str) -> int:
+        for slot in range(len(self.locals) - 1, 0, -1):
+            if self.locals[slot].name == name:
+                return slot
+        return -1
+
+    def resolve_upvalue(self, name: str) -> int:
+        if self.enclosing is None:
+            return -1
+
+        slot: int = self.enclosing.resolve_local(name)
+        if slot != -1:
+            self.enclosing.locals[slot].captured = True
+            return self.__add_upvalue(True, slot)
+
+        index: int = self.enclosing.resolve_upvalue(name)
+        if index != -1:
+            return self.__add_upvalue(False, index)
+        return -1
+
+    def __add_upvalue(self, is_local: bool, index: int) -> int:
+        upvalue = (is_local, index)
+        if upvalue in self.upvalues:
+            return self.upvalues.index(upvalue)
+        self.upvalues.append(upvalue)
+        self.function.upvalue_count = len(self.upvalues)
+        return len(self.upvalues) - 1
+
+
+class Compiler(ExprVisitor[None], StmtVisitor[None]):
+    """
+    Compiles a resolved program into the bytecode executed by `VM`.
+    Variables are resolved here against the compiler's own frame layout:
+    top-level declarations are globals, everything else is a stack slot of
+    the enclosing function or an upvalue captured from an outer one.
+    """
+
+    def __init__(self) -> None:
+        self.__state: FunctionState = FunctionState(Function("", 0), None)
+
+    def compile(self, stmts: list[Stmt]) -> Function:
+        for stmt in stmts:
+            self.__stmt(stmt)
+        self.__emit(Op.NIL)
+        self.__emit(Op.RETURN)
+        return self.__state.function
+
+    # ExprVisitor
+
+    def visitAssignExpr(self, expr: AssignExpr) -> None:
+        self.__expr(expr.value)
+        self.__variable(expr.name, Op.SET_LOCAL, Op.SET_UPVALUE, Op.SET_GLOBAL)
+
+    def visitLogicalExpr(self, expr: LogicalExpr) -> None:
+        self.__expr(expr.left)
+        jump_op: int = (
+            Op.JUMP_IF_TRUE if expr.operator.type == TT.OR else Op.JUMP_IF_FALSE
+        )
+        end: int = self.__emit_jump(jump_op)
+        self.__emit(Op.POP)
+        self.__expr(expr.right)
+        self.__patch_jump(end)
+
+    def visitBinaryExpr(self, expr: BinaryExpr) -> None:
+        self.__expr(expr.left)
+        self.__expr(expr.right)
+        self.__emit(BINARY_OPS[expr.operator.type], expr.operator)
+
+    def visitCallExpr(self, expr: CallExpr) -> None:
+        self.__expr(expr.callee)
+        for arg in expr.arguments:
+            self.__expr(arg)
+        self.__emit(Op.CALL, expr.paren)
+        self.__emit_operand(len(expr.arguments))
+
+    def visitGroupingExpr(self, expr: GroupingExpr) -> None:
+        self.__expr(expr.expression)
+
+    def visitUnaryExpr(self, expr: UnaryExpr) -> None:
+        self.__expr(expr.right)
+        match expr.operator.type:
+            case TT.MINUS:
+                self.__emit(Op.NEGATE, expr.operator)
+            case TT.BANG:
+                self.__emit(Op.NOT, expr.operator)
+
+    def visitLiteralExpr(self, expr: LiteralExpr) -> None:
+        self.__literal(expr.value)
+
+    def visitVariableExpr(self, expr: VariableExpr) -> None:
+        self.__variable(expr.name, Op.GET_LOCAL, Op.GET_UPVALUE, Op.GET_GLOBAL)
+
+    # StmtVisitor
+
+    def visitBlockStmt(self, stmt: BlockStmt) -> None:
+        self.__begin_scope()
+        for s in stmt.statements:
+            self.__stmt(s)
+        self.__end_scope()
+
+    def visitExpressionStmt(self, stmt: ExpressionStmt) -> None:
+        if isinstance(stmt.expression, AssignExpr):
+            self.__expr(stmt.expression.value)
+            self.__variable(
+                stmt.expression.name, Op.STORE_LOCAL, Op.STORE_UPVALUE, Op.STORE_GLOBAL
+            )
+            return
+
+        self.__expr(stmt.expression)
+        self.__emit(Op.POP)
+
+    def visitFunctionStmt(self, stmt: FunctionStmt) -> None:
+        # declared before the body is compiled so the function can recurse
+        if self.__state.scope_depth > 0:
+            self.__state.locals.append(
+                Local(stmt.name.lexeme, self.__state.scope_depth)
+            )
+        self.__function(stmt)
+        self.__define(stmt.name)
+
+    def visitReturnStmt(self, stmt: ReturnStmt) -> None:
+        if isinstance(stmt.value, CallExpr):
+            # a call to a closure replaces the frame, the RETURN is only
+            # reached when the callee is native
+            self.__expr(stmt.value.callee)
+            for arg in stmt.value.arguments:
+                self.__expr(arg)
+            self.__emit(Op.TAIL_CALL, stmt.value.paren)
+            self.__emit_operand(len(stmt.value.arguments))
+        elif stmt.value is None:
+            self.__literal(None)
+        else:
+            self.__expr(stmt.value)
+        self.__emit(Op.RETURN, stmt.keyword)
+
+    def visitIfStmt(self, stmt: IfStmt) -> None:
+        self.__expr(stmt.condition)
+        else_jump: int = self.__emit_jump(Op.POP_JUMP_IF_FALSE)
+        self.__stmt(stmt.thenBranch)
+
+        if stmt.elseBranch is None:
+            self.__patch_jump(else_jump)
+            return
+
+        end_jump: int = self.__emit_jump(Op.JUMP)
+        self.__patch_jump(else_jump)
+        self.__stmt(stmt.elseBranch)
+        self.__patch_jump(end_jump)
+
+    def visitPrintStmt(self, stmt: PrintStmt) -> None:
+        self.__expr(stmt.expression)
+        self.__emit(Op.PRINT)
+
+    def visitVarStmt(self, stmt: VarStmt) -> None:
+        if stmt.initializer is None:
+            self.__literal(None)
+        else:
+            self.__expr(stmt.initializer)
+        if self.__state.scope_depth > 0:
+            self.__state.locals.append(
+                Local(stmt.name.lexeme, self.__state.scope_depth)
+            )
+        self.__define(stmt.name)
+
+    def visitWhileStmt(self, stmt: WhileStmt) -> None:
+        start: int = len(self.__chunk().code)
+        self.__expr(stmt.condition)
+        exit_jump: int = self.__emit_jump(Op.POP_JUMP_IF_FALSE)
+        self.__stmt(stmt.body)
+        self.__emit(Op.JUMP)
+        self.__emit_operand(start)
+        self.__patch_jump(exit_jump)
+
+    def visitImportStmt(self, stmt: ImportStmt) -> None:
+        self.__emit(Op.IMPORT, stmt.keyword)
+        self.__emit_operand(self.__chunk().add_constant(stmt.path.literal))
+
+    # Helpers
+
+    def __function(self, stmt: FunctionStmt) -> None:
+        function = Function(stmt.name.lexeme, len(stmt.params))
+        self.__state = FunctionState(function, self.__state)
+        self.__state.scope_depth = 1
+        for param in stmt.params:
+            self.__state.locals.append(Local(param.lexeme, 1))
+
+        body: list[Stmt] = (
+            stmt.body.statements if isinstance(stmt.body, BlockStmt) else [stmt.body]
+        )
+        for s in body:
+            self.__stmt(s)
+        self.__emit(Op.NIL)
+        self.__emit(Op.RETURN)
+
+        state: FunctionState = self.__state
+        self.__state = state.enclosing  # type: ignore[assignment]
+        self.__emit(Op.CLOSURE)
+        self.__emit_operand(self.__chunk().add_constant(function))
+        for is_local, index in state.upvalues:
+            self.__emit_operand(1 if is_local else 0)
+            self.__emit_operand(index)
+
+    def __variable(
+        self, name: Token, local_op: int, upvalue_op: int, global_op: int
+    ) -> None:
+        slot: int = self.__state.resolve_local(name.lexeme)
+        if slot != -1:
+            self.__emit(local_op, name)
+            self.__emit_operand(slot)
+            return
+
+        index: int = self.__state.resolve_upvalue(name.lexeme)
+        if index != -1:
+            self.__emit(upvalue_op, name)
+            self.__emit_operand(index)
+            return
+
+        self.__emit(global_op, name)
+        self.__emit_operand(self.__chunk().add_constant(name.lexeme))
+
+    def __define(self, name: Token) -> None:
+        # a local's value simply stays on the stack in its slot
+        if self.__state.scope_depth > 0:
+            return
+        self.__emit(Op.DEFINE_GLOBAL, name)
+        self.__emit_operand(self.__chunk().add_constant(name.lexeme))
+
+    def __literal(self, value: Any) -> None:
+        if value is None:
+            self.__emit(Op.NIL)
+        elif value is True:
+            self.__emit(Op.TRUE)
+        elif value is False:
+            self.__emit(Op.FALSE)
+        else:
+            self.__emit(Op.CONSTANT)
+            self.__emit_operand(self.__chunk().add_constant(value))
+
+    def __begin_scope(self) -> None:
+        self.__state.scope_depth += 1
+
+    def __end_scope(self) -> None:
+        state: FunctionState = self.__state
+        state.scope_depth -= 1
+
+        pending: int = 0
+        while len(state.locals) > 1 and state.locals[-1].depth > state.scope_depth:
+            local: Local = state.locals.pop()
+            if local.captured:
+                self.__emit_pops(pending)
+                pending = 0
+                self.__emit(Op.CLOSE_UPVALUE)
+            else:
+                pending += 1
+        self.__emit_pops(pending)
+
+    def __emit_pops(self, count: int) -> None:
+        if count == 1:
+            self.__emit(Op.POP)
+        elif count > 1:
+            self.__emit(Op.POPN)
+            self.__emit_operand(count)
+
+    def __emit_jump(self, op: int) -> int:
+        self.__emit(op)
+        return self.__emit_operand(-1)
+
+    def __patch_jump(self, offset: int) -> None:
+        self.__chunk().code[offset] = len(self.__chunk().code)
+
+    def __emit(self, op: int, token: Optional[Token] = None) -> int:
+        return self.__chunk().write(op, token)
+
+    def __emit_operand(self, operand: int) -> int:
+        return self.__chunk().write(operand)
+
+    def __chunk(self) -> Chunk:
+        return self.__state.function.chunk
+
+    def __stmt(self, stmt: Stmt) -> None:
+        stmt.accept(self)
+
+    def __expr(self, expr: Expr) -> None:
+        expr.accept(self)
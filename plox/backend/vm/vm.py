@@ -0,0 +1,357 @@
+from typing import Any, Optional
+
+from plox.frontend.ast import Stmt
+from plox.frontend.tokens import Token
+from plox.backend.visitors.eval.runtime import (
+    Context,
+    LoxCallable,
+    RuntimeException,
+    NativeError,
+    is_truthy,
+    is_equal,
+    stringify,
+    STRINGS,
+    concat,
+)
+from plox.backend.vm.chunk import Function, OpCode as Op
+from plox.backend.vm.compiler import Compiler
+from plox.modules import import_module
+
+
+class Upvalue:
+    """
+    A variable captured by a closure. While the variable is still alive on
+    the VM stack the upvalue is open and reads through to `stack[index]`;
+    once its scope ends the value is copied into the upvalue and it is closed.
+    """
+
+    __slots__ = ("index", "value", "closed")
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.value: Any = None
+        self.closed = False
+
+
+class Closure(LoxCallable):
+    __slots__ = ("function", "upvalues")
+
+    def __init__(self, function: Function, upvalues: list[Upvalue]) -> None:
+        self.function = function
+        self.upvalues = upvalues
+
+    def call(self, eval: Any, args: list[Any]) -> Any:
+        return eval.invoke(self, args)
+
+    def arity(self) -> int:
+        return self.function.arity
+
+    def __str__(self) -> str:
+        return str(self.function)
+
+
+class Frame:
+    __slots__ = ("closure", "ip", "base")
+
+    def __init__(self, closure: Closure, ip: int, base: int) -> None:
+        self.closure = closure
+        self.ip = ip
+        self.base = base
+
+
+class VM:
+    """
+    Stack-based virtual machine executing bytecode produced by `Compiler`.
+    Lox calls push a `Frame` instead of recursing in Python, so the Python
+    stack does not grow with the depth of Lox recursion. A call in return
+    position reuses the caller's frame, so tail recursion runs in constant
+    space.
+    """
+
+    def __init__(self, ctx: Optional[Context] = None) -> None:
+        self.globals = ctx if ctx is not None else Context()
+        self.stack: list[Any] = []
+        self.frames: list[Frame] = []
+        self.open_upvalues: list[Upvalue] = []
+
+    def run(self, stmts: list[Stmt]) -> None:
+        function: Function = Compiler().compile(stmts)
+        self.stack = []
+        self.frames = []
+        self.open_upvalues = []
+        self.invoke(Closure(function, []), [])
+
+    def invoke(self, closure: Closure, args: list[Any]) -> Any:
+        base: int = len(self.stack)
+        self.stack.append(closure)
+        self.stack.extend(args)
+        self.frames.append(Frame(closure, 0, base))
+        return self.__execute(len(self.frames) - 1)
+
+    def __execute(self, floor: int) -> Any:
+        """Runs until the frame at index `floor` returns and yields its result."""
+        stack: list[Any] = self.stack
+        push = stack.append
+        pop = stack.pop
+        values: dict[str, Any] = self.globals.values
+
+        frame: Frame = self.frames[-1]
+        closure: Closure = frame.closure
+        chunk = closure.function.chunk
+        code: list[int] = chunk.code
+        constants: list[Any] = chunk.constants
+        base: int = frame.base
+        ip: int = frame.ip
+
+        # handlers are ordered by how often they run in loop- and call-heavy code
+        while True:
+            op: int = code[ip]
+            ip += 1
+
+            if op == Op.GET_LOCAL:
+                push(stack[base + code[ip]])
+                ip += 1
+            elif op == Op.CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == Op.ADD:
+                right: Any = pop()
+                left: Any = stack[-1]
+                if type(left) is float and type(right) is float:
+                    stack[-1] = left + right
+                elif type(left) in STRINGS and type(right) in STRINGS:
+                    stack[-1] = concat(left, right)
+                else:
+                    self.__error(
+                        chunk.tokens[ip - 1],
+                        "Operands must be two numbers or two strings.",
+                    )
+            elif op == Op.STORE_LOCAL:
+                stack[base + code[ip]] = pop()
+                ip += 1
+            elif op == Op.LESS:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__error(chunk.tokens[ip - 1], "operands must be numbers.")
+                stack[-1] = left < right
+            elif op == Op.POP_JUMP_IF_FALSE:
+                condition: Any = pop()
+                if condition is None or condition is False:
+                    ip = code[ip]
+                else:
+                    ip += 1
+            elif op == Op.JUMP:
+                ip = code[ip]
+            elif op == Op.GET_GLOBAL:
+                try:
+                    push(values[constants[code[ip]]])
+                except KeyError:
+                    if not self.globals.load_native(constants[code[ip]]):
+                        self.__undefined(chunk.tokens[ip - 1])
+                    push(values[constants[code[ip]]])
+                ip += 1
+            elif op == Op.STORE_GLOBAL:
+                name: str = constants[code[ip]]
+                if name not in values and not self.globals.load_native(name):
+                    self.__undefined(chunk.tokens[ip - 1])
+                values[name] = pop()
+                ip += 1
+            elif op == Op.SUBTRACT:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__error(chunk.tokens[ip - 1], "operands must be numbers.")
+                stack[-1] = left - right
+            elif op == Op.CALL or op == Op.TAIL_CALL:
+                argc: int = code[ip]
+                ip += 1
+                callee: Any = stack[-1 - argc]
+                if type(callee) is Closure:
+                    if callee.function.arity != argc:
+                        self.__error(
+                            chunk.tokens[ip - 2],
+                            f"Expected {callee.function.arity} arguments got {argc}.",
+                        )
+                    if op == Op.TAIL_CALL:
+                        # the callee and its arguments take over this frame
+                        if self.open_upvalues:
+                            self.__close_upvalues(base)
+                        stack[base:] = stack[len(stack) - argc - 1 :]
+                        frame.closure = callee
+                    else:
+                        frame.ip = ip
+                        frame = Frame(callee, 0, len(stack) - argc - 1)
+                        self.frames.append(frame)
+                    closure = callee
+                    chunk = closure.function.chunk
+                    code = chunk.code
+                    constants = chunk.constants
+                    base = frame.base
+                    ip = 0
+                elif isinstance(callee, LoxCallable):
+                    if callee.arity() != argc:
+                        self.__error(
+                            chunk.tokens[ip - 2],
+                            f"Expected {callee.arity()} arguments got {argc}.",
+                        )
+                    args: list[Any] = stack[len(stack) - argc :]
+                    del stack[len(stack) - argc - 1 :]
+                    frame.ip = ip
+                    try:
+                        push(callee.call(self, args))
+                    except NativeError as e:
+                        self.__error(chunk.tokens[ip - 2], e.message)
+                else:
+                    self.__error(
+                        chunk.tokens[ip - 2], "Can only call functions and classes."
+                    )
+            elif op == Op.RETURN:
+                result: Any = pop()
+                if self.open_upvalues:
+                    self.__close_upvalues(base)
+                del stack[base:]
+                self.frames.pop()
+                if len(self.frames) == floor:
+                    return result
+                push(result)
+                frame = self.frames[-1]
+                closure = frame.closure
+                chunk = closure.function.chunk
+                code = chunk.code
+                constants = chunk.constants
+                base = frame.base
+                ip = frame.ip
+            elif op == Op.POP:
+                pop()
+            elif op == Op.SET_LOCAL:
+                stack[base + code[ip]] = stack[-1]
+                ip += 1
+            elif op == Op.GET_UPVALUE:
+                upvalue: Upvalue = closure.upvalues[code[ip]]
+                push(upvalue.value if upvalue.closed else stack[upvalue.index])
+                ip += 1
+            elif op == Op.STORE_UPVALUE or op == Op.SET_UPVALUE:
+                upvalue = closure.upvalues[code[ip]]
+                value: Any = pop() if op == Op.STORE_UPVALUE else stack[-1]
+                if upvalue.closed:
+                    upvalue.value = value
+                else:
+                    stack[upvalue.index] = value
+                ip += 1
+            elif op == Op.SET_GLOBAL:
+                name = constants[code[ip]]
+                if name not in values and not self.globals.load_native(name):
+                    self.__undefined(chunk.tokens[ip - 1])
+                values[name] = stack[-1]
+                ip += 1
+            elif op == Op.NIL:
+                push(None)
+            elif op == Op.TRUE:
+                push(True)
+            elif op == Op.FALSE:
+                push(False)
+            elif op == Op.POPN:
+                del stack[len(stack) - code[ip] :]
+                ip += 1
+            elif op == Op.DEFINE_GLOBAL:
+                values[constants[code[ip]]] = pop()
+                ip += 1
+            elif op == Op.CLOSE_UPVALUE:
+                self.__close_upvalues(len(stack) - 1)
+                pop()
+            elif op == Op.EQUAL:
+                right = pop()
+                stack[-1] = is_equal(stack[-1], right)
+            elif op == Op.NOT_EQUAL:
+                right = pop()
+                stack[-1] = not is_equal(stack[-1], right)
+            elif op == Op.GREATER:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__error(chunk.tokens[ip - 1], "operands must be numbers.")
+                stack[-1] = left > right
+            elif op == Op.GREATER_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__error(chunk.tokens[ip - 1], "operands must be numbers.")
+                stack[-1] = left >= right
+            elif op == Op.LESS_EQUAL:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__error(chunk.tokens[ip - 1], "operands must be numbers.")
+                stack[-1] = left <= right
+            elif op == Op.MULTIPLY:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__error(chunk.tokens[ip - 1], "operands must be numbers.")
+                stack[-1] = left * right
+            elif op == Op.DIVIDE:
+                right = pop()
+                left = stack[-1]
+                if type(left) is not float or type(right) is not float:
+                    self.__error(chunk.tokens[ip - 1], "operands must be numbers.")
+                stack[-1] = left / right
+            elif op == Op.NOT:
+                stack[-1] = not is_truthy(stack[-1])
+            elif op == Op.NEGATE:
+                if type(stack[-1]) is not float:
+                    self.__error(chunk.tokens[ip - 1], "operand must be a number.")
+                stack[-1] = -stack[-1]
+            elif op == Op.JUMP_IF_FALSE:
+                ip = ip + 1 if is_truthy(stack[-1]) else code[ip]
+            elif op == Op.JUMP_IF_TRUE:
+                ip = code[ip] if is_truthy(stack[-1]) else ip + 1
+            elif op == Op.PRINT:
+                print(stringify(pop()))
+            elif op == Op.CLOSURE:
+                function: Function = constants[code[ip]]
+                ip += 1
+                upvalues: list[Upvalue] = []
+                for _ in range(function.upvalue_count):
+                    is_local: int = code[ip]
+                    index: int = code[ip + 1]
+                    ip += 2
+                    if is_local:
+                        upvalues.append(self.__capture_upvalue(base + index))
+                    else:
+                        upvalues.append(closure.upvalues[index])
+                push(Closure(function, upvalues))
+            elif op == Op.IMPORT:
+                import_module(self, chunk.tokens[ip - 1], constants[code[ip]])
+                ip += 1
+            else:
+                raise RuntimeError(f"unknown opcode {op}")
+
+    def __capture_upvalue(self, index: int) -> Upvalue:
+        for upvalue in self.open_upvalues:
+            if upvalue.index == index:
+                return upvalue
+        upvalue = Upvalue(index)
+        self.open_upvalues.append(upvalue)
+        return upvalue
+
+    def __close_upvalues(self, last: int) -> None:
+        if len(self.open_upvalues) == 0:
+            return
+
+        still_open: list[Upvalue] = []
+        for upvalue in self.open_upvalues:
+            if upvalue.index >= last:
+                upvalue.value = self.stack[upvalue.index]
+                upvalue.closed = True
+            else:
+                still_open.append(upvalue)
+        self.open_upvalues = still_open
+
+    def __undefined(self, token: Optional[Token]) -> None:
+        assert token is not None
+        self.__error(token, f"Undefined variable '{token.lexeme}'.")
+
+    def __error(self, token: Optional[Token], message: str) -> None:
+        assert token is not None
+        raise RuntimeException(token, message)
@@ -0,0 +1,81 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Iterable, Optional
+import io
+import os
+import time
+
+from plox import interpreter
+from plox.interpreter import Interpreter
+
+
+@dataclass
+class ScriptResult:
+    path: Path
+    output: str
+    errors: str
+    # what `main.py path` would exit with: 0, or 65 when errors were reported
+    status: int
+    seconds: float
+
+
+def run_script(path: Path, options: dict[str, Any]) -> ScriptResult:
+    """
+    Runs one script on a new `Interpreter`, so it starts from fresh globals,
+    and captures what it prints and the errors it reports.
+    """
+    output, errors = io.StringIO(), io.StringIO()
+    status: int = 0
+    # the interpreter reports errors on its module's `stderr`
+    saved: Any = interpreter.stderr
+    interpreter.stderr = errors
+    start: float = time.perf_counter()
+    try:
+        with redirect_stdout(output):
+            Interpreter(**options).run_file(path)
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else 1
+    finally:
+        seconds: float = time.perf_counter() - start
+        interpreter.stderr = saved
+    return ScriptResult(path, output.getvalue(), errors.getvalue(), status, seconds)
+
+
+def run_batch(
+    paths: Iterable[Path], workers: Optional[int] = None, **options: Any
+) -> list[ScriptResult]:
+    """
+    Runs every script, each as if it was run alone, on a pool of `workers`
+    processes (one per CPU by default). Results are in the order of `paths`.
+    `options` are passed to `Interpreter`.
+    """
+    paths = list(paths)
+    run = partial(run_script, options=options)
+    workers = workers or os.process_cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        return list(map(run, paths))
+
+    # scripts are small, sending them a few at a time saves round trips
+    chunksize: int = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, paths, chunksize=chunksize))
+
+
+def summary(results: list[ScriptResult], seconds: float) -> str:
+    """Throughput of the whole batch and the spread of per-script latency."""
+    lines: list[str] = [
+        f"{len(results)} scripts, {sum(r.status != 0 for r in results)} failed, "
+        f"{seconds:.2f}s, {len(results) / seconds if seconds else 0.0:.1f} scripts/s"
+    ]
+    if results:
+        latencies: list[float] = sorted(r.seconds for r in results)
+        cells: list[str] = []
+        for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            index: int = min(len(latencies) - 1, int(fraction * len(latencies)))
+            cells.append(f"{label} {latencies[index] * 1e3:.2f}")
+        cells.append(f"max {latencies[-1] * 1e3:.2f}")
+        lines.append("latency ms: " + ", ".join(cells))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,92 @@
+from pathlib import Path
+from typing import Any, Optional
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import zlib
+
+from plox import __version__
+from plox.frontend.ast import Stmt
+
+
+def default_cache_dir() -> Path:
+    if (directory := os.environ.get("PLOX_CACHE_DIR")) is not None:
+        return Path(directory)
+    if (xdg := os.environ.get("XDG_CACHE_HOME")) is not None:
+        return Path(xdg) / "plox"
+    return Path.home() / ".cache" / "plox"
+
+
+def source_key(source: str, kind: str) -> str:
+    """
+    Key for an artifact derived from `source`. It covers the plox version and
+    the Python implementation, so upgrading either invalidates old entries.
+    """
+    digest = hashlib.sha256()
+    for part in (kind, __version__, sys.implementation.cache_tag or ""):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(source.encode("utf-8", "surrogatepass"))
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Directory of binary blobs addressed by key. Writes go through a temporary
+    file and an atomic rename so readers never observe a partial entry.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def load(self, key: str) -> Optional[bytes]:
+        try:
+            return (self.directory / key).read_bytes()
+        except OSError:
+            return None
+
+    def store(self, key: str, data: bytes) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self.directory / key)
+        except OSError:
+            # the cache is an optimization; failing to write it is not an error
+            pass
+
+    def discard(self, key: str) -> None:
+        try:
+            (self.directory / key).unlink()
+        except OSError:
+            pass
+
+
+# part of the key of pickled trees; bumped when the node classes change shape,
+# since a pickle of the old nodes may still load, into the wrong fields
+TREE_FORMAT: str = "ast2"
+
+
+def load_tree(cache: DiskCache, source: str) -> Optional[list[Stmt]]:
+    """The syntax tree stored for `source`, before resolving, if any."""
+    # entries are written by this user's own plox runs, like the code cache
+    key: str = source_key(source, TREE_FORMAT)
+    if (data := cache.load(key)) is None:
+        return None
+    try:
+        stmts: Any = pickle.loads(zlib.decompress(data))
+    except Exception:
+        stmts = None
+    if not isinstance(stmts, list) or not all(isinstance(stmt, Stmt) for stmt in stmts):
+        cache.discard(key)
+        return None
+    return stmts
+
+
+def store_tree(cache: DiskCache, source: str, stmts: list[Stmt]) -> None:
+    # stored before the resolver and optimizer update the tree in place
+    data: bytes = pickle.dumps(stmts, protocol=pickle.HIGHEST_PROTOCOL)
+    cache.store(source_key(source, TREE_FORMAT), zlib.compress(data))
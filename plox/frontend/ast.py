@@ -1,26 +1,30 @@
 from abc import ABC, abstractmethod
 from typing import Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from plox.frontend.tokens import Token
 
 
 class Expr(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept[T](self, visitor: "ExprVisitor[T]") -> T:
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class AssignExpr(Expr):
     name: Token
     value: Expr
+    depth: int = field(default=-1, compare=False)
+    slot: int = field(default=-1, compare=False)
 
     def accept[T](self, visitor: "ExprVisitor[T]") -> T:
         return visitor.visitAssignExpr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class LogicalExpr(Expr):
     left: Expr
     operator: Token
@@ -30,7 +34,7 @@ class LogicalExpr(Expr):
         return visitor.visitLogicalExpr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class BinaryExpr(Expr):
     left: Expr
     operator: Token
@@ -40,17 +44,18 @@ class BinaryExpr(Expr):
         return visitor.visitBinaryExpr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class CallExpr(Expr):
     callee: Expr
     paren: Token
     arguments: list[Expr]
+    cached: Any = field(default=None, compare=False)
 
     def accept[T](self, visitor: "ExprVisitor[T]") -> T:
         return visitor.visitCallExpr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class GroupingExpr(Expr):
     expression: Expr
 
@@ -58,7 +63,7 @@ class GroupingExpr(Expr):
         return visitor.visitGroupingExpr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class UnaryExpr(Expr):
     operator: Token
     right: Expr
@@ -67,7 +72,7 @@ class UnaryExpr(Expr):
         return visitor.visitUnaryExpr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class LiteralExpr(Expr):
     value: Any = None
 
@@ -75,9 +80,11 @@ class LiteralExpr(Expr):
         return visitor.visitLiteralExpr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class VariableExpr(Expr):
     name: Token
+    depth: int = field(default=-1, compare=False)
+    slot: int = field(default=-1, compare=False)
 
     def accept[T](self, visitor: "ExprVisitor[T]") -> T:
         return visitor.visitVariableExpr(self)
@@ -118,12 +125,14 @@ class ExprVisitor[R](ABC):
 
 
 class Stmt(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def accept[T](self, visitor: "StmtVisitor[T]") -> T:
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class BlockStmt(Stmt):
     statements: list[Stmt]
 
@@ -131,7 +140,7 @@ class BlockStmt(Stmt):
         return visitor.visitBlockStmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionStmt(Stmt):
     expression: Expr
 
@@ -139,7 +148,7 @@ class ExpressionStmt(Stmt):
         return visitor.visitExpressionStmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class FunctionStmt(Stmt):
     name: Token
     params: list[Token]
@@ -149,26 +158,26 @@ class FunctionStmt(Stmt):
         return visitor.visitFunctionStmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class ReturnStmt(Stmt):
     keyword: Token
-    value: Expr
+    value: Expr | None = None
 
     def accept[T](self, visitor: "StmtVisitor[T]") -> T:
         return visitor.visitReturnStmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt(Stmt):
     condition: Expr
     thenBranch: Stmt
-    elseBranch: Stmt
+    elseBranch: Stmt | None = None
 
     def accept[T](self, visitor: "StmtVisitor[T]") -> T:
         return visitor.visitIfStmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class PrintStmt(Stmt):
     expression: Expr
 
@@ -176,16 +185,16 @@ class PrintStmt(Stmt):
         return visitor.visitPrintStmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class VarStmt(Stmt):
     name: Token
-    initializer: Expr
+    initializer: Expr | None = None
 
     def accept[T](self, visitor: "StmtVisitor[T]") -> T:
         return visitor.visitVarStmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt(Stmt):
     condition: Expr
     body: Stmt
@@ -194,6 +203,15 @@ class WhileStmt(Stmt):
         return visitor.visitWhileStmt(self)
 
 
+@dataclass(slots=True)
+class ImportStmt(Stmt):
+    keyword: Token
+    path: Token
+
+    def accept[T](self, visitor: "StmtVisitor[T]") -> T:
+        return visitor.visitImportStmt(self)
+
+
 class StmtVisitor[R](ABC):
     @abstractmethod
     def visitBlockStmt(self, stmt: BlockStmt) -> R:
@@ -226,3 +244,7 @@ class StmtVisitor[R](ABC):
     @abstractmethod
     def visitWhileStmt(self, stmt: WhileStmt) -> R:
         pass
+
+    @abstractmethod
+    def visitImportStmt(self, stmt: ImportStmt) -> R:
+        pass
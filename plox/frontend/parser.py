@@ -1,4 +1,6 @@
-from plox.frontend.tokens import Token, TokenType as TT
+from typing import Iterable, Iterator
+
+from plox.frontend.tokens import Token, TokenStream, TokenType as TT
 from plox.frontend.ast import (
     Expr,
     AssignExpr,
@@ -18,6 +20,7 @@ from plox.frontend.ast import (
     VarStmt,
     FunctionStmt,
     ReturnStmt,
+    ImportStmt,
 )
 
 
@@ -32,10 +35,25 @@ class ParseException(Exception):
 
 
 class Parser:
-    def __init__(self, tokens: list[Token]) -> None:
+    """
+    Parses a list of tokens or a `TokenStream`. Lookahead only looks at
+    token types, so from a stream only the tokens kept in the tree (names,
+    operators, literals) are ever materialized.
+    """
+
+    def __init__(self, tokens: list[Token] | TokenStream) -> None:
         self.errors: list[ParseException] = []
         self.__tokens = tokens
+        self.__types: list[TT] = (
+            tokens.types()
+            if isinstance(tokens, TokenStream)
+            else [token.type for token in tokens]
+        )
         self.__current = 0
+        # braces of the declaration `parse_complete` is waiting on
+        self.__waiting = False
+        self.__depth = 0
+        self.__closed = False
 
     def parse(self) -> list[Stmt]:
         stmts: list[Stmt] = []
@@ -44,19 +62,108 @@ class Parser:
                 stmts.append(decl_or_stmt)
         return stmts
 
+    def parse_complete(self) -> list[Stmt]:
+        """
+        Parses the declarations that are complete so far and drops their
+        tokens. A declaration cut short by the end of the tokens is not an
+        error: it is left in place to be finished after `more_tokens`.
+        """
+        assert isinstance(self.__tokens, list)
+        stmts: list[Stmt] = []
+        # the waiting declaration cannot be complete while its block is still
+        # open, so a long block is not reparsed for every line added to it
+        if self.__waiting and self.__depth > 0 and not self.__closed:
+            return stmts
+
+        while not self.__is_at_end():
+            start: int = self.__current
+            errors: int = len(self.errors)
+            decl_or_stmt: Stmt | None = self.__decl()
+            if len(self.errors) > errors and self.errors[-1].token.type == TT.EOF:
+                del self.errors[errors:]
+                self.__current = start
+                break
+            if decl_or_stmt is not None:
+                stmts.append(decl_or_stmt)
+
+        del self.__tokens[: self.__current]
+        del self.__types[: self.__current]
+        self.__current = 0
+        self.__depth = 0
+        self.__closed = False
+        self.__track_blocks(self.__types)
+        return stmts
+
+    def parse_stream(self, tokens: Iterable[Token]) -> Iterator[Stmt]:
+        """
+        Pulls tokens one at a time and yields each top-level declaration as
+        soon as it is complete, so only the tokens of the declaration being
+        parsed, and one token after it, are held. A `;` or `}` outside of any
+        parentheses or braces may end a declaration: unless the next token
+        is an `else`, the tokens so far go to `parse_complete`, which keeps
+        whatever turns out to be unfinished. Errors accumulate in `errors`.
+        """
+        chunk: list[Token] = []
+        depth: int = 0
+        for token in tokens:
+            if (
+                depth == 0
+                and len(chunk) != 0
+                and chunk[-1].type in (TT.SEMICOLON, TT.RBRACE)
+                and token.type != TT.ELSE
+            ):
+                chunk.append(Token(TT.EOF, "", None, chunk[-1].line))
+                yield from self.__parse_more(chunk)
+                chunk = []
+            if token.type in (TT.LPAREN, TT.LBRACE):
+                depth += 1
+            elif token.type in (TT.RPAREN, TT.RBRACE):
+                depth = max(0, depth - 1)
+            chunk.append(token)
+
+        yield from self.__parse_more(chunk)
+        # what is still pending was cut short by the end of the source
+        if self.is_pending():
+            yield from self.parse()
+
+    def __parse_more(self, tokens: list[Token]) -> list[Stmt]:
+        errors: list[ParseException] = self.errors
+        self.more_tokens(tokens)
+        self.errors = errors
+        return self.parse_complete()
+
+    def is_pending(self) -> bool:
+        """Whether tokens of an unfinished declaration are waiting."""
+        return len(self.__types) > 1
+
     def more_tokens(self, tokens: list[Token]) -> None:
+        assert isinstance(self.__tokens, list)
+        self.__waiting = self.is_pending()
         if len(self.__tokens) != 0:
             self.__tokens.pop()
+            self.__types.pop()
         self.__tokens.extend(tokens)
+        self.__types.extend(token.type for token in tokens)
+        self.__track_blocks([token.type for token in tokens])
         self.__current = 0
         self.errors = []
 
+    def __track_blocks(self, types: list[TT]) -> None:
+        for type in types:
+            if type == TT.LBRACE:
+                self.__depth += 1
+            elif type == TT.RBRACE:
+                self.__depth -= 1
+                self.__closed = self.__closed or self.__depth <= 0
+
     def __decl(self) -> Stmt | None:
         try:
             if self.__match(TT.FUN):
                 return self.__fun_decl("function")
             if self.__match(TT.VAR):
                 return self.__var_decl()
+            if self.__match(TT.IMPORT):
+                return self.__import_decl()
             return self.__stmt()
         except ParseException as e:
             self.__sync()
@@ -64,7 +171,7 @@ class Parser:
 
     def __fun_decl(self, kind: str) -> Stmt:
         name: Token = self.__consume(TT.IDENTIFIER, f"Expect {kind} name.")
-        self.__consume(TT.LPAREN, f"Expect '(' after {kind} name.")
+        self.__expect(TT.LPAREN, f"Expect '(' after {kind} name.")
 
         params: list[Token] = []
         if not self.__check(TT.RPAREN):
@@ -75,29 +182,35 @@ class Parser:
                 params.append(self.__consume(TT.IDENTIFIER, "Expect parameter name."))
                 if not self.__match(TT.COMMA):
                     break
-        self.__consume(TT.RPAREN, "Expect ')' after parameters.")
-        self.__consume(TT.LBRACE, "Expect '{' " + f"before {kind} body.")
+        self.__expect(TT.RPAREN, "Expect ')' after parameters.")
+        self.__expect(TT.LBRACE, "Expect '{' " + f"before {kind} body.")
         body: Stmt = self.__block_stmt()
         return FunctionStmt(name, params, body)
 
     def __var_decl(self) -> Stmt:
         name: Token = self.__consume(TT.IDENTIFIER, "Expect variable name.")
 
-        initializer: Expr = LiteralExpr()
+        initializer: Expr | None = None
         if self.__match(TT.EQ):
             initializer = self.__expr()
-        self.__consume(
+        self.__expect(
             TT.SEMICOLON,
             "Expect ';' after variable declaration.",
         )
         return VarStmt(name=name, initializer=initializer)
 
+    def __import_decl(self) -> Stmt:
+        keyword: Token = self.__previous()
+        path: Token = self.__consume(TT.STRING, "Expect module path after 'import'.")
+        self.__expect(TT.SEMICOLON, "Expect ';' after module path.")
+        return ImportStmt(keyword, path)
+
     def __return_stmt(self) -> Stmt:
         keyword: Token = self.__previous()
-        value: Expr = LiteralExpr(None)
+        value: Expr | None = None
         if not self.__check(TT.SEMICOLON):
             value = self.__expr()
-        self.__consume(TT.SEMICOLON, "Expect ';' after return value.")
+        self.__expect(TT.SEMICOLON, "Expect ';' after return value.")
 
         return ReturnStmt(keyword, value)
 
@@ -118,22 +231,22 @@ class Parser:
 
     def __print_stmt(self) -> Stmt:
         expr: Expr = self.__expr()
-        self.__consume(TT.SEMICOLON, "Expect ';' after print value.")
+        self.__expect(TT.SEMICOLON, "Expect ';' after print value.")
         return PrintStmt(expr)
 
     def __while_stmt(self) -> Stmt:
-        self.__consume(TT.LPAREN, "Expect '(' after 'while'.")
+        self.__expect(TT.LPAREN, "Expect '(' after 'while'.")
         condition: Expr = self.__expr()
-        self.__consume(TT.RPAREN, "Expect ')' after condition in 'while'.")
+        self.__expect(TT.RPAREN, "Expect ')' after condition in 'while'.")
         body: Stmt = self.__stmt()
         return WhileStmt(condition=condition, body=body)
 
     def __for_stmt(self) -> Stmt:
-        self.__consume(TT.LPAREN, "Expect '(' after 'for'.")
+        self.__expect(TT.LPAREN, "Expect '(' after 'for'.")
 
-        initializer: Stmt
+        initializer: Stmt | None = None
         if self.__match(TT.SEMICOLON):
-            initializer = ExpressionStmt(LiteralExpr(None))
+            pass
         elif self.__match(TT.VAR):
             initializer = self.__var_decl()
         else:
@@ -142,14 +255,14 @@ class Parser:
         condition: Expr = LiteralExpr(True)
         if not self.__check(TT.SEMICOLON):
             condition = self.__expr()
-        self.__consume(TT.SEMICOLON, "Expect ';' after loop condition in 'for'.")
-        increment: Expr = LiteralExpr(None)
+        self.__expect(TT.SEMICOLON, "Expect ';' after loop condition in 'for'.")
+        increment: Expr | None = None
         if not self.__check(TT.RPAREN):
             increment = self.__expr()
-        self.__consume(TT.RPAREN, "Expect ')' after clauses in 'for'.")
+        self.__expect(TT.RPAREN, "Expect ')' after clauses in 'for'.")
 
         body: Stmt = self.__stmt()
-        if increment != LiteralExpr(None):
+        if increment is not None:
             body = BlockStmt(
                 [
                     body,
@@ -159,7 +272,7 @@ class Parser:
 
         body = WhileStmt(condition=condition, body=body)
 
-        if initializer != ExpressionStmt(LiteralExpr(None)):
+        if initializer is not None:
             body = BlockStmt(
                 [
                     initializer,
@@ -170,12 +283,12 @@ class Parser:
         return body
 
     def __if_stmt(self) -> Stmt:
-        self.__consume(TT.LPAREN, "Expect '(' after 'if'.")
+        self.__expect(TT.LPAREN, "Expect '(' after 'if'.")
         condition: Expr = self.__expr()
-        self.__consume(TT.RPAREN, "Expect ')' after condition in 'if'.")
+        self.__expect(TT.RPAREN, "Expect ')' after condition in 'if'.")
         thenStmt: Stmt = self.__stmt()
 
-        elseBranch = ExpressionStmt(LiteralExpr(None))
+        elseBranch: Stmt | None = None
         if self.__match(TT.ELSE):
             elseBranch = self.__stmt()
 
@@ -187,7 +300,7 @@ class Parser:
 
     def __expr_stmt(self) -> Stmt:
         expr: Expr = self.__expr()
-        self.__consume(TT.SEMICOLON, "Expect ';' after expr.")
+        self.__expect(TT.SEMICOLON, "Expect ';' after expr.")
         return ExpressionStmt(expr)
 
     def __block_stmt(self) -> Stmt:
@@ -196,7 +309,7 @@ class Parser:
         while not self.__check(TT.RBRACE) and not self.__is_at_end():
             if (decl_or_stmt := self.__decl()) is not None:
                 stmts.append(decl_or_stmt)
-        self.__consume(TT.RBRACE, "Expect '}' after block.")
+        self.__expect(TT.RBRACE, "Expect '}' after block.")
         return BlockStmt(stmts)
 
     def __expr(self) -> Expr:
@@ -321,16 +434,20 @@ class Parser:
 
         if self.__match(TT.LPAREN):
             expr: Expr = self.__expr()
-            self.__consume(TT.RPAREN, "Expect ')' after expression.")
+            self.__expect(TT.RPAREN, "Expect ')' after expression.")
             return GroupingExpr(expr)
 
         raise self.__err(message="Expect expression.")
 
     def __consume(self, token_type: TT, message: str) -> Token:
-        if self.__check(token_type=token_type):
-            return self.__advance()
+        self.__expect(token_type, message)
+        return self.__previous()
 
-        raise self.__err(message=message)
+    def __expect(self, token_type: TT, message: str) -> None:
+        # like `__consume` but does not materialize the token
+        if not self.__check(token_type=token_type):
+            raise self.__err(message=message)
+        self.__current += 1
 
     def __sync(self) -> None:
         self.__advance()
@@ -345,6 +462,7 @@ class Parser:
                 TT.WHILE,
                 TT.PRINT,
                 TT.RETURN,
+                TT.IMPORT,
             ]:
                 return
 
@@ -361,7 +479,7 @@ class Parser:
     def __match(self, *token_types: TT) -> bool:
         for token_type in token_types:
             if self.__check(token_type):
-                self.__advance()
+                self.__current += 1
                 return True
 
         return False
@@ -369,10 +487,10 @@ class Parser:
     def __check(self, token_type: TT) -> bool:
         if self.__is_at_end():
             return False
-        return self.__peek().type == token_type
+        return self.__types[self.__current] == token_type
 
     def __is_at_end(self) -> bool:
-        return self.__peek().type == TT.EOF
+        return self.__types[self.__current] == TT.EOF
 
     def __peek(self) -> Token:
         return self.__tokens[self.__current]
@@ -1,6 +1,22 @@
-from typing import Iterator, Any
+from typing import IO, Iterator, Any
+from array import array
+import codecs
+import mmap
+import re
 
-from plox.frontend.tokens import TokenType, Token, keywords
+from plox.frontend.tokens import (
+    EOF,
+    IDENTIFIER,
+    INVALID,
+    NUMBER,
+    STRING,
+    TOKEN_CODES,
+    TokenStream,
+    TokenType,
+    Token,
+    keywords,
+    make_token,
+)
 
 
 class Scanner:
@@ -15,8 +31,11 @@ class Scanner:
         token: Token = self.__new_token()
         char: str = self.__advance()
 
-        while char != "\0" and char.isspace():
-            if char == "\n":
+        while char != "\0" and (char.isspace() or char == "/" and self.__peek() == "/"):
+            if char == "/":
+                while self.__peek() != "\n" and not self.__is_source_end():
+                    self.__advance()
+            elif char == "\n":
                 self.__line += 1
             self.__start = self.__current
             char = self.__advance()
@@ -50,12 +69,6 @@ class Scanner:
                 token = self.__new_token(
                     TokenType.LTE if self.__match("=") else TokenType.LT
                 )
-            case "/":
-                if self.__match("/"):
-                    while self.__peek() != "\n" and not self.__is_source_end():
-                        self.__advance()
-                else:
-                    token = self.__new_token(TokenType.SLASH)
             case "+":
                 token = self.__new_token(TokenType.PLUS)
             case "-":
@@ -76,13 +89,9 @@ class Scanner:
                 elif char.isalpha():
                     token = self.__identifier_or_keyword()
                 else:
-                    while (
-                        not self.__peek().isspace() and self.__peek() != "\0"
-                    ):
+                    while not self.__peek().isspace() and self.__peek() != "\0":
                         self.__advance()
-                    token = self.__new_token(
-                        TokenType.INVALID, meta="undefined token"
-                    )
+                    token = self.__new_token(TokenType.INVALID, meta="undefined token")
 
         self.__start = self.__current
         self.__current_token = token
@@ -104,7 +113,9 @@ class Scanner:
     def __number(self) -> Token:
         while self.__peek().isdigit():
             self.__advance()
-            if self.__peek() == "." and self.__peek(offset=1).isdigit():
+        if self.__peek() == "." and self.__peek(offset=1).isdigit():
+            self.__advance()
+            while self.__peek().isdigit():
                 self.__advance()
 
         return self.__new_token(
@@ -173,3 +184,203 @@ class Scanner:
             raise StopIteration
         token = self.scan_token()
         return token
+
+
+FIXED_TOKENS: dict[str, TokenType] = {
+    "{": TokenType.LBRACE,
+    "}": TokenType.RBRACE,
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    ",": TokenType.COMMA,
+    ".": TokenType.DOT,
+    "!": TokenType.BANG,
+    "!=": TokenType.BANG_EQ,
+    "=": TokenType.EQ,
+    "==": TokenType.EQ_EQ,
+    ">": TokenType.GT,
+    ">=": TokenType.GTE,
+    "<": TokenType.LT,
+    "<=": TokenType.LTE,
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.STAR,
+    "/": TokenType.SLASH,
+    ";": TokenType.SEMICOLON,
+    **keywords,
+}
+FIXED_CODES: dict[str, int] = {
+    lexeme: TOKEN_CODES[type] for lexeme, type in FIXED_TOKENS.items()
+}
+
+# Every match is the whitespace before a lexeme and the lexeme itself. The
+# alternatives are tried in order; the last one takes any other character,
+# so the matches cover the source up to its trailing whitespace.
+TOKEN_PATTERN: re.Pattern[str] = re.compile(
+    r"""
+    (\s*)
+    (
+        [^\W\d_][^\W_]*        # identifier or keyword
+        | \d+(?:\.\d+)?         # number
+        | [!=<>]=? | //[^\n]* | [{}(),.+\-*/;]
+        | "[^"]*"?                # string, unterminated without the quote
+        | \0
+        | [^\s\0]+              # invalid
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+def lexeme_code(text: str) -> int | None:
+    """
+    The type code of a lexeme `TOKEN_PATTERN` matched that is not in
+    `FIXED_CODES`, `None` for a comment.
+    """
+    first: str = text[0]
+    if first == '"':
+        return STRING if len(text) > 1 and text[-1] == '"' else INVALID
+    if first == "/":
+        return None
+    if first == "\0":
+        # like `Scanner`, a NUL character ends the source
+        return EOF
+    if first.isdecimal():
+        return NUMBER
+    if first.isalnum():
+        return IDENTIFIER
+    return INVALID
+
+
+def scan(source: str) -> TokenStream:
+    """
+    Scans `source` into a compact `TokenStream` with a single compiled
+    master regex. `findall` splits the whole source into lexemes in one
+    call, so the Python loop only classifies each lexeme: fixed punctuation
+    and keywords by a table lookup, the rest by their first character.
+    """
+    codes: array = array("B")
+    starts: array = array("q")
+    ends: array = array("q")
+    # identifiers repeat, so their codes are kept with the fixed ones
+    known: dict[str, int] = FIXED_CODES.copy()
+    code: int | None
+    end: int = 0
+
+    for space, text in TOKEN_PATTERN.findall(source):
+        start: int = end + len(space)
+        end = start + len(text)
+        if (code := known.get(text)) is None:
+            if (code := lexeme_code(text)) is None:
+                continue
+            if code == IDENTIFIER:
+                known[text] = code
+        codes.append(code)
+        starts.append(start)
+        ends.append(end)
+        if code == EOF:
+            return TokenStream(source, codes, starts, ends)
+
+    codes.append(EOF)
+    starts.append(len(source))
+    ends.append(len(source))
+    return TokenStream(source, codes, starts, ends)
+
+
+class TokenIterator:
+    """
+    Iterates over `tokens`, which end with EOF, with the interface of
+    `Scanner`.
+    """
+
+    def __init__(self, tokens: Iterator[Token]):
+        self.__tokens = tokens
+        self.__current_token: Token | None = None
+
+    def scan_token(self) -> Token:
+        # past the end this keeps returning EOF, as `Scanner` does
+        token: Token | None = next(self.__tokens, self.__current_token)
+        assert token is not None
+        self.__current_token = token
+        return token
+
+    def __iter__(self) -> Iterator[Token]:
+        return self
+
+    def __next__(self) -> Token:
+        if (
+            self.__current_token is not None
+            and self.__current_token.type == TokenType.EOF
+        ):
+            raise StopIteration
+        return self.scan_token()
+
+
+class RegexScanner(TokenIterator):
+    """
+    Iterates over the tokens of `scan`, producing the same tokens as
+    `Scanner`.
+    """
+
+    def __init__(self, source: str):
+        super().__init__(iter(scan(source)))
+
+
+# characters, or bytes, `StreamScanner` reads from its source at a time
+CHUNK_SIZE: int = 1 << 16
+
+
+class StreamScanner(TokenIterator):
+    """
+    Scans a text stream, a binary stream of UTF-8 or an `mmap` chunk by
+    chunk with `TOKEN_PATTERN`, producing the same tokens as `Scanner`.
+    Only the unscanned rest of the current chunk is kept, so memory does
+    not grow with the source, and each token is made when it is asked for.
+    """
+
+    def __init__(
+        self,
+        source: IO[str] | IO[bytes] | mmap.mmap,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        super().__init__(self.__scan(source, chunk_size))
+
+    def __scan(
+        self, source: IO[str] | IO[bytes] | mmap.mmap, chunk_size: int
+    ) -> Iterator[Token]:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        buffer: str = ""
+        pos: int = 0
+        line: int = 1
+        at_end: bool = False
+
+        while True:
+            match: re.Match[str] | None = TOKEN_PATTERN.match(buffer, pos)
+            # a lexeme ending this close to the end of the chunk may go on in
+            # the next one: a name, "1" before ".5", "<" before "=", a string
+            if not at_end and (match is None or match.end() >= len(buffer) - 1):
+                data: str | bytes = source.read(chunk_size)
+                at_end = len(data) == 0
+                if isinstance(data, bytes):
+                    data = decoder.decode(data, final=at_end)
+                buffer = buffer[pos:] + data
+                pos = 0
+                continue
+            if match is None:
+                # nothing but whitespace is left
+                line += buffer.count("\n", pos)
+                break
+
+            space, text = match.groups()
+            pos = match.end()
+            line += space.count("\n")
+            code: int | None = FIXED_CODES.get(text)
+            if code is None and (code := lexeme_code(text)) is None:
+                continue
+            # strings are the only lexemes that span lines
+            if code == STRING or code == INVALID:
+                line += text.count("\n")
+            yield make_token(code, text, line)
+            if code == EOF:
+                return
+
+        yield Token(TokenType.EOF, "", None, line)
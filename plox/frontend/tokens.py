@@ -1,6 +1,9 @@
-from typing import Any
+from typing import Any, Iterator, Optional
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass
 from enum import Enum, auto
+import re
 
 
 class TokenType(Enum):
@@ -22,6 +25,7 @@ class TokenType(Enum):
     OR = auto()
     TRUE = auto()
     FALSE = auto()
+    IMPORT = auto()
 
     # literals
     IDENTIFIER = auto()
@@ -56,7 +60,7 @@ class TokenType(Enum):
     INVALID = auto()
 
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     type: TokenType
     lexeme: str
@@ -84,5 +88,92 @@ keywords = {
     "or": TokenType.OR,
     "true": TokenType.TRUE,
     "false": TokenType.FALSE,
+    "import": TokenType.IMPORT,
     "nil": TokenType.NIL,
 }
+
+
+# a token type is stored in a `TokenStream` as its index in this list
+TOKEN_TYPES: list[TokenType] = list(TokenType)
+TOKEN_CODES: dict[TokenType, int] = {t: code for code, t in enumerate(TOKEN_TYPES)}
+EOF: int = TOKEN_CODES[TokenType.EOF]
+IDENTIFIER: int = TOKEN_CODES[TokenType.IDENTIFIER]
+NUMBER: int = TOKEN_CODES[TokenType.NUMBER]
+STRING: int = TOKEN_CODES[TokenType.STRING]
+INVALID: int = TOKEN_CODES[TokenType.INVALID]
+
+
+def make_token(code: int, lexeme: str, line: int) -> Token:
+    """The token of type `code` for `lexeme`, with its literal or error."""
+    if code == NUMBER:
+        return Token(TokenType.NUMBER, lexeme, float(lexeme), line)
+    if code == STRING:
+        return Token(TokenType.STRING, lexeme, lexeme[1:-1], line)
+    if code == INVALID:
+        meta: str = "unterminated string." if lexeme[0] == '"' else "undefined token"
+        return Token(TokenType.INVALID, lexeme, None, line, meta)
+    return Token(TOKEN_TYPES[code], lexeme, None, line)
+
+
+class TokenStream:
+    """
+    The tokens of one source in struct-of-arrays form: per token a type code
+    and the start and end offsets of its lexeme in the source. `Token`
+    objects, with their lexeme, literal and line, are only created when
+    indexed; lines come from an index of the newlines built on first use.
+    """
+
+    def __init__(self, source: str, codes: array, starts: array, ends: array) -> None:
+        self.source = source
+        self.codes = codes
+        self.starts = starts
+        self.ends = ends
+        self.__newlines: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> Token:
+        code: int = self.codes[index]
+        end: int = self.ends[index]
+        lexeme: str = self.source[self.starts[index] : end]
+        newlines: array = self.__index_newlines()
+        return make_token(code, lexeme, bisect_left(newlines, end) + 1)
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.codes)):
+            yield self[index]
+
+    def types(self) -> list[TokenType]:
+        return [TOKEN_TYPES[code] for code in self.codes]
+
+    def lexeme(self, index: int) -> str:
+        return self.source[self.starts[index] : self.ends[index]]
+
+    def line(self, index: int) -> int:
+        # a token is on the line where it ends, like multi-line strings
+        newlines: array = self.__index_newlines()
+        return bisect_left(newlines, self.ends[index]) + 1
+
+    def invalid(self) -> list[Token]:
+        return [self[i] for i, c in enumerate(self.codes) if c == INVALID]
+
+    def valid(self) -> "TokenStream":
+        """The stream without its INVALID tokens."""
+        if INVALID not in self.codes:
+            return self
+
+        keep: list[int] = [i for i, c in enumerate(self.codes) if c != INVALID]
+        return TokenStream(
+            self.source,
+            array(self.codes.typecode, (self.codes[i] for i in keep)),
+            array(self.starts.typecode, (self.starts[i] for i in keep)),
+            array(self.ends.typecode, (self.ends[i] for i in keep)),
+        )
+
+    def __index_newlines(self) -> array:
+        if self.__newlines is None:
+            self.__newlines = array(
+                "q", (m.start() for m in re.finditer("\n", self.source))
+            )
+        return self.__newlines
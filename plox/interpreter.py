@@ -1,22 +1,113 @@
 from pathlib import Path
 from sys import stderr
-import io
+from types import CodeType
+from typing import IO, Any, Callable, Iterable, Iterator, Optional, Protocol
+import time
 
 from plox.backend.visitors.eval.visitor import Eval
 from plox.backend.visitors.eval.runtime import RuntimeException, Context
+from plox.backend.visitors.eval.profiler import (
+    CallProfiler,
+    CallProfilingEval,
+    NodeStats,
+    ProfilingEval,
+    format_call_sites,
+    format_profile,
+)
+from plox.backend.visitors.eval.quicken import Quickening
+from plox.backend.vm.vm import VM
+from plox.backend.closure.compiler import ClosureEval
+from plox.backend.transpile.pyeval import PyEval
+from plox.cache import DiskCache, default_cache_dir, load_tree, store_tree
+from plox.modules import ModuleLoader
+from plox.backend.visitors.resolver import Resolver
+from plox.backend.optimize.optimizer import Optimizer
 from plox.frontend.parser import ParseException, Parser
-from plox.frontend.scanner import Scanner
-from plox.frontend.tokens import Token, TokenType
+from plox.frontend.scanner import Scanner, StreamScanner, scan
+from plox.frontend.tokens import Token, TokenStream, TokenType
+from plox.frontend.ast import Stmt
+
+
+class Backend(Protocol):
+    def run(self, stmts: list[Stmt]) -> None: ...
+
+
+BACKENDS: dict[str, Callable[[Context], Backend]] = {
+    "eval": Eval,
+    "vm": VM,
+    "closure": ClosureEval,
+    "python": PyEval,
+}
+
+
+SCANNERS: dict[str, Callable[[str], Iterable[Token]]] = {
+    "char": Scanner,
+    "regex": scan,
+}
 
 
 class Interpreter:
-    def __init__(self):
+    def __init__(
+        self,
+        backend: str = "eval",
+        cache: bool = True,
+        scanner: str = "regex",
+        profile: bool = False,
+        profile_calls: bool = False,
+        flamegraph: Optional[Path] = None,
+        stream: bool = False,
+        memo_size: Optional[int] = None,
+    ):
         self.errors: list[str] = []
         self.ctx = Context()
+        if memo_size is not None:
+            self.ctx.native_options = {"memo": {"max_size": memo_size}}
         self.had_errors: bool = False
+        self.backend = BACKENDS[backend]
+        self.profile = profile
+        # wall time per phase and, with the eval backend, per AST node class
+        self.phases: dict[str, float] = {}
+        self.nodes: dict[str, NodeStats] = {}
+        # binary expressions specialized and deoptimized by the eval backend
+        self.quickening = Quickening()
+        # the backend that ran the program, kept for the profile report
+        self.runner: Optional[Backend] = None
+        if profile and backend == "eval":
+            self.backend = lambda ctx: ProfilingEval(ctx, self.nodes, self.quickening)
+        # Lox calls per function and call stack, with the eval backend only
+        self.profile_calls = profile_calls or flamegraph is not None
+        if profile and self.profile_calls and backend == "eval":
+            raise ValueError("the eval backend cannot profile nodes and calls at once")
+        self.flamegraph = flamegraph
+        self.calls = CallProfiler()
+        if self.profile_calls and backend == "eval":
+            self.backend = lambda ctx: CallProfilingEval(ctx, self.calls)
+        self.scanner = SCANNERS[scanner]
+        # run each top-level declaration of a file as soon as it is parsed
+        self.stream = stream
+        self.cache: Optional[DiskCache] = (
+            DiskCache(default_cache_dir() / "code") if cache else None
+        )
+        self.tree_cache: Optional[DiskCache] = (
+            DiskCache(default_cache_dir() / "ast") if cache else None
+        )
+        # `import` paths are relative to the script, or to the working
+        # directory in interactive mode
+        self.ctx.modules = ModuleLoader(
+            Path.cwd(), self.tree_cache, self.ctx.native_options
+        )
 
     def run_interactively(self) -> None:
-        src = io.StringIO()
+        """
+        Each entered line is scanned on its own and its tokens are appended
+        to one long-lived parser, so earlier input is never scanned or parsed
+        again. Statements run as soon as they are complete, on a backend
+        that lives for the whole session.
+        """
+        pending: list[str] = []
+        parser: Parser = Parser(tokens=[])
+        backend: Backend = self.backend(self.ctx)
+        line_number: int = 0
         print("Enter '\\quit' to exit. ^.^")
         print("Enter '\\clean' to clean buffered lines. 0.0")
         print("Enter '\\lines' to print buffered lines. -_-")
@@ -24,64 +115,45 @@ class Interpreter:
         while True:
             try:
                 line = input("> ")
+                line_number += 1
                 if line.strip() == "":
                     continue
                 if line.strip() == "\\quit":
-                    for err in self.errors:
-                        stderr.write(err)
-                    src.seek(0)
-                    src.truncate()
-                    self.errors = []
                     break
                 if line.strip() == "\\clean":
-                    for err in self.errors:
-                        stderr.write(err)
-                    src.seek(0)
-                    src.truncate()
-                    self.errors = []
+                    pending = []
+                    parser = Parser(tokens=[])
                     continue
                 if line.strip() == "\\lines":
-                    print(src.getvalue())
+                    print("\n".join(pending))
                     continue
                 if line.strip() == "\\errors":
                     for err in self.errors:
                         stderr.write(err)
                     continue
-                src.write(line)
-
-                scanner: Scanner = Scanner(source=src.getvalue())
-                tokens: list[Token] = []
-                for token in scanner:
-                    if token.type == TokenType.INVALID:
-                        self.__error(token, token.meta)
-                        continue
-                    tokens.append(token)
-
-                parser: Parser = Parser(tokens=tokens)
-                stmts = parser.parse()
+
+                self.errors = []
+                pending.append(line)
+                parser.more_tokens(self.__scan_line(line, line_number))
+                stmts: list[Stmt] = parser.parse_complete()
+                if not parser.is_pending():
+                    pending = []
                 if len(parser.errors) != 0:
-                    self.errors = []
                     for err in parser.errors:
                         self.__error(token=err.token, message=err.message)
-                    src.write("\n")
-                    continue
+                    pending = []
+                    parser = Parser(tokens=[])
 
-                try:
-                    eval: Eval = Eval(self.ctx)
-                    for stmt in stmts:
-                        eval.execute(stmt=stmt)
-                except RuntimeException as e:
-                    self.__report(
-                        line=e.token.line,
-                        where=f"at '{e.token.lexeme}'",
-                        message=e.message,
-                    )
-                    for err in self.errors:
-                        stderr.write(err)
-                finally:
-                    src.seek(0)
-                    src.truncate()
-                    self.errors = []
+                resolver: Resolver = Resolver()
+                resolver.resolve(stmts)
+                for err in resolver.errors:
+                    self.__error(token=err.token, message=err.message)
+                if len(self.errors) == 0:
+                    stmts = Optimizer().optimize(stmts)
+                    self.__execute(lambda: backend.run(stmts))
+
+                for err in self.errors:
+                    stderr.write(err)
             except EOFError:
                 print("\nEnd of input. Exiting...")
                 break
@@ -93,10 +165,32 @@ class Interpreter:
 
     def run_file(self, filepath: Path) -> None:
         try:
+            self.ctx.modules = ModuleLoader(
+                filepath.resolve().parent, self.tree_cache, self.ctx.native_options
+            )
             with open(filepath, "r") as f:
-                text: str = f.read()
+                if self.stream:
+                    self.__run_stream(f)
+                else:
+                    self.__run(f.read())
+            if self.profile:
+                stderr.write(format_profile(self.phases, self.nodes))
+                if self.quickening.specialized:
+                    stderr.write("\n" + self.quickening.report())
+                if isinstance(runner := self.runner, Eval):
+                    calls: str = format_call_sites(runner.call_hits, runner.call_misses)
+                    stderr.write("\n" + calls)
+                # `memo` is only defined, and its module imported, once used
+                memo: Any = self.ctx.values.get("memo")
+                if memo is not None:
+                    from plox.backend.visitors.eval.native_funcs import Memo
 
-            self.__run(text)
+                    if isinstance(memo, Memo) and memo.memoized:
+                        stderr.write(memo.report())
+            if self.profile_calls:
+                stderr.write(self.calls.summary())
+            if self.flamegraph is not None:
+                self.flamegraph.write_text(self.calls.collapsed())
             if len(self.errors) != 0:
                 for err in self.errors:
                     stderr.write(err)
@@ -109,33 +203,138 @@ class Interpreter:
             stderr.write(f"unexpected error occured: {e}")
 
     def __run(self, source: str) -> None:
-        scanner: Scanner = Scanner(source=source)
+        if self.backend is PyEval:
+            return self.__run_python(source)
+
+        stmts: Optional[list[Stmt]] = self.__parse(source)
+        if stmts is None:
+            return
+        backend: Backend = self.backend(self.ctx)
+        self.runner = backend
+        self.__execute(lambda: self.__timed("exec", lambda: backend.run(stmts)))
+
+    def __run_stream(self, source: IO[str]) -> None:
+        """
+        Scans, parses, resolves, optimizes and runs one top-level declaration
+        at a time, dropping it once it has run, so output starts right away
+        and memory does not grow with the file. Unlike `__run`, declarations
+        before an error have already run when it is found; after it the rest
+        of the file is only parsed, to report its syntax errors. The caches,
+        which are keyed on the whole source, are not used.
+        """
+        parser: Parser = Parser(tokens=[])
+        resolver: Resolver = Resolver()
+        backend: Backend = self.backend(self.ctx)
+        self.runner = backend
+        for stmt in parser.parse_stream(self.__valid(StreamScanner(source))):
+            if len(self.errors) != 0 or len(parser.errors) != 0:
+                continue
+            resolver.resolve([stmt])
+            for err in resolver.errors:
+                self.__error(token=err.token, message=err.message)
+            if len(self.errors) == 0:
+                stmts: list[Stmt] = Optimizer().optimize([stmt])
+                self.__execute(lambda: backend.run(stmts))
+
+        for err in parser.errors:
+            self.__error(token=err.token, message=err.message)
+
+    def __valid(self, tokens: Iterable[Token]) -> Iterator[Token]:
+        for token in tokens:
+            if token.type == TokenType.INVALID:
+                self.__error(token, token.meta)
+                continue
+            yield token
+
+    def __run_python(self, source: str) -> None:
+        # a cached code object lets the whole front end be skipped
+        backend: PyEval = PyEval(self.ctx, cache=self.cache)
+        code: Optional[CodeType] = self.__timed(
+            "load-code", lambda: backend.load(source)
+        )
+        if code is None:
+            stmts: Optional[list[Stmt]] = self.__parse(source)
+            if stmts is None:
+                return
+            code = self.__timed("compile", lambda: backend.compile(stmts))
+            if len(self.errors) == 0:
+                backend.store(source, code)
+        self.__execute(lambda: self.__timed("exec", lambda: backend.execute(code)))
+
+    def __parse(self, source: str) -> Optional[list[Stmt]]:
+        stmts: Optional[list[Stmt]] = None
+        if (tree_cache := self.tree_cache) is not None:
+            stmts = self.__timed("load-tree", lambda: load_tree(tree_cache, source))
+        if stmts is None:
+            tokens: list[Token] | TokenStream = self.__timed(
+                "scan", lambda: self.__scan(source)
+            )
+            parser: Parser = Parser(tokens=tokens)
+            stmts = self.__timed("parse", parser.parse)
+            if len(parser.errors) != 0:
+                for err in parser.errors:
+                    self.__error(token=err.token, message=err.message)
+                for err in self.errors:
+                    stderr.write(err)
+                return None
+            if len(self.errors) == 0 and self.tree_cache is not None:
+                store_tree(self.tree_cache, source, stmts)
+
+        resolver: Resolver = Resolver()
+        self.__timed("resolve", lambda: resolver.resolve(stmts))
+        if len(resolver.errors) != 0:
+            for err in resolver.errors:
+                self.__error(token=err.token, message=err.message)
+            return None
+        return self.__timed("optimize", lambda: Optimizer().optimize(stmts))
+
+    def __scan_line(self, line: str, line_number: int) -> list[Token]:
+        tokens: list[Token] | TokenStream = self.__scan(line)
+        if isinstance(tokens, TokenStream):
+            tokens = list(tokens)
+        for token in tokens:
+            token.line = line_number
+        return tokens
+
+    def __scan(self, source: str) -> list[Token] | TokenStream:
+        scanned: Iterable[Token] = self.scanner(source)
+        if isinstance(scanned, TokenStream):
+            for token in scanned.invalid():
+                self.__error(token, token.meta)
+            return scanned.valid()
+
         tokens: list[Token] = []
-        for token in scanner:
+        for token in scanned:
             if token.type == TokenType.INVALID:
                 self.__error(token, token.meta)
                 continue
             tokens.append(token)
+        return tokens
 
-        parser: Parser = Parser(tokens=tokens)
-        stmts = parser.parse()
-        if len(parser.errors) != 0:
-            for err in parser.errors:
-                self.__error(token=err.token, message=err.message)
-            for err in self.errors:
-                stderr.write(err)
-            return
+    def __timed(self, phase: str, step: Callable[[], Any]) -> Any:
+        if not self.profile:
+            return step()
+        start: float = time.perf_counter()
+        try:
+            return step()
+        finally:
+            self.phases[phase] = time.perf_counter() - start
 
-        eval: Eval = Eval(self.ctx)
+    def __execute(self, run: Callable[[], None]) -> None:
         try:
-            for stmt in stmts:
-                eval.execute(stmt=stmt)
+            run()
         except RuntimeException as e:
             self.__report(
                 line=e.token.line,
                 where=f"at '{e.token.lexeme}'",
                 message=e.message,
             )
+        except RecursionError:
+            # only the vm backend keeps Lox frames off the Python stack
+            self.errors.append(
+                "Error: Stack overflow, calls are nested too deeply "
+                "(the vm backend is not limited by the Python stack).\n"
+            )
 
     def __error(self, token: Token, message: str) -> None:
         if token.type == TokenType.EOF:
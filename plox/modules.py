@@ -0,0 +1,223 @@
+from dataclasses import dataclass, fields
+from pathlib import Path
+from types import FunctionType
+from typing import Any, Iterable, Optional
+import pickle
+
+from plox.backend.natives import NATIVES
+from plox.backend.optimize.optimizer import Optimizer
+from plox.backend.visitors.eval.runtime import Context, LoxCallable, RuntimeException
+from plox.backend.visitors.resolver import Resolver
+from plox.cache import DiskCache, default_cache_dir, load_tree, store_tree
+from plox.frontend.ast import AssignExpr, Expr, FunctionStmt, Stmt, VarStmt
+from plox.frontend.parser import Parser
+from plox.frontend.scanner import scan
+from plox.frontend.tokens import Token, TokenStream, TokenType
+
+
+@dataclass
+class Module:
+    path: Path
+    # modification time of the file the module was run from
+    mtime: int
+    # `None` while the module itself is still running
+    exports: Optional[dict[str, Any]]
+
+
+@dataclass
+class ModuleTree:
+    # modification time of the file the tree was parsed from
+    mtime: int
+    # resolved and optimized, pickled before any program ran it: backends
+    # annotate the nodes they run, with call site caches and quickening
+    data: bytes
+
+
+class ModuleFunction(LoxCallable):
+    """
+    A function exported by a module. It is called on the backend that ran
+    the module, so its body sees the module's globals, not the importer's.
+    """
+
+    def __init__(self, function: Any, backend: Any) -> None:
+        self.function = function
+        self.backend = backend
+
+    def arity(self) -> int:
+        if type(self.function) is FunctionType:
+            return self.function.__code__.co_argcount
+        return self.function.arity()
+
+    def call(self, eval: Any, args: list[Any]) -> Any:
+        # the python backend's functions are plain Python functions
+        if type(self.function) is FunctionType:
+            return self.function(*args)
+        return self.function.call(self.backend, args)
+
+    def __str__(self) -> str:
+        if type(self.function) is FunctionType:
+            return f"<fn {self.function.__qualname__}>"
+        return str(self.function)
+
+
+# trees of the modules imported in this process, by resolved path; every
+# program runs a copy of its own
+TREES: dict[Path, ModuleTree] = {}
+
+
+class ModuleLoader:
+    """
+    Runs the `import` statements of one program, resolving paths against the
+    directory of its file. A module runs once per program, in globals of its
+    own; importing it again, until its file is modified, only defines the
+    bindings it exported in the importer's globals. The importer gets copies,
+    so a module exports its functions and the globals that none of its
+    functions assign, which cannot go out of date; the others stay private
+    to it. Every program runs its modules afresh, but a module is parsed
+    once per process, and through the same on-disk tree cache as scripts, so
+    later runs do not parse it again either.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        tree_cache: Optional[DiskCache],
+        native_options: Optional[dict[str, dict[str, Any]]] = None,
+        modules: Optional[dict[tuple[type, Path], Module]] = None,
+    ) -> None:
+        self.directory = directory
+        self.tree_cache = tree_cache
+        # modules are configured like the program importing them
+        self.native_options = native_options if native_options is not None else {}
+        # modules the program ran, by the class of the backend that ran them
+        # and their resolved path; shared with the loaders of its modules
+        self.modules: dict[tuple[type, Path], Module] = (
+            modules if modules is not None else {}
+        )
+
+    def load(self, backend: type, keyword: Token, path: str) -> dict[str, Any]:
+        resolved: Path = (self.directory / path).resolve()
+        try:
+            mtime: int = resolved.stat().st_mtime_ns
+        except OSError:
+            raise RuntimeException(keyword, f"Cannot import '{path}', no such file.")
+
+        key: tuple[type, Path] = (backend, resolved)
+        module: Optional[Module] = self.modules.get(key)
+        if module is not None and module.mtime == mtime:
+            if module.exports is None:
+                raise RuntimeException(
+                    keyword, f"Cannot import '{path}', it imports itself."
+                )
+            return module.exports
+
+        self.modules[key] = Module(resolved, mtime, None)
+        try:
+            stmts: list[Stmt] = self.__tree(keyword, path, resolved, mtime)
+            exports: dict[str, Any] = self.__run(backend, resolved, stmts)
+        except BaseException:
+            del self.modules[key]
+            raise
+        self.modules[key] = Module(resolved, mtime, exports)
+        return exports
+
+    def __tree(
+        self, keyword: Token, path: str, resolved: Path, mtime: int
+    ) -> list[Stmt]:
+        tree: Optional[ModuleTree] = TREES.get(resolved)
+        if tree is not None and tree.mtime == mtime:
+            return pickle.loads(tree.data)
+        try:
+            source: str = resolved.read_text()
+        except OSError as e:
+            raise RuntimeException(keyword, f"Cannot import '{path}', {e.strerror}.")
+        stmts: list[Stmt] = self.__parse(keyword, path, source)
+        data: bytes = pickle.dumps(stmts, protocol=pickle.HIGHEST_PROTOCOL)
+        TREES[resolved] = ModuleTree(mtime, data)
+        return stmts
+
+    def __run(self, backend: type, resolved: Path, stmts: list[Stmt]) -> dict[str, Any]:
+        ctx: Context = Context()
+        ctx.native_options = self.native_options
+        ctx.modules = ModuleLoader(
+            resolved.parent, self.tree_cache, self.native_options, self.modules
+        )
+        runner: Any = backend(ctx)
+        runner.run(stmts)
+        private: set[str] = assigned_in_functions(stmts)
+        # what the module declared or imported, not the natives it used
+        declared: set[str] = {
+            stmt.name.lexeme
+            for stmt in stmts
+            if isinstance(stmt, (VarStmt, FunctionStmt))
+        }
+        exports: dict[str, Any] = {}
+        for name, value in ctx.values.items():
+            if (name in NATIVES and name not in declared) or name in private:
+                continue
+            if isinstance(value, ModuleFunction) or not (
+                isinstance(value, LoxCallable) or type(value) is FunctionType
+            ):
+                exports[name] = value
+            else:
+                exports[name] = ModuleFunction(value, runner)
+        return exports
+
+    def __parse(self, keyword: Token, path: str, source: str) -> list[Stmt]:
+        stmts: Optional[list[Stmt]] = None
+        if self.tree_cache is not None:
+            stmts = load_tree(self.tree_cache, source)
+        if stmts is None:
+            tokens: TokenStream = scan(source)
+            self.__check(keyword, path, tokens.invalid())
+            parser: Parser = Parser(tokens=tokens.valid())
+            stmts = parser.parse()
+            self.__check(keyword, path, parser.errors)
+            if self.tree_cache is not None:
+                store_tree(self.tree_cache, source, stmts)
+
+        resolver: Resolver = Resolver()
+        resolver.resolve(stmts)
+        self.__check(keyword, path, resolver.errors)
+        return Optimizer().optimize(stmts)
+
+    def __check(self, keyword: Token, path: str, errors: Iterable[Any]) -> None:
+        # scanner errors are invalid tokens, the others carry a token
+        for error in errors:
+            token: Token = error if isinstance(error, Token) else error.token
+            message: str = token.meta if isinstance(error, Token) else error.message
+            where: str = "end" if token.type == TokenType.EOF else f"'{token.lexeme}'"
+            raise RuntimeException(
+                keyword,
+                f"Cannot import '{path}', [line {token.line}] Error at {where}: {message}",
+            )
+
+
+def assigned_in_functions(stmts: list[Stmt]) -> set[str]:
+    """Globals assigned in the body of a function declared in `stmts`."""
+    names: set[str] = set()
+    pending: list[tuple[Any, bool]] = [(stmt, False) for stmt in stmts]
+    while pending:
+        node, in_function = pending.pop()
+        if isinstance(node, list):
+            pending.extend((child, in_function) for child in node)
+        elif isinstance(node, (Expr, Stmt)):
+            # unresolved names are globals
+            if in_function and isinstance(node, AssignExpr) and node.depth == -1:
+                names.add(node.name.lexeme)
+            in_function = in_function or isinstance(node, FunctionStmt)
+            pending.extend((getattr(node, f.name), in_function) for f in fields(node))
+    return names
+
+
+def import_module(backend: Any, keyword: Token, path: str) -> None:
+    """
+    Runs `import path;` for `backend`, defining what the module exports in
+    the backend's globals.
+    """
+    ctx: Context = backend.globals
+    if ctx.modules is None:
+        ctx.modules = ModuleLoader(
+            Path.cwd(), DiskCache(default_cache_dir() / "ast"), ctx.native_options
+        )
+    ctx.values.update(ctx.modules.load(type(backend), keyword, path))
@@ -0,0 +1,37 @@
+import io
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from plox import interpreter
+from plox.interpreter import Interpreter
+
+
+@pytest.fixture(autouse=True)
+def cache_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """The on-disk caches, kept out of the user's cache directory."""
+    monkeypatch.setenv("PLOX_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def errors(monkeypatch: pytest.MonkeyPatch) -> io.StringIO:
+    """What the interpreter reports on stderr."""
+    err = io.StringIO()
+    monkeypatch.setattr(interpreter, "stderr", err)
+    return err
+
+
+@pytest.fixture
+def run_file(tmp_path: Path) -> Callable[..., Interpreter]:
+    """Runs a source as `script.lox` in `tmp_path`, options go to `Interpreter`."""
+
+    def run(source: str, **options: Any) -> Interpreter:
+        script: Path = tmp_path / "script.lox"
+        script.write_text(source)
+        lox: Interpreter = Interpreter(**options)
+        lox.run_file(script)
+        return lox
+
+    return run
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+
+from plox.batch import ScriptResult, run_batch, summary
+
+
+def scripts(tmp_path: Path) -> list[Path]:
+    sources: list[str] = [
+        "var shared = 1; print shared;",
+        "print shared;",
+        'fun f(n) { return n * 2; } print f(21); print "done";',
+        "print ;",
+    ]
+    paths: list[Path] = []
+    for index, source in enumerate(sources):
+        path: Path = tmp_path / f"script{index}.lox"
+        path.write_text(source)
+        paths.append(path)
+    return paths
+
+
+class TestBatch:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_results_in_input_order(self, tmp_path: Path, workers: int) -> None:
+        paths: list[Path] = scripts(tmp_path)
+        results: list[ScriptResult] = run_batch(
+            paths + paths[::-1], workers=workers, cache=False
+        )
+        assert [result.path for result in results] == paths + paths[::-1]
+
+        first, second, third, fourth = results[:4]
+        assert (first.output, first.errors, first.status) == ("1\n", "", 0)
+        # every script starts from fresh globals
+        assert second.output == ""
+        assert (
+            second.errors
+            == "[line 1] Error at 'shared': Undefined variable 'shared'.\n"
+        )
+        assert second.status == 65
+        assert (third.output, third.status) == ("42\ndone\n", 0)
+        assert fourth.errors.startswith("[line 1] Error at ';': Expect expression.\n")
+        assert fourth.status == 65
+        assert [r.output for r in results[4:]] == [r.output for r in results[3::-1]]
+
+    def test_backend_option(self, tmp_path: Path) -> None:
+        paths: list[Path] = scripts(tmp_path)[2:3]
+        for backend in ["eval", "vm", "closure", "python"]:
+            (result,) = run_batch(paths, backend=backend, cache=False)
+            assert result.output == "42\ndone\n"
+
+    def test_summary(self, tmp_path: Path) -> None:
+        results: list[ScriptResult] = run_batch(
+            scripts(tmp_path), workers=1, cache=False
+        )
+        lines: list[str] = summary(results, 0.5).splitlines()
+        assert lines[0] == "4 scripts, 2 failed, 0.50s, 8.0 scripts/s"
+        assert lines[1].startswith("latency ms: p50 ")
+        assert "max" in lines[1]
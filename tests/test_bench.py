@@ -0,0 +1,35 @@
+import pytest
+
+from bench import suite
+from plox.interpreter import BACKENDS, Interpreter
+
+
+class TestSuite:
+    @pytest.mark.parametrize("name", suite.programs().keys())
+    def test_programs_agree_across_backends(
+        self, name: str, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        timings = suite.run_once(suite.programs()[name], "eval", "char")
+        assert list(timings) == suite.PHASES
+
+        outputs: set[str] = set()
+        for backend in BACKENDS:
+            Interpreter(backend=backend, cache=False).run_file(
+                suite.PROGRAMS_DIR / f"{name}.lox"
+            )
+            outputs.add(capsys.readouterr().out)
+        assert len(outputs) == 1 and "" not in outputs
+
+    def test_compare(self) -> None:
+        baseline = {"programs": {"fib": {"scan": 0.01, "exec": 1.0}}}
+        results = {
+            "programs": {
+                "fib": {"scan": 0.013, "exec": 1.05},
+                "new": {"scan": 1.0, "exec": 1.0},
+            }
+        }
+        assert suite.compare(results, baseline, 0.10) == [
+            "fib scan: 10.0ms -> 13.0ms (+30%, allowed +10%)"
+        ]
+        assert suite.compare(results, baseline, 0.10, {"scan": 0.5}) == []
+        assert suite.compare(results, baseline, 0.01) != []
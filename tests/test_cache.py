@@ -0,0 +1,104 @@
+import io
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+from plox import cache, interpreter
+from plox.interpreter import Interpreter
+from plox.frontend.scanner import scan
+
+PROGRAM = """var greeting = "hi";
+fun twice(s) { return s + s; }
+{
+    var local = twice(greeting);
+    print local;
+}
+"""
+
+
+@pytest.fixture
+def cache_dir(cache_root: Path) -> Path:
+    return cache_root / "ast"
+
+
+@pytest.fixture
+def scans(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    sources: list[str] = []
+
+    def counting(source: str) -> Any:
+        sources.append(source)
+        return scan(source)
+
+    monkeypatch.setitem(interpreter.SCANNERS, "regex", counting)
+    return sources
+
+
+class TestTreeCache:
+    def test_second_run_skips_front_end(
+        self,
+        run_file: Callable[..., Interpreter],
+        cache_dir: Path,
+        scans: list[str],
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        run_file(PROGRAM)
+        run_file(PROGRAM)
+        assert capsys.readouterr().out == "hihi\n" * 2
+        assert len(scans) == 1
+        assert len(list(cache_dir.iterdir())) == 1
+
+    def test_invalidation(
+        self,
+        run_file: Callable[..., Interpreter],
+        cache_dir: Path,
+        scans: list[str],
+        capsys: pytest.CaptureFixture[str],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        run_file("print 1;")
+        run_file("print 2;")
+        assert len(scans) == 2
+
+        monkeypatch.setattr(cache, "__version__", "0.0.0-other")
+        run_file("print 2;")
+        assert len(scans) == 3
+        assert capsys.readouterr().out == "1\n2\n2\n"
+        assert len(list(cache_dir.iterdir())) == 3
+
+    def test_corrupted_entry_is_replaced(
+        self,
+        run_file: Callable[..., Interpreter],
+        cache_dir: Path,
+        scans: list[str],
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        run_file(PROGRAM)
+        entry: Path = next(cache_dir.iterdir())
+        for garbage in [b"", b"not zlib", entry.read_bytes()[:-10]]:
+            entry.write_bytes(garbage)
+            run_file(PROGRAM)
+        assert capsys.readouterr().out == "hihi\n" * 4
+        assert len(scans) == 4
+
+        run_file(PROGRAM)
+        assert len(scans) == 4
+
+    def test_errors_are_not_cached(
+        self,
+        run_file: Callable[..., Interpreter],
+        cache_dir: Path,
+        capsys: pytest.CaptureFixture[str],
+        errors: io.StringIO,
+    ) -> None:
+        for source in ["print ;", "print 1; @"]:
+            with pytest.raises(SystemExit):
+                run_file(source)
+        capsys.readouterr()
+        assert not cache_dir.exists() or list(cache_dir.iterdir()) == []
+
+    def test_disabled(
+        self, run_file: Callable[..., Interpreter], cache_dir: Path
+    ) -> None:
+        run_file("var a = 1;", cache=False)
+        assert not cache_dir.exists()
@@ -0,0 +1,403 @@
+import pytest
+
+from plox.backend.visitors.eval.runtime import (
+    ROPE_THRESHOLD,
+    Context,
+    Rope,
+    RuntimeException,
+    concat,
+)
+from plox.backend.visitors.eval.quicken import GenericBinaryExpr
+from plox.backend.visitors.eval.visitor import Eval
+from plox.backend.visitors.resolver import Resolver
+from plox.frontend.ast import BlockStmt, FunctionStmt, ReturnStmt
+from plox.frontend.parser import Parser
+from plox.frontend.scanner import Scanner
+from plox.interpreter import BACKENDS, Backend
+
+
+def run(source: str, backend: Backend | None = None) -> Backend:
+    parser: Parser = Parser(tokens=list(Scanner(source)))
+    stmts = parser.parse()
+    assert parser.errors == []
+    resolver: Resolver = Resolver()
+    resolver.resolve(stmts)
+    assert resolver.errors == []
+    backend = backend if backend is not None else Eval()
+    backend.run(stmts)
+    return backend
+
+
+@pytest.fixture(params=BACKENDS.keys())
+def backend(request: pytest.FixtureRequest) -> Backend:
+    return BACKENDS[request.param](Context())
+
+
+class TestBackends:
+    def test_block_scoping(
+        self, backend: Backend, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run(
+            """var a = "global";
+{
+    var a = "outer";
+    {
+        var a = "inner";
+        print a;
+    }
+    print a;
+}
+print a;
+""",
+            backend,
+        )
+        assert capsys.readouterr().out == "inner\nouter\nglobal\n"
+
+    def test_assign_through_blocks(
+        self, backend: Backend, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run(
+            """var total = 0;
+for (var i = 0; i < 5; i = i + 1) {
+    total = total + i;
+}
+print total;
+""",
+            backend,
+        )
+        assert capsys.readouterr().out == "10\n"
+
+    def test_recursion(
+        self, backend: Backend, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run(
+            """fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+print fib(15);
+""",
+            backend,
+        )
+        assert capsys.readouterr().out == "610\n"
+
+    def test_return_from_nested_statements(
+        self, backend: Backend, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run(
+            """var x = "global";
+fun find(limit) {
+    var i = 0;
+    while (true) {
+        {
+            var x = i;
+            if (x == limit) {
+                { return x; }
+            }
+        }
+        i = i + 1;
+    }
+    print "unreachable";
+}
+fun none() { if (false) return 1; }
+print find(3);
+print none();
+print x;
+""",
+            backend,
+        )
+        assert capsys.readouterr().out == "3\nnil\nglobal\n"
+
+    def test_closures(
+        self, backend: Backend, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run(
+            """fun makeCounter() {
+    var count = 0;
+    fun counter() {
+        count = count + 1;
+        print count;
+    }
+    return counter;
+}
+var counter = makeCounter();
+counter();
+counter();
+""",
+            backend,
+        )
+        assert capsys.readouterr().out == "1\n2\n"
+
+    def test_closure_binds_at_declaration(
+        self, backend: Backend, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run(
+            """var a = "global";
+{
+    fun show() {
+        print a;
+    }
+    show();
+    var a = "block";
+    show();
+}
+""",
+            backend,
+        )
+        assert capsys.readouterr().out == "global\nglobal\n"
+
+    def test_closures_capture_per_iteration(
+        self, backend: Backend, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run(
+            """var first;
+var second;
+for (var i = 0; i < 2; i = i + 1) {
+    var j = i;
+    fun show() {
+        print j;
+    }
+    if (first == nil) first = show; else second = show;
+}
+first();
+second();
+""",
+            backend,
+        )
+        assert capsys.readouterr().out == "0\n1\n"
+
+    def test_operators(
+        self, backend: Backend, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run(
+            """print 1 + 2 * 3 - 4 / 2;
+print "con" + "cat";
+if (!nil) print "negated";
+print nil or "default";
+print false and 1 or "short-circuit";
+if (1 == 1 and 2 != 3) print "equality";
+if (-(3 - 5) >= 2) print "comparison";
+fun f() {}
+print f;
+print f();
+""",
+            backend,
+        )
+        assert capsys.readouterr().out == (
+            "5\nconcat\nnegated\ndefault\nshort-circuit\nequality\ncomparison\n"
+            "<fn f>\nnil\n"
+        )
+
+    def test_string_building(
+        self, backend: Backend, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run(
+            """var s = "";
+for (var i = 0; i < 200; i = i + 1) s = s + "ab";
+var t = s + "!";
+var u = s + "?";
+print t == u;
+print t == s + "!";
+print "" + s == s and s != nil and s != 400;
+print s;
+""",
+            backend,
+        )
+        assert capsys.readouterr().out == "False\nTrue\nTrue\n" + "ab" * 200 + "\n"
+
+        with pytest.raises(RuntimeException) as e:
+            run(
+                'var s = "";\nfor (var i = 0; i < 200; i = i + 1) s = s + "ab";\ns + 1;',
+                backend,
+            )
+        assert e.value.message == "Operands must be two numbers or two strings."
+
+    def test_runtime_errors(self, backend: Backend) -> None:
+        srcs: list[str] = [
+            '1 + "a";',
+            "-nil;",
+            "print undefined;",
+            '"not callable"();',
+            "fun f(a) {} f();",
+        ]
+        messages: list[str] = [
+            "Operands must be two numbers or two strings.",
+            "operand must be a number.",
+            "Undefined variable 'undefined'.",
+            "Can only call functions and classes.",
+            "Expected 1 arguments got 0.",
+        ]
+
+        for src, message in zip(srcs, messages):
+            with pytest.raises(RuntimeException) as e:
+                run(src, backend)
+            assert e.value.message == message
+
+
+class TestTailCalls:
+    PROGRAM = """fun loop(n, acc) {
+    if (n == 0) return acc;
+    return loop(n - 1, acc + 1);
+}
+fun isEven(n) { if (n == 0) return true; return isOdd(n - 1); }
+fun isOdd(n) { if (n == 0) return false; return isEven(n - 1); }
+fun make(n) {
+    var x = n;
+    fun get() { return x; }
+    return id(get);
+}
+fun id(f) { return f; }
+print loop(100000, 0);
+print isEven(100001);
+var get = make(5);
+print get();
+print id(clock) == clock;
+"""
+
+    @pytest.mark.parametrize("name", ["eval", "vm"])
+    def test_deep_tail_recursion(
+        self, name: str, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run(self.PROGRAM, BACKENDS[name](Context()))
+        assert capsys.readouterr().out == "100000\nFalse\n5\nTrue\n"
+
+    @pytest.mark.parametrize("name", ["eval", "vm"])
+    def test_tail_call_arity(self, name: str) -> None:
+        with pytest.raises(RuntimeException) as e:
+            run("fun f(a) { return f(); } f(1);", BACKENDS[name](Context()))
+        assert e.value.message == "Expected 1 arguments got 0."
+
+    def test_deep_recursion_on_vm(self, capsys: pytest.CaptureFixture[str]) -> None:
+        run(
+            """fun sum(n) {
+    if (n == 0) return 0;
+    return n + sum(n - 1);
+}
+print sum(100000);
+""",
+            BACKENDS["vm"](Context()),
+        )
+        assert capsys.readouterr().out == "5000050000\n"
+
+
+class TestEval:
+    def test_block_entry_links_parent(self) -> None:
+        globals_ctx = Context()
+        eval: Eval = Eval(globals_ctx)
+        run("var x = 1;", eval)
+        entered: list[Context] = []
+
+        def spy(stmts, ctx: Context) -> None:
+            entered.append(ctx)
+
+        eval.exec_block = spy  # type: ignore[method-assign]
+        run("fun f() { } f();", eval)
+
+        assert eval.ctx is globals_ctx
+        assert len(entered) == 1
+        assert entered[0].parent is globals_ctx
+        assert entered[0].values == {}
+        assert entered[0].slots == []
+
+    def test_call_site_cache(self, capsys: pytest.CaptureFixture[str]) -> None:
+        eval: Eval = run(
+            """fun one() { return 1; }
+fun two() { return 2; }
+var f = one;
+for (var i = 0; i < 3; i = i + 1) {
+    print f();
+    f = two;
+}
+""",
+        )
+        assert capsys.readouterr().out == "1\n2\n2\n"
+        # the call site misses once for `one` and once after rebinding `f`
+        assert (eval.call_hits, eval.call_misses) == (1, 2)
+
+        with pytest.raises(RuntimeException) as e:
+            run("fun f(a) {} var g = f; for (;;) { g(1); g = nil; }", eval)
+        assert e.value.message == "Can only call functions and classes."
+
+    def test_call_site_cache_rechecks_arity(self) -> None:
+        with pytest.raises(RuntimeException) as e:
+            run(
+                """fun one(a) {}
+fun two(a, b) {}
+var f = one;
+for (var i = 0; i < 2; i = i + 1) { f(i); f = two; }
+"""
+            )
+        assert e.value.message == "Expected 2 arguments got 1."
+
+
+class TestQuickening:
+    PROGRAM = """fun add(a, b) { return a + b; }
+var total = 0;
+for (var i = 0; i < 3; i = i + 1) total = add(total, i * 2);
+print total;
+print add("a", "b");
+print add(1, 2);
+print 1 == 1;
+"""
+
+    def test_specialize_and_deoptimize(
+        self, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        stmts = Parser(tokens=list(Scanner(self.PROGRAM))).parse()
+        Resolver().resolve(stmts)
+        eval: Eval = Eval()
+        eval.run(stmts)
+        assert capsys.readouterr().out == "6\nab\n3\nTrue\n"
+
+        func = stmts[0]
+        assert isinstance(func, FunctionStmt)
+        assert isinstance(func.body, BlockStmt)
+        (ret,) = func.body.statements
+        assert isinstance(ret, ReturnStmt)
+        # numbers first, then strings: specialized once, then generic
+        assert type(ret.value) is GenericBinaryExpr
+        assert eval.quickening.specialized == {"NumAdd": 2, "NumLt": 1, "NumMul": 1}
+        assert eval.quickening.deoptimized == {"NumAdd": 1}
+        assert "NumAdd                    2          1" in eval.quickening.report()
+
+    def test_recursion_quickens_once(self, capsys: pytest.CaptureFixture[str]) -> None:
+        eval: Eval = run(
+            """fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+print fib(10);
+""",
+        )
+        assert capsys.readouterr().out == "55\n"
+        # one node per operator, though the `+` finishes in every activation
+        assert eval.quickening.specialized == {"NumAdd": 1, "NumLt": 1, "NumSub": 2}
+
+    def test_errors_after_deoptimizing(self) -> None:
+        eval: Eval = run("fun sub(a, b) { return a - b; } sub(2, 1); sub(4, 3);")
+        with pytest.raises(RuntimeException) as e:
+            run('sub(1, "a");', eval)
+        assert e.value.message == "operands must be numbers."
+        assert eval.quickening.deoptimized == {"NumSub": 1}
+
+
+class TestRope:
+    def test_concat(self) -> None:
+        assert concat("a", "b") == "ab"
+        long: str = "x" * ROPE_THRESHOLD
+        rope = concat(long, "y")
+        assert type(rope) is Rope and len(rope) == ROPE_THRESHOLD + 1
+        assert concat("a", rope) == "a" + long + "y"
+
+        # ropes made from the same rope do not see each other's pieces
+        first = concat(rope, "1")
+        second = concat(rope, "2")
+        third = concat(first, "3")
+        assert (str(first), str(second), str(third)) == (
+            long + "y1",
+            long + "y2",
+            long + "y13",
+        )
+        assert str(rope) == long + "y"
+        assert hash(first) == hash(long + "y1") and first != second
+        assert {first: 1}[long + "y1"] == 1
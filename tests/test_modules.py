@@ -0,0 +1,191 @@
+import gc
+import io
+import os
+import weakref
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from plox import modules
+from plox.batch import ScriptResult, run_batch
+from plox.interpreter import BACKENDS, Interpreter
+
+LIB = """print "loading lib";
+var count = 0;
+fun square(x) { return x * x; }
+fun bump() { count = count + 1; return count; }
+"""
+
+
+@pytest.fixture(autouse=True)
+def isolated(
+    tmp_path: Path, errors: io.StringIO, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(modules, "TREES", {})
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "lib.lox").write_text(LIB)
+
+
+class TestModules:
+    @pytest.mark.parametrize("backend", BACKENDS.keys())
+    def test_import(
+        self,
+        tmp_path: Path,
+        run_file: Callable[..., Interpreter],
+        backend: str,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        (tmp_path / "lib" / "util.lox").write_text(
+            'import "lib.lox";\nfun cube(x) { return square(x) * x; }\n'
+        )
+        run_file(
+            """import "lib/lib.lox";
+import "lib/util.lox";
+var count = 10;
+print cube(2);
+print bump();
+print bump();
+print count;
+print square;
+""",
+            backend=backend,
+        )
+        # functions see the globals of their module, not the importer's
+        assert capsys.readouterr().out == "loading lib\n8\n1\n2\n10\n<fn square>\n"
+
+    @pytest.mark.parametrize("backend", BACKENDS.keys())
+    def test_exports_cannot_go_stale(
+        self,
+        tmp_path: Path,
+        backend: str,
+        run_file: Callable[..., Interpreter],
+        errors: io.StringIO,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        (tmp_path / "m.lox").write_text(
+            "var count = 0;\nvar step = 2;\n"
+            "fun bump() { count = count + step; return count; }\n"
+        )
+        with pytest.raises(SystemExit):
+            run_file(
+                'import "m.lox";\nprint bump();\nprint step;\nprint count;\n',
+                backend=backend,
+            )
+        # `bump` assigns `count`, an importer's copy would not follow it
+        assert capsys.readouterr().out == "2\n2\n"
+        assert errors.getvalue() == (
+            "[line 4] Error at 'count': Undefined variable 'count'.\n"
+        )
+
+    def test_parsed_once_per_process(
+        self,
+        tmp_path: Path,
+        run_file: Callable[..., Interpreter],
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        lib: Path = tmp_path / "lib" / "lib.lox"
+        run_file('import "lib/lib.lox"; print square(3);')
+
+        def fail(*args, **kwargs):
+            raise AssertionError("module was parsed again")
+
+        with monkeypatch.context() as patched:
+            patched.setattr(modules, "scan", fail)
+            patched.setattr(modules, "load_tree", fail)
+            run_file('import "lib/lib.lox"; print square(4);')
+        # but every program runs it
+        assert capsys.readouterr().out == "loading lib\n9\nloading lib\n16\n"
+
+        lib.write_text(LIB.replace("x * x", "x + x"))
+        os.utime(lib, ns=(0, lib.stat().st_mtime_ns + 1_000_000))
+        run_file('import "lib/lib.lox"; print square(4);')
+        assert capsys.readouterr().out == "loading lib\n8\n"
+
+    def test_trees_keep_no_runtime_state(
+        self,
+        tmp_path: Path,
+        run_file: Callable[..., Interpreter],
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        (tmp_path / "lib" / "util.lox").write_text(
+            'import "lib.lox";\nfun cube(x) { return square(x) * x; }\n'
+        )
+        source: str = 'import "lib/util.lox"; print cube(2);'
+        lox: Interpreter = run_file(source)
+        # `cube`'s call site cached the program's `square`
+        square = weakref.ref(lox.ctx.values["square"].function)
+        del lox
+        gc.collect()
+        assert square() is None
+
+        run_file(source)
+        assert capsys.readouterr().out == "loading lib\n8\n" * 2
+
+    @pytest.mark.parametrize("backend", BACKENDS.keys())
+    def test_state_not_shared_between_scripts(
+        self, tmp_path: Path, backend: str
+    ) -> None:
+        (tmp_path / "m.lox").write_text(
+            "var count = 0;\nfun inc() { count = count + 1; return count; }\n"
+        )
+        paths: list[Path] = []
+        for name in ["a", "b"]:
+            paths.append(tmp_path / f"{name}.lox")
+            paths[-1].write_text('import "m.lox";\nprint inc();\n')
+        results: list[ScriptResult] = run_batch(
+            paths, workers=1, backend=backend, cache=False
+        )
+        assert [result.output for result in results] == ["1\n", "1\n"]
+
+    def test_later_runs_skip_parsing(
+        self,
+        run_file: Callable[..., Interpreter],
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        run_file('import "lib/lib.lox"; print square(3);')
+        monkeypatch.setattr(modules, "TREES", {})
+
+        def fail(*args, **kwargs):
+            raise AssertionError("module was parsed again")
+
+        monkeypatch.setattr(modules, "scan", fail)
+        run_file('import "lib/lib.lox"; print square(3);')
+        assert capsys.readouterr().out == "loading lib\n9\n" * 2
+
+    def test_errors(
+        self,
+        tmp_path: Path,
+        run_file: Callable[..., Interpreter],
+        errors: io.StringIO,
+    ) -> None:
+        (tmp_path / "bad.lox").write_text("var x = ;")
+        (tmp_path / "self.lox").write_text('import "self.lox";')
+        cases: list[tuple[str, str]] = [
+            (
+                'import "missing.lox";',
+                "[line 1] Error at 'import': Cannot import 'missing.lox', no such file.\n",
+            ),
+            (
+                'import "bad.lox";',
+                "[line 1] Error at 'import': Cannot import 'bad.lox', "
+                "[line 1] Error at ';': Expect expression.\n",
+            ),
+            (
+                'import "self.lox";',
+                "[line 1] Error at 'import': Cannot import 'self.lox', "
+                "it imports itself.\n",
+            ),
+            (
+                '{\n  import "lib/lib.lox";\n}',
+                "[line 2] Error at 'import': Can only import at top level.\n",
+            ),
+        ]
+        for source, message in cases:
+            with pytest.raises(SystemExit):
+                run_file(source)
+            assert errors.getvalue() == message, source
+            errors.truncate(0)
+            errors.seek(0)
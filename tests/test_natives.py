@@ -0,0 +1,181 @@
+import io
+from typing import Callable
+
+import pytest
+
+from plox.backend import natives
+
+from plox.backend.visitors.eval.native_funcs import MEMO_SIZE, Memo, MemoFunction
+from plox.backend.visitors.eval.profiler import CallProfilingEval
+from plox.backend.visitors.eval.runtime import Context, RuntimeException
+from plox.backend.visitors.eval.visitor import Eval
+from plox.backend.visitors.resolver import Resolver
+from plox.frontend.parser import Parser
+from plox.frontend.scanner import Scanner
+from plox.interpreter import BACKENDS, Backend, Interpreter
+
+
+def run(source: str, backend: Backend) -> None:
+    parser: Parser = Parser(tokens=list(Scanner(source)))
+    stmts = parser.parse()
+    assert parser.errors == []
+    Resolver().resolve(stmts)
+    backend.run(stmts)
+
+
+class TestMemo:
+    @pytest.mark.parametrize("name", ["eval", "closure"])
+    def test_memoized_recursion(
+        self, name: str, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        ctx: Context = Context()
+        run(
+            """fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+fib = memo(fib);
+print fib(60);
+print fib(60);
+""",
+            BACKENDS[name](ctx),
+        )
+        assert capsys.readouterr().out == "1548008755920\n" * 2
+
+        fib = ctx.values["fib"]
+        assert isinstance(fib, MemoFunction)
+        assert (fib.hits, fib.misses) == (59, 61)
+        assert ctx.values["memo"].memoized == [fib]
+
+    def test_lru_eviction(self, capsys: pytest.CaptureFixture[str]) -> None:
+        eval: Eval = Eval()
+        eval.globals.define("memo", Memo(max_size=2))
+        run(
+            """fun id(x) { return x; }
+var f = memo(id);
+f(1); f(2); f(1); f(3); f(1); f(2);
+print f(true);
+""",
+            eval,
+        )
+        assert capsys.readouterr().out == "True\n"
+        f = eval.globals.values["f"]
+        assert list(f.results) == [((float, 2.0),), ((bool, True),)]
+        assert (f.hits, f.misses, f.evictions) == (2, 5, 3)
+        assert f.hit_rate() == 2 / 7
+
+    def test_memo_size_option(self, run_file: Callable[..., Interpreter]) -> None:
+        source: str = (
+            "fun id(x) { return x; }\nvar f = memo(id);\nf(1); f(2); f(3); f(1);\n"
+        )
+        f = run_file(source, cache=False, memo_size=2).ctx.values["f"]
+        assert (f.max_size, f.misses, f.evictions) == (2, 4, 2)
+
+        f = run_file(source, cache=False).ctx.values["f"]
+        assert f.max_size == MEMO_SIZE
+
+    def test_purity_check(self) -> None:
+        accepted: list[str] = [
+            "fun f(n) { var a = n; { a = a + 1; } return a; }",
+            "fun f(n) { var a = 0; fun g() { a = a + n; } g(); return a; }",
+            "fun g(n) { return n * 2; } fun f(n) { return g(n) + n; }",
+            "fun f(n) { if (n > 0) return f(n - 1); return memo; }",
+        ]
+        rejected: list[tuple[str, str]] = [
+            ("fun f(n) { print n; }", "it prints (line 1)"),
+            ("var c = 0; fun f(n) { c = n; }", "non-local variable 'c'"),
+            (
+                "fun outer() { var c = 0; fun f(n) { c = n; } return f; }\n"
+                "var f = outer();",
+                "non-local variable 'c'",
+            ),
+            ("fun f(n) { return clock() + n; }", "impure native 'clock'"),
+            (
+                "fun g() { sleep(0); } fun f(n) { g(); return n; }",
+                "impure native 'sleep'",
+            ),
+        ]
+        for src in accepted:
+            run(src + " memo(f);", Eval())
+
+        for src, message in rejected:
+            with pytest.raises(RuntimeException) as e:
+                run(src + " memo(f);", Eval())
+            assert message in e.value.message, src
+
+        with pytest.raises(RuntimeException) as e:
+            run("memo(clock);", Eval())
+        assert e.value.token.lexeme == ")"
+
+    @pytest.mark.parametrize("name", ["eval", "closure"])
+    def test_rejected_is_runtime_error(
+        self, name: str, run_file: Callable[..., Interpreter], errors: io.StringIO
+    ) -> None:
+        with pytest.raises(SystemExit) as e:
+            run_file(
+                "fun f(n) { print n; }\nvar g = memo(f);\n", backend=name, cache=False
+            )
+        assert e.value.code == 65
+        assert errors.getvalue() == (
+            "[line 2] Error at ')': 'memo' cannot cache <fn f>: it prints (line 1).\n"
+        )
+
+
+class TestNatives:
+    @pytest.mark.parametrize("name", BACKENDS.keys())
+    def test_clocks(self, name: str, capsys: pytest.CaptureFixture[str]) -> None:
+        run(
+            """var a = clock();
+var b = clock();
+print a <= b;
+var c = clockNs();
+var d = clockNs();
+print c <= d;
+print (d - c) / 1000000000 < 1;
+""",
+            BACKENDS[name](Context()),
+        )
+        assert capsys.readouterr().out == "True\nTrue\nTrue\n"
+
+    @pytest.mark.parametrize("name", BACKENDS.keys())
+    def test_loaded_on_first_use(
+        self, name: str, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        ctx: Context = Context()
+        run("var a = 1; print a;", BACKENDS[name](ctx))
+        assert list(ctx.values) == ["a"]
+
+        ctx = Context()
+        run("fun f() { return clock; } print f() == f();", BACKENDS[name](ctx))
+        assert sorted(ctx.values) == ["clock", "f"]
+        assert capsys.readouterr().out == "1\nTrue\n"
+
+    @pytest.mark.parametrize("name", BACKENDS.keys())
+    def test_assign_unused_native(
+        self, name: str, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        run("sleep = 2; print sleep;", BACKENDS[name](Context()))
+        assert capsys.readouterr().out == "2\n"
+
+    @pytest.mark.parametrize("name", ["vm", "python"])
+    def test_memo_needs_lox_functions(self, name: str) -> None:
+        # their functions have no declaration for `memo` to check
+        with pytest.raises(RuntimeException) as e:
+            run("fun f(n) { return n; } var g = memo(f);", BACKENDS[name](Context()))
+        assert e.value.message == "Undefined variable 'memo'."
+
+    def test_registered_native(
+        self, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        monkeypatch.setitem(
+            natives.NATIVES,
+            "elapsed",
+            "plox.backend.visitors.eval.native_funcs:Clock",
+        )
+        run("print elapsed() > 0;", Eval())
+        assert capsys.readouterr().out == "True\n"
+
+    def test_profiled_when_loaded(self) -> None:
+        eval: CallProfilingEval = CallProfilingEval()
+        run("fun f() { return clockNs(); } f(); f();", eval)
+        assert eval.calls.functions[("clockNs", 0)].count == 2
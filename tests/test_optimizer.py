@@ -0,0 +1,111 @@
+import pytest
+
+from plox.backend.optimize.optimizer import Optimizer
+from plox.backend.visitors.eval.runtime import Context, RuntimeException
+from plox.backend.visitors.resolver import Resolver
+from plox.frontend.parser import Parser
+from plox.frontend.scanner import Scanner
+from plox.frontend import ast
+from plox.interpreter import BACKENDS
+
+
+def optimize(source: str) -> list[ast.Stmt]:
+    parser: Parser = Parser(tokens=list(Scanner(source)))
+    stmts = parser.parse()
+    assert parser.errors == []
+    resolver: Resolver = Resolver()
+    resolver.resolve(stmts)
+    assert resolver.errors == []
+    return Optimizer().optimize(stmts)
+
+
+def printed(source: str) -> ast.Expr:
+    (stmt,) = optimize(source)
+    assert isinstance(stmt, ast.PrintStmt)
+    return stmt.expression
+
+
+class TestOptimizer:
+    def test_folding(self) -> None:
+        srcs: list[str] = [
+            "print 1 + 2 * 3;",
+            "print (10 - 4) / 2;",
+            'print "foo" + "bar";',
+            "print 1 < 2;",
+            "print 2 >= 3;",
+            "print nil == false;",
+            '"a" != "b";',
+            "print !nil;",
+            "print -(1 + 1);",
+            "print nil or 3;",
+            "print 0 and false;",
+            "print false and x;",
+        ]
+        values: list[object] = [7.0, 3.0, "foobar", True, False, False]
+        values += [None, True, -2.0, 3.0, False, False]
+
+        for src, value in zip(srcs, values):
+            if value is None:
+                assert optimize(src) == []
+                continue
+            expr = printed(src)
+            assert isinstance(expr, ast.LiteralExpr), src
+            assert expr.value == value and type(expr.value) is type(value), src
+
+    def test_partial_folding(self) -> None:
+        _, stmt = optimize("var x = 1; print x + (2 * 3);")
+        assert isinstance(stmt, ast.PrintStmt)
+        expr = stmt.expression
+        assert isinstance(expr, ast.BinaryExpr)
+        assert expr.right == ast.LiteralExpr(6.0)
+
+        expr = printed("print true and x;")
+        assert isinstance(expr, ast.VariableExpr)
+
+    def test_dead_branches(self) -> None:
+        assert optimize("if (false) print 1;") == []
+        assert optimize("while (nil) print 1;") == []
+        (stmt,) = optimize("if (1 > 2) print 1; else print 2;")
+        assert stmt == ast.PrintStmt(ast.LiteralExpr(2.0))
+        (stmt,) = optimize("if (true) { print 1; } else print 2;")
+        assert stmt == ast.BlockStmt([ast.PrintStmt(ast.LiteralExpr(1.0))])
+
+        (stmt,) = optimize("while (x) { if (false) print 1; }")
+        assert isinstance(stmt, ast.WhileStmt)
+        assert stmt.body == ast.BlockStmt([])
+
+    def test_type_errors_stay_at_runtime(self) -> None:
+        srcs: list[str] = [
+            'print 1 + "a";',
+            'print -"a";',
+            "print 1 < nil;",
+            "print 1 / 0;",
+        ]
+        for src in srcs:
+            expr = printed(src)
+            assert isinstance(expr, (ast.BinaryExpr, ast.UnaryExpr)), src
+
+        stmts = optimize('if (false) print 1; else print 2 - "2";')
+        with pytest.raises(RuntimeException) as e:
+            BACKENDS["eval"](Context()).run(stmts)
+        assert e.value.message == "operands must be numbers."
+
+    @pytest.mark.parametrize("backend", BACKENDS.keys())
+    def test_backends_run_optimized_tree(
+        self, backend: str, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        stmts = optimize("""fun f(n) {
+    if (false) return 0;
+    while (false) n = n + 1;
+    var s = "a" + "b";
+    {
+        var t = (n * (2 + 3));
+        print s;
+        print t;
+    }
+    if (!false) return n;
+}
+print f(2);
+""")
+        BACKENDS[backend](Context()).run(stmts)
+        assert capsys.readouterr().out == "ab\n10\n2\n"
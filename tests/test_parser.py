@@ -1,4 +1,4 @@
-from plox.frontend.scanner import Scanner
+from plox.frontend.scanner import Scanner, scan
 from plox.frontend.parser import Parser
 from plox.frontend.tokens import TokenType as TT, Token
 from plox.frontend import ast
@@ -94,3 +94,121 @@ class TestParser:
                 isinstance(got, ast.ExpressionStmt)
                 and got.expression == expected
             )
+
+    def test_token_stream(self) -> None:
+        src = """fun add(a, b) {
+    return a + b;
+}
+for (var i = 0; i < 3; i = i + 1) print add(i, "x" == nil);
+"""
+        from_list: list[ast.Stmt] = Parser(tokens=list(Scanner(src))).parse()
+        parser: Parser = Parser(tokens=scan(src))
+        from_stream: list[ast.Stmt] = parser.parse()
+        assert parser.errors == []
+        assert from_stream == from_list
+
+        func = from_stream[0]
+        assert isinstance(func, ast.FunctionStmt)
+        assert func.name == Token(TT.IDENTIFIER, "add", None, 1)
+
+    def test_token_stream_errors(self) -> None:
+        parser: Parser = Parser(tokens=scan("var x = ;\nprint (1;"))
+        parser.parse()
+        assert [(e.token.lexeme, e.token.line) for e in parser.errors] == [
+            (";", 1),
+            (";", 2),
+        ]
+
+    def test_parse_complete(self) -> None:
+        parser: Parser = Parser(tokens=[])
+        parser.more_tokens(list(Scanner("print 1; fun f() {")))
+        (stmt,) = parser.parse_complete()
+        assert isinstance(stmt, ast.PrintStmt)
+        assert parser.errors == [] and parser.is_pending()
+
+        parser.more_tokens(list(Scanner("return 2;")))
+        assert parser.parse_complete() == []
+        parser.more_tokens(list(Scanner("} print f(")))
+        (stmt,) = parser.parse_complete()
+        assert isinstance(stmt, ast.FunctionStmt)
+        assert parser.is_pending()
+
+        parser.more_tokens(list(Scanner(");")))
+        (stmt,) = parser.parse_complete()
+        assert isinstance(stmt, ast.PrintStmt)
+        assert parser.errors == [] and not parser.is_pending()
+
+        parser.more_tokens(list(Scanner("var = 1;")))
+        assert parser.parse_complete() == []
+        assert [e.token.lexeme for e in parser.errors] == ["="]
+
+    def test_import(self) -> None:
+        for tokens in [
+            list(Scanner('import "lib.lox";')),
+            scan('import "lib.lox";'),
+        ]:
+            (stmt,) = Parser(tokens=tokens).parse()
+            assert isinstance(stmt, ast.ImportStmt)
+            assert stmt.keyword.type == TT.IMPORT
+            assert stmt.path.literal == "lib.lox"
+
+        parser: Parser = Parser(tokens=scan('import lib;\nimport "a"'))
+        parser.parse()
+        assert [(e.token.line, e.message) for e in parser.errors] == [
+            (1, "Expect module path after 'import'."),
+            (2, "Expect ';' after module path."),
+        ]
+
+    def test_parse_stream(self) -> None:
+        src = """fun f(n) { if (n < 1) return 0; return f(n - 1); }
+if (true) print 1; else { print 2; }
+for (var i = 0; i < 2; i = i + 1) { print i; }
+var x = (1 +
+  2);
+{ var y; } print x;
+"""
+        pulled: list[Token] = []
+
+        def tokens():
+            for token in Scanner(src):
+                pulled.append(token)
+                yield token
+
+        parser: Parser = Parser(tokens=[])
+        stream = parser.parse_stream(tokens())
+        func = next(stream)
+        assert isinstance(func, ast.FunctionStmt)
+        # the declaration and the token after it, not the whole source
+        assert pulled[-1] == Token(TT.IF, "if", None, 2)
+
+        stmts: list[ast.Stmt] = [func, *stream]
+        assert parser.errors == []
+        assert stmts == Parser(tokens=list(Scanner(src))).parse()
+        assert len(stmts) == 6
+
+    def test_parse_stream_errors(self) -> None:
+        for src in ["var x = ;\nprint (1;", "print 1; fun f() {", "print"]:
+            parser: Parser = Parser(tokens=[])
+            list(parser.parse_stream(Scanner(src)))
+            expected: Parser = Parser(tokens=list(Scanner(src)))
+            expected.parse()
+            assert [(e.token, e.message) for e in parser.errors] == [
+                (e.token, e.message) for e in expected.errors
+            ], src
+
+    def test_absent_children(self) -> None:
+        src = "fun f() { var x; if (x) return; }\nfor (;;) print 1;"
+        func, loop = Parser(tokens=list(Scanner(src))).parse()
+        assert isinstance(func, ast.FunctionStmt)
+        assert isinstance(func.body, ast.BlockStmt)
+        var, branch = func.body.statements
+        assert isinstance(var, ast.VarStmt) and var.initializer is None
+        assert isinstance(branch, ast.IfStmt) and branch.elseBranch is None
+        assert isinstance(branch.thenBranch, ast.ReturnStmt)
+        assert branch.thenBranch.value is None
+        # no block for the missing initializer and increment
+        assert loop == ast.WhileStmt(
+            ast.LiteralExpr(True), ast.PrintStmt(ast.LiteralExpr(1.0))
+        )
+        # nodes are slotted
+        assert not hasattr(var, "__dict__")
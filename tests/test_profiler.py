@@ -0,0 +1,123 @@
+import io
+from pathlib import Path
+from typing import Any, Callable
+import sys
+
+import pytest
+
+import main
+from plox.backend.visitors.eval.profiler import (
+    CallProfiler,
+    CallProfilingEval,
+    FunctionKey,
+    ProfilingEval,
+)
+from plox.backend.visitors.eval.runtime import Context, LoxCallable
+from plox.backend.visitors.eval.visitor import Eval
+from plox.backend.visitors.resolver import Resolver
+from plox.frontend.parser import Parser
+from plox.frontend.scanner import Scanner
+from plox.interpreter import Interpreter
+
+PROGRAM = """fun f(n) {
+    if (n < 1) return 0;
+    return f(n - 1) + 1;
+}
+print f(3);
+"""
+
+
+class TestProfiler:
+    def test_node_counts(
+        self,
+        run_file: Callable[..., Interpreter],
+        errors: io.StringIO,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        lox: Interpreter = run_file(PROGRAM, profile=True, cache=False)
+
+        assert capsys.readouterr().out == "3\n"
+        assert list(lox.phases) == ["scan", "parse", "resolve", "optimize", "exec"]
+        assert lox.nodes["CallExpr"].count == 4
+        assert lox.nodes["IfStmt"].count == 4
+        assert lox.nodes["ReturnStmt"].count == 4
+        assert lox.nodes["PrintStmt"].count == 1
+
+        # recursive calls are not counted again in the total
+        calls = lox.nodes["CallExpr"]
+        assert calls.own <= calls.total <= lox.nodes["PrintStmt"].total
+        report: str = errors.getvalue()
+        assert "exec" in report and "CallExpr" in report
+        # each call site misses on its first call only
+        assert report.splitlines()[-1].split() == ["CallExpr", "2", "2", "50.0%"]
+
+    def test_plain_eval_is_not_instrumented(self) -> None:
+        assert ProfilingEval.visitBinaryExpr is not Eval.visitBinaryExpr
+        assert Interpreter().nodes == {}
+        assert Interpreter().backend is Eval
+
+
+class Probe(LoxCallable):
+    def __init__(self, calls: CallProfiler) -> None:
+        self.calls = calls
+        self.stacks: list[list[FunctionKey]] = []
+
+    def arity(self) -> int:
+        return 0
+
+    def call(self, eval: Eval, args: list[Any]) -> Any:
+        self.stacks.append(self.calls.stack())
+        return None
+
+
+class TestCallProfiler:
+    def test_calls_and_stacks(self, capsys: pytest.CaptureFixture[str]) -> None:
+        stmts = Parser(tokens=list(Scanner(PROGRAM + "probe();\n"))).parse()
+        Resolver().resolve(stmts)
+        calls: CallProfiler = CallProfiler()
+        probe: Probe = Probe(calls)
+        ctx: Context = Context()
+        ctx.define("probe", probe)
+        CallProfilingEval(ctx, calls).run(stmts)
+        assert capsys.readouterr().out == "3\n"
+
+        f: FunctionKey = ("f", 1)
+        assert calls.functions[f].count == 4
+        assert calls.functions[("probe", 0)].count == 1
+        assert probe.stacks == [[("<script>", 0), ("probe", 0)]]
+        assert calls.stack() == []
+
+        stats = calls.functions[f]
+        assert stats.own <= stats.total <= calls.functions[("<script>", 0)].total
+        stacks: list[str] = [
+            line.rsplit(" ", 1)[0] for line in calls.collapsed().splitlines()
+        ]
+        assert "<script>;f:1;f:1;f:1;f:1" in stacks
+        assert calls.summary().splitlines()[0].split()[0] == "function"
+
+    def test_flamegraph_file(
+        self,
+        tmp_path: Path,
+        run_file: Callable[..., Interpreter],
+        errors: io.StringIO,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        run_file(PROGRAM, flamegraph=tmp_path / "stacks.txt", cache=False)
+        assert capsys.readouterr().out == "3\n"
+        for line in (tmp_path / "stacks.txt").read_text().splitlines():
+            frames, micros = line.rsplit(" ", 1)
+            assert frames.startswith("<script>") and int(micros) > 0
+
+    def test_not_combined_with_node_profile(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        with pytest.raises(ValueError):
+            Interpreter(profile=True, profile_calls=True)
+        Interpreter(profile=True, profile_calls=True, backend="vm")
+
+        monkeypatch.setattr(
+            sys, "argv", ["main.py", "--profile", "--flamegraph", "out.txt", "x.lox"]
+        )
+        with pytest.raises(SystemExit) as e:
+            main.main()
+        assert e.value.code == 2
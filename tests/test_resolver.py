@@ -0,0 +1,68 @@
+from plox.backend.visitors.resolver import Resolver
+from plox.frontend.parser import Parser
+from plox.frontend.scanner import Scanner
+from plox.frontend import ast
+
+
+def resolve(source: str) -> tuple[list[ast.Stmt], Resolver]:
+    stmts = Parser(tokens=list(Scanner(source))).parse()
+    resolver: Resolver = Resolver()
+    resolver.resolve(stmts)
+    return stmts, resolver
+
+
+class TestResolver:
+    def test_slots(self) -> None:
+        stmts, resolver = resolve(
+            """var g = 1;
+fun f(a, b) {
+    var c = a;
+    {
+        var d = b;
+        print c + d + g;
+    }
+}
+"""
+        )
+        assert resolver.errors == []
+
+        func = stmts[1]
+        assert isinstance(func, ast.FunctionStmt)
+        assert isinstance(func.body, ast.BlockStmt)
+        var_c = func.body.statements[0]
+        assert isinstance(var_c, ast.VarStmt)
+        assert isinstance(var_c.initializer, ast.VariableExpr)
+        assert (var_c.initializer.depth, var_c.initializer.slot) == (0, 0)
+
+        block = func.body.statements[1]
+        assert isinstance(block, ast.BlockStmt)
+        var_d, print_stmt = block.statements
+        assert isinstance(var_d, ast.VarStmt)
+        assert isinstance(var_d.initializer, ast.VariableExpr)
+        assert (var_d.initializer.depth, var_d.initializer.slot) == (1, 1)
+
+        assert isinstance(print_stmt, ast.PrintStmt)
+        sum_expr = print_stmt.expression
+        assert isinstance(sum_expr, ast.BinaryExpr)
+        assert isinstance(sum_expr.right, ast.VariableExpr)
+        assert sum_expr.right.depth == -1
+        assert isinstance(sum_expr.left, ast.BinaryExpr)
+        c, d = sum_expr.left.left, sum_expr.left.right
+        assert isinstance(c, ast.VariableExpr) and (c.depth, c.slot) == (1, 2)
+        assert isinstance(d, ast.VariableExpr) and (d.depth, d.slot) == (0, 0)
+
+    def test_errors(self) -> None:
+        srcs: list[str] = [
+            "{ var a = a; }",
+            "{ var a = 1; var a = 2; }",
+            "return 1;",
+        ]
+        messages: list[str] = [
+            "Can't read local variable in its own initializer.",
+            "Already a variable with this name in this scope.",
+            "Can't return from top-level code.",
+        ]
+
+        for src, message in zip(srcs, messages):
+            _, resolver = resolve(src)
+            assert [err.message for err in resolver.errors] == [message]
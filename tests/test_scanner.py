@@ -1,11 +1,27 @@
-from typing import List
+from typing import Callable, Iterator, List
+import io
+import mmap
 
-from plox.frontend.scanner import Scanner
+import pytest
+
+from plox.frontend.scanner import RegexScanner, Scanner, StreamScanner, scan
 from plox.frontend.tokens import TokenType, Token
 
+type ScannerType = Callable[[str], Iterator[Token]]
+
+
+def small_chunks(source: str) -> Iterator[Token]:
+    # chunks of a few characters split most lexemes across chunk boundaries
+    return StreamScanner(io.StringIO(source), chunk_size=3)
+
+
+@pytest.fixture(params=[Scanner, RegexScanner, small_chunks])
+def scanner_type(request: pytest.FixtureRequest) -> ScannerType:
+    return request.param
+
 
 class TestScanner:
-    def test_function_declaration(self) -> None:
+    def test_function_declaration(self, scanner_type: ScannerType) -> None:
         source = """fun main() {
     var x = 132;
     var y = 123213.232;
@@ -46,7 +62,7 @@ class TestScanner:
             Token(type=TokenType.RBRACE, lexeme="}", line=5, literal=None),
             Token(type=TokenType.EOF, lexeme="", line=6, literal=None),
         ]
-        scanner: Scanner = Scanner(source=source)
+        scanner: Iterator[Token] = scanner_type(source)
 
         for expected_token in expected_tokens:
             token = next(scanner)
@@ -57,7 +73,7 @@ class TestScanner:
                 and token.line == expected_token.line
             )
 
-    def test_class_declaration(self) -> None:
+    def test_class_declaration(self, scanner_type: ScannerType) -> None:
         source = """class Breakfast {
     cook() {
         print "Eggs a-fryin'!";
@@ -132,7 +148,7 @@ class TestScanner:
             Token(type=TokenType.EOF, lexeme="", line=10, literal=None),
         ]
 
-        scanner: Scanner = Scanner(source=source)
+        scanner: Iterator[Token] = scanner_type(source)
 
         for expected_token in expected_tokens:
             token = next(scanner)
@@ -142,3 +158,83 @@ class TestScanner:
                 and token.literal == expected_token.literal
                 and token.line == expected_token.line
             )
+
+    def test_comments_and_numbers(self, scanner_type: ScannerType) -> None:
+        source = """// leading comment
+var a = 1.5; // trailing comment
+print a / 2;
+"""
+        tokens = [(t.type, t.lexeme, t.line) for t in scanner_type(source)]
+        assert tokens == [
+            (TokenType.VAR, "var", 2),
+            (TokenType.IDENTIFIER, "a", 2),
+            (TokenType.EQ, "=", 2),
+            (TokenType.NUMBER, "1.5", 2),
+            (TokenType.SEMICOLON, ";", 2),
+            (TokenType.PRINT, "print", 3),
+            (TokenType.IDENTIFIER, "a", 3),
+            (TokenType.SLASH, "/", 3),
+            (TokenType.NUMBER, "2", 3),
+            (TokenType.SEMICOLON, ";", 3),
+            (TokenType.EOF, "", 4),
+        ]
+
+    def test_invalid_tokens(self, scanner_type: ScannerType) -> None:
+        source = 'var @x = 1;\nprint "a\nb" + "open'
+        tokens = list(scanner_type(source))
+        assert [(t.type, t.lexeme, t.line, t.meta) for t in tokens] == [
+            (TokenType.VAR, "var", 1, ""),
+            (TokenType.INVALID, "@x", 1, "undefined token"),
+            (TokenType.EQ, "=", 1, ""),
+            (TokenType.NUMBER, "1", 1, ""),
+            (TokenType.SEMICOLON, ";", 1, ""),
+            (TokenType.PRINT, "print", 2, ""),
+            (TokenType.STRING, '"a\nb"', 3, ""),
+            (TokenType.PLUS, "+", 3, ""),
+            (TokenType.INVALID, '"open', 3, "unterminated string."),
+            (TokenType.EOF, "", 3, ""),
+        ]
+
+    def test_scanners_agree(self) -> None:
+        source = """fun f(a_b, c) {
+    // comment with "quotes" and \0 inside
+    if (a >= 10.25 and c != nil) return "multi
+line" + -c * 3.;
+    $ # 12ab != !x <= y;
+}
+"""
+        assert list(RegexScanner(source)) == list(Scanner(source))
+
+    def test_token_stream(self) -> None:
+        source = 'var s = "two\nlines";\n\nprint s @ ;'
+        stream = scan(source)
+        assert list(stream) == list(Scanner(source))
+        assert len(stream) == 10
+        assert stream.lexeme(3) == '"two\nlines"'
+        assert [stream.line(i) for i in (0, 3, 5, 9)] == [1, 2, 4, 4]
+
+        assert [t.lexeme for t in stream.invalid()] == ["@"]
+        valid = stream.valid()
+        assert len(valid) == 9
+        assert TokenType.INVALID not in valid.types()
+
+    def test_stream_chunk_boundaries(self, tmp_path) -> None:
+        source = """fun f(a_b, c) {
+    // comment with "quotes", é and \0 inside
+    if (a >= 10.25 and c != nil) return "multi
+line ünïcode" + -c * 3.;
+    $ # 12ab != !x <= y;
+}
+"""
+        expected: list[Token] = list(Scanner(source))
+        for size in [1, 2, 5, 64, 1 << 16]:
+            tokens = list(StreamScanner(io.StringIO(source), size))
+            assert tokens == expected, size
+            data = io.BytesIO(source.encode())
+            assert list(StreamScanner(data, size)) == expected, size
+
+        path = tmp_path / "script.lox"
+        path.write_text(source, encoding="utf-8")
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                assert list(StreamScanner(m, 7)) == expected
@@ -0,0 +1,65 @@
+import io
+from typing import Callable
+
+import pytest
+
+from plox.interpreter import BACKENDS, Interpreter
+
+PROGRAM = """var total = 0;
+fun add(n) { total = total + n; return total; }
+for (var i = 1; i <= 3; i = i + 1) print add(i);
+if (total > 5) print "big"; else print "small";
+{
+    var local = "block";
+    print local;
+}
+"""
+
+
+@pytest.mark.usefixtures("errors")
+@pytest.mark.parametrize("backend", BACKENDS.keys())
+class TestStream:
+    def test_same_output(
+        self,
+        run_file: Callable[..., Interpreter],
+        backend: str,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        run_file(PROGRAM, backend=backend, cache=False, stream=False)
+        expected: str = capsys.readouterr().out
+        run_file(PROGRAM, backend=backend, cache=False, stream=True)
+        assert capsys.readouterr().out == expected == "1\n3\n6\nbig\nblock\n"
+
+    def test_runs_until_error(
+        self,
+        run_file: Callable[..., Interpreter],
+        backend: str,
+        errors: io.StringIO,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        cases: list[tuple[str, str, str]] = [
+            (
+                "print 1;\nvar x = ;\nprint 2;\nprint (3;",
+                "1\n",
+                "[line 2] Error at ';': Expect expression.\n"
+                "[line 4] Error at ';': Expect ')' after expression.\n",
+            ),
+            (
+                'print 1;\nprint -"a";\nprint 2;',
+                "1\n",
+                "[line 2] Error at '-': operand must be a number.\n",
+            ),
+            (
+                "print 1;\n{ var a = a; }\nprint 2;",
+                "1\n",
+                "[line 2] Error at 'a': "
+                "Can't read local variable in its own initializer.\n",
+            ),
+        ]
+        for source, output, message in cases:
+            with pytest.raises(SystemExit):
+                run_file(source, backend=backend, cache=False, stream=True)
+            assert capsys.readouterr().out == output, source
+            assert errors.getvalue() == message, source
+            errors.truncate(0)
+            errors.seek(0)
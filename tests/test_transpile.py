@@ -0,0 +1,107 @@
+import io
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from plox import interpreter
+from plox.backend.transpile.codegen import Codegen
+from plox.backend.visitors.resolver import Resolver
+from plox.cache import DiskCache
+from plox.frontend.parser import Parser
+from plox.frontend.scanner import Scanner
+from plox.interpreter import Interpreter
+
+PROGRAM = """fun fib(n) {
+    if (n < 2) return n;
+    return fib(n - 1) + fib(n - 2);
+}
+for (var i = 0; i < 3; i = i + 1) {
+    print fib(i + 10);
+}
+"""
+
+
+def generate(source: str) -> str:
+    stmts = Parser(tokens=list(Scanner(source))).parse()
+    Resolver().resolve(stmts)
+    return Codegen().generate(stmts)
+
+
+@pytest.fixture
+def cache_dir(cache_root: Path) -> Path:
+    return cache_root / "code"
+
+
+class TestCodegen:
+    def test_native_constructs(self) -> None:
+        code: str = generate(PROGRAM)
+        assert "def " in code
+        assert "while " in code
+
+    def test_undefined_global_line(
+        self,
+        run_file: Callable[..., Interpreter],
+        errors: io.StringIO,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        with pytest.raises(SystemExit):
+            run_file("var a = 1;\nprint a;\nprint b;\n", backend="python")
+        assert capsys.readouterr().out == "1\n"
+        assert errors.getvalue() == "[line 3] Error at 'b': Undefined variable 'b'.\n"
+
+
+class TestCodeCache:
+    def test_second_run_skips_front_end(
+        self,
+        run_file: Callable[..., Interpreter],
+        cache_dir: Path,
+        capsys: pytest.CaptureFixture[str],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        run_file(PROGRAM, backend="python")
+        assert capsys.readouterr().out == "55\n89\n144\n"
+        assert len(list(cache_dir.iterdir())) == 1
+
+        def fail(*args, **kwargs):
+            raise AssertionError("source was scanned again")
+
+        monkeypatch.setitem(interpreter.SCANNERS, "regex", fail)
+        run_file(PROGRAM, backend="python")
+        assert capsys.readouterr().out == "55\n89\n144\n"
+
+    def test_changed_source_is_recompiled(
+        self,
+        run_file: Callable[..., Interpreter],
+        cache_dir: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        run_file("print 1;", backend="python")
+        run_file("print 2;", backend="python")
+        assert capsys.readouterr().out == "1\n2\n"
+        assert len(list(cache_dir.iterdir())) == 2
+
+    def test_corrupted_entry_is_replaced(
+        self,
+        run_file: Callable[..., Interpreter],
+        cache_dir: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        run_file(PROGRAM, backend="python")
+        entry: Path = next(cache_dir.iterdir())
+        entry.write_bytes(b"not a code object")
+
+        run_file(PROGRAM, backend="python")
+        assert capsys.readouterr().out == "55\n89\n144\n" * 2
+        assert DiskCache(cache_dir).load(entry.name) != b"not a code object"
+
+    def test_parse_errors_are_not_cached(
+        self,
+        run_file: Callable[..., Interpreter],
+        cache_dir: Path,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        with pytest.raises(SystemExit):
+            run_file("print ;", backend="python")
+        capsys.readouterr()
+        assert not cache_dir.exists() or list(cache_dir.iterdir()) == []
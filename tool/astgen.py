@@ -23,21 +23,21 @@ def main():
         buf = io.StringIO()
         buf.write("from abc import ABC, abstractmethod\n")
         buf.write("from typing import Any\n")
-        buf.write("from dataclasses import dataclass\n\n")
+        buf.write("from dataclasses import dataclass, field\n\n")
         buf.write("from plox.frontend.tokens import Token\n\n\n")
 
         define_ast(
             buf,
             "Expr",
             [
-                "Assign   : Token name, Expr value",
+                "Assign   : Token name, Expr value | int depth = -1, int slot = -1",
                 "Logical  : Expr left, Token operator, Expr right",
                 "Binary   : Expr left, Token operator, Expr right",
-                "Call     : Expr callee, Token paren, list[Expr] arguments",
+                "Call     : Expr callee, Token paren, list[Expr] arguments | Any cached = None",
                 "Grouping : Expr expression",
                 "Unary    : Token operator, Expr right",
                 "Literal  : Any value",
-                "Variable : Token name",
+                "Variable : Token name | int depth = -1, int slot = -1",
             ],
         )
 
@@ -48,11 +48,12 @@ def main():
                 "Block        : list[Stmt] statements",
                 "Expression   : Expr expression",
                 "Function     : Token name, list[Token] params, Stmt body",
-                "Return       : Token keyword, Expr value",
-                "If           : Expr condition, Stmt thenBranch, Stmt elseBranch",
+                "Return       : Token keyword, Expr|None value",
+                "If           : Expr condition, Stmt thenBranch, Stmt|None elseBranch",
                 "Print        : Expr expression",
-                "Var          : Token name, Expr initializer",
+                "Var          : Token name, Expr|None initializer",
                 "While        : Expr condition, Stmt body",
+                "Import       : Token keyword, Token path",
             ],
         )
 
@@ -69,6 +70,8 @@ def define_ast(
 ):
 
     buf.write(f"class {basename}(ABC):\n")
+    # nodes are slotted, which the base classes must be too
+    buf.write("    __slots__ = ()\n\n")
     buf.write(f"    @abstractmethod\n")
     buf.write(f"    def accept[T](self, visitor: '{basename}Visitor[T]') -> T:\n")
     buf.write(f"        pass\n\n")
@@ -91,15 +94,30 @@ def define_type(
     classname: str,
     fields: str,
 ) -> None:
-    buf.write("@dataclass\n")
+    # fields after ' | ' are annotations filled in by later passes (e.g. the
+    # resolver); they carry a default and are ignored by node equality
+    fields, _, annotations = fields.partition(" | ")
+
+    # slots keep nodes small and their attributes fast to read; nodes are not
+    # frozen because the resolver, the optimizer and call-site caches update
+    # them in place
+    buf.write("@dataclass(slots=True)\n")
     buf.write(f"class {classname}{basename}({basename}):\n")
     for field in map(lambda s: s.strip(), fields.split(",")):
         field_type, field_name = field.split()
         buf.write(f"    {field_name}: {field_type}")
-        if field_type == "Any":
+        # children the source may leave out are `None` rather than a node
+        if field_type == "Any" or field_type.endswith("|None"):
             buf.write(" = None")
         buf.write("\n")
 
+    for annotation in filter(None, map(lambda s: s.strip(), annotations.split(","))):
+        declaration, default = map(lambda s: s.strip(), annotation.split("="))
+        field_type, field_name = declaration.split()
+        buf.write(
+            f"    {field_name}: {field_type} = field(default={default}, compare=False)\n"
+        )
+
     buf.write(f"    def accept[T](self, visitor: '{basename}Visitor[T]') -> T:\n")
     buf.write(f"        return visitor.visit{classname}{basename}(self)\n\n")
     buf.write("\n\n")